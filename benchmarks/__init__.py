@@ -0,0 +1,7 @@
+"""
+Nasse benchmarks
+
+Each module has a `run` function returning its results, mostly in seconds.
+
+Usage: python -m benchmarks [--output results.json] [--compare baseline.json] [--threshold 0.25]
+"""
@@ -0,0 +1,79 @@
+"""
+Runs the benchmarks, writes the results as JSON and compares them with a previous run
+
+Usage: python -m benchmarks [names ...] [--output results.json] [--compare baseline.json] [--threshold 0.25]
+
+Exits with a non-zero status when a result got slower than the baseline by more than the threshold.
+"""
+import argparse
+import importlib
+import json
+import platform
+import sys
+import time
+
+import nasse
+
+BENCHMARKS = ("coldstart", "startup", "registry", "router", "request", "caller", "pipeline", "concurrency")
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Yields the (benchmark, name, baseline, result) tuples of the results slower than the baseline by more than `threshold`"""
+    for benchmark, values in results.items():
+        for name, value in values.items():
+            try:
+                previous = baseline[benchmark][name]
+            except KeyError:
+                continue
+            # only the timings are compared, not the parameters (number of routes, etc.)
+            if not isinstance(value, float) or not isinstance(previous, float) or previous <= 0:
+                continue
+            if (value - previous) / previous > threshold:
+                yield benchmark, name, previous, value
+
+
+def entry():
+    """The entrypoint for terminals"""
+    parser = argparse.ArgumentParser("benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", default=list(BENCHMARKS), choices=BENCHMARKS, help="The benchmarks to run")
+    parser.add_argument("--output", "-o", action="store", required=False, help="The JSON file to write the results to")
+    parser.add_argument("--compare", "-c", action="store", required=False, help="A JSON file from a previous run to compare to")
+    parser.add_argument("--threshold", "-t", action="store", type=float, default=0.25,
+                        help="The relative slowdown considered as a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = importlib.import_module(f"benchmarks.{name}").run()
+        for key, value in results[name].items():
+            print(f"  {key:<36}{value * 1e3:.4f}ms" if isinstance(value, float) else f"  {key:<36}{value}", file=sys.stderr)
+
+    report = {
+        "time": time.time(),
+        "nasse": nasse.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = list(compare(results, baseline, args.threshold))
+        for benchmark, name, previous, value in regressions:
+            print(f"Regression in {benchmark} / {name}: {previous * 1e3:.4f}ms → {value * 1e3:.4f}ms "
+                  f"(+{(value - previous) / previous:.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(entry())
@@ -0,0 +1,33 @@
+"""
+Benchmarks the resolution of the `{caller}` log placeholder
+
+Usage: python -m benchmarks.caller
+"""
+import timeit
+
+from nasse.utils import formatter
+
+
+class Handler:
+    """A class logging from a method, as an endpoint handler would"""
+
+    def method(self, depth: int = 0):
+        """Calls `caller_name` from `depth` nested frames"""
+        if depth:
+            return self.method(depth - 1)
+        return formatter.caller_name(skip=1)
+
+
+def run(number: int = 10000):
+    """Runs the benchmark and returns the results (in seconds per call)"""
+    handler = Handler()
+    results = {}
+    for depth in (0, 20):
+        results[f"caller_name (stack +{depth})"] = timeit.timeit(lambda: handler.method(depth), number=number) / number
+    results["format('{caller}')"] = timeit.timeit(lambda: formatter.format("{caller}"), number=number) / number
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:<28}{result * 1e6:.2f}µs")
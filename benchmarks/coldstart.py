@@ -0,0 +1,63 @@
+"""
+Benchmarks the cold start of an app: importing Nasse, creating the app, declaring the routes and serving the first request
+
+Usage: python -m benchmarks.coldstart
+"""
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.startup import make_handler
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def import_time(repeat: int = 5) -> float:
+    """Returns the median time taken to import Nasse in a fresh interpreter (in seconds)"""
+    code = "import time; start = time.perf_counter(); import nasse; print(time.perf_counter() - start)"
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        results.append(float(output.stdout))
+    return statistics.median(results)
+
+
+def run(counts=(10, 1000, 10000), repeat: int = 5):
+    """Runs the benchmark and returns the results (in seconds, per route for the declarations)"""
+    import nasse
+
+    results = {"import nasse": import_time(repeat)}
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        nasse.Nasse("benchmark", logging_level="ERROR")
+        timings.append(time.perf_counter() - start)
+    results["Nasse()"] = statistics.median(timings)
+
+    for count in counts:
+        handlers = [make_handler(index) for index in range(count)]
+        app = nasse.Nasse("benchmark", logging_level="ERROR")
+        start = time.perf_counter()
+        for index, handler in enumerate(handlers):
+            app.route("/items/{index}/<int:id>".format(index=index), methods="GET")(handler)
+        results["Nasse.route ({count} routes)".format(count=count)] = (time.perf_counter() - start) / count
+
+    timings = []
+    for _ in range(repeat):
+        app = nasse.Nasse("benchmark", logging_level="ERROR")
+        app.route("/items/<int:id>", methods="GET")(make_handler(0))
+        client = app.flask.test_client()
+        start = time.perf_counter()
+        response = client.get("/items/1", buffered=True)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    results["first request"] = statistics.median(timings)
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:<32}{result * 1e3:.3f}ms")
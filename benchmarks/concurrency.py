@@ -0,0 +1,63 @@
+"""
+Benchmarks how the throughput scales with the number of threads serving the requests
+
+The results are the average time per request (the inverse of the throughput), in-process and
+through the threaded development server.
+
+To compare the default build with the free-threaded one (PEP 703), run it with both interpreters:
+
+    python3.13 -m benchmarks concurrency --output gil.json
+    python3.13t -m benchmarks concurrency --compare gil.json
+
+Usage: python -m benchmarks.concurrency
+"""
+import threading
+
+from werkzeug.serving import make_server
+
+import nasse
+from nasse import testing
+from nasse.utils.concurrency import gil_enabled
+
+THREADS = (1, 2, 4, 8, 16, 32)
+
+
+def make_app():
+    """Creates an app doing a bit of work for each request"""
+    app = nasse.Nasse("benchmark", logging_level="ERROR", compress=False)
+
+    @app.route("/items", methods="GET")
+    def items(count: int = 20):
+        return [{"id": index, "name": "item {index}".format(index=index)} for index in range(count)]
+
+    return app
+
+
+def run(requests: int = 2000, threads=THREADS):
+    """Runs the benchmark and returns the results (in seconds per request)"""
+    app = make_app()
+    results = {"gil": gil_enabled()}
+    for count in threads:
+        result = testing.load(app, "/items", requests=requests, threads=count)
+        assert result.statuses == {200: requests}
+        results["in-process ({count} threads)".format(count=count)] = result.duration / result.requests
+
+    server = make_server("127.0.0.1", 0, app.wsgi, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = "http://127.0.0.1:{port}/items".format(port=server.server_port)
+        for count in threads:
+            result = testing.load_http(url, requests=requests, threads=count)
+            assert result.statuses == {200: requests}
+            results["threaded server ({count} threads)".format(count=count)] = result.duration / result.requests
+    finally:
+        server.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print("GIL enabled: {gil}".format(gil=results.pop("gil")))
+    for name, result in results.items():
+        print(f"{name:<32}{result * 1e6:>10.1f}µs/request{1 / result:>10.0f} req/s")
@@ -0,0 +1,122 @@
+"""
+Benchmarks each stage of the request processing pipeline separately, with the memory they allocate
+
+The memory is the peak traced by tracemalloc while running a single operation, above what was allocated before.
+
+Usage: python -m benchmarks.pipeline
+"""
+import importlib
+import timeit
+import tracemalloc
+
+import flask
+import werkzeug
+
+import nasse
+from nasse import receive, response
+from nasse.utils import json, xml
+
+# `nasse.request` is the request proxy, not the module
+request_module = importlib.import_module("nasse.request")
+
+PAYLOADS = {
+    "scalar": 42,
+    "flat": {"id": 1, "name": "someone", "active": True, "score": 1.5, "tags": None},
+    "nested": {"user": {"id": 1, "profile": {"name": "someone", "links": ["a", "b", "c"], "settings": {"theme": "dark"}}}},
+    "rows (1000)": [{"id": index, "name": "item {index}".format(index=index), "price": index * 0.5} for index in range(1000)],
+    "long string": "nasse " * 10000
+}
+
+
+class Quiet(nasse.exceptions.NasseException):
+    """An exception which is not logged when created"""
+    LOG = False
+
+
+class Accounts(nasse.models.AccountManagement):
+    """An account management which accepts any token"""
+
+    def retrieve_type(self, account):
+        return "user"
+
+    def retrieve_account(self, token: str):
+        return {"token": token}
+
+    def verify_token(self, token: str):
+        return True
+
+
+def handler(id: int, limit: int = 10, name: str = "", request=None, values=None, account=None):
+    """
+    Retrieves an item
+
+    Parameters
+    ----------
+    limit: int
+        The maximum number of results
+    name: str
+        A name
+    """
+
+
+def measure(operation, number: int):
+    """Returns the time per operation (in seconds) and the peak memory allocated by a single one (in bytes)"""
+    operation()  # warming up the caches
+    duration = timeit.timeit(operation, number=number) / number
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return duration, max(peak - before, 0)
+
+
+def run(number: int = 2000):
+    """Runs the benchmark and returns the results (in seconds per operation, and bytes allocated per operation)"""
+    apps = {sanitize: nasse.Nasse("benchmark", logging_level="ERROR", sanitize_user_input=sanitize, account_management=Accounts())
+            for sanitize in (True, False)}
+    app = apps[True]
+    endpoint = nasse.models.Endpoint(handler=handler, path="/items/<int:id>")
+    secured = nasse.models.Endpoint(handler=handler, path="/items/<int:id>", login=nasse.models.Login(required=True))
+    raw = werkzeug.Request(werkzeug.test.EnvironBuilder(path="/items/1",
+                                                        query_string={"limit": "20", "name": "<b>someone</b>"},
+                                                        headers={"Authorization": "token"}).get_environ())
+
+    stages = {}
+    for sanitize, current in apps.items():
+        stages["Request.__init__ (sanitize={sanitize})".format(sanitize=sanitize)] = (
+            lambda current=current: request_module.Request(current, endpoint, dynamics={"id": "1"}, request=raw))
+
+    context = request_module.Request(app, endpoint, dynamics={"id": "1"}, request=raw)
+    receiver = receive.Receive(app, endpoint)
+    secured_receiver = receive.Receive(app, secured)
+    stages["Receive.authenticate (no login)"] = lambda: receiver.authenticate(context)
+    stages["Receive.authenticate (required)"] = lambda: secured_receiver.authenticate(context)
+    stages["Receive.arguments"] = lambda: receiver.arguments(context, None)
+
+    for shape, payload in PAYLOADS.items():
+        result = {"success": True, "error": None, "message": None, "data": {"value": payload}}
+        stages["json.encode_response ({shape})".format(shape=shape)] = lambda result=result: json.encode_response(result, minify=True)
+        stages["xml.encode ({shape})".format(shape=shape)] = lambda result=result: xml.encode(result, minify=True)
+
+    stages["exception_to_response (default)"] = lambda: response.exception_to_response(Quiet())
+    stages["exception_to_response (message)"] = lambda: response.exception_to_response(Quiet(message="Something went wrong"))
+
+    results = {}
+    with app.flask.test_request_context("/items/1"):
+        stages["Nasse.after_request"] = lambda: app.after_request(flask.Response("Hello"))
+        for name, operation in stages.items():
+            duration, allocated = measure(operation, number)
+            results[name] = duration
+            results["{name} (bytes)".format(name=name)] = allocated
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    for name, result in results.items():
+        if not name.endswith("(bytes)"):
+            print(f"{name:<44}{result * 1e9:>12.0f}ns/op{results[name + ' (bytes)']:>12}B")
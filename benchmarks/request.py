@@ -0,0 +1,40 @@
+"""
+Benchmarks the cost of accessing the request attributes from a handler
+
+Usage: python -m benchmarks.request
+"""
+import importlib
+import timeit
+
+import flask
+
+import nasse
+
+# `nasse.request` is the request proxy, not the module
+request_module = importlib.import_module("nasse.request")
+
+
+def run(number: int = 100000):
+    """Runs the benchmark and returns the results (in seconds per attribute access)"""
+    app = nasse.Nasse("benchmark", logging_level="ERROR")
+    endpoint = nasse.models.Endpoint(handler=lambda: None, path="/benchmark")
+    results = {}
+    with app.flask.test_request_context("/benchmark?name=someone"):
+        context = request_module.Request(app, endpoint)
+        token = request_module.current.set(context)
+        flask.g.request = context
+        try:
+            for name, getter in [("Request.values", lambda: context.values),
+                                 ("Request.path", lambda: context.path),
+                                 ("nasse.request.values", lambda: nasse.request.values),
+                                 ("nasse.request.path", lambda: nasse.request.path),
+                                 ("flask.request.path", lambda: flask.request.path)]:
+                results[name] = timeit.timeit(getter, number=number) / number
+        finally:
+            request_module.current.reset(token)
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:<24}{result * 1e9:.1f}ns")
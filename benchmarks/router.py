@@ -0,0 +1,62 @@
+"""
+Benchmarks the route resolution with a lot of programmatically generated routes
+
+Usage: python -m benchmarks.router [number of routes]
+"""
+import random
+import sys
+import timeit
+
+from nasse.utils import router
+
+
+def generate(count: int):
+    """Generates `count` routes, with a mix of static and dynamic segments"""
+    routes = []
+    for index in range(count):
+        kind = index % 4
+        if kind == 0:
+            routes.append(f"/api/v1/resource{index}")
+        elif kind == 1:
+            routes.append(f"/api/v1/resource{index}/<int:id>")
+        elif kind == 2:
+            routes.append(f"/api/v2/group{index % 50}/item{index}/<str:name>")
+        else:
+            routes.append(f"/api/v2/group{index % 50}/<int:id>/item{index}/<float:value>")
+    return routes
+
+
+def sample(routes, count: int = 200):
+    """Builds concrete paths to resolve"""
+    paths = []
+    for route in random.Random(0).sample(routes, min(count, len(routes))):
+        paths.append(route.replace("<int:id>", "42").replace("<str:name>", "someone").replace("<float:value>", "1.5"))
+    return paths
+
+
+def run(count: int = 10000, number: int = 5):
+    """Runs the benchmark and returns the results (in seconds per lookup)"""
+    routes = generate(count)
+    paths = sample(routes)
+    parsed = [router.Path(route) for route in routes]
+
+    build = timeit.timeit(lambda: router.Router(parsed), number=1)
+    trie = router.Router(parsed)
+    for path in paths:  # both should agree
+        assert trie.resolve(path)[0] is router.resolve(path, parsed)[0]
+
+    trie_time = timeit.timeit(lambda: [trie.resolve(path) for path in paths], number=number) / (number * len(paths))
+    linear_time = timeit.timeit(lambda: [router.resolve(path, parsed) for path in paths], number=1) / len(paths)
+    return {
+        "routes": count,
+        "build": build,
+        "router.Router.resolve": trie_time,
+        "router.resolve": linear_time
+    }
+
+
+if __name__ == "__main__":
+    results = run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
+    print(f"{results['routes']} routes (Router built in {results['build'] * 1000:.2f}ms)")
+    print(f"Router.resolve: {results['router.Router.resolve'] * 1e6:.2f}µs per lookup")
+    print(f"resolve:        {results['router.resolve'] * 1e6:.2f}µs per lookup")
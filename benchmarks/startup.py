@@ -0,0 +1,50 @@
+"""
+Benchmarks the startup of an app declaring a lot of endpoints
+
+Usage: python -m benchmarks.startup
+"""
+import time
+
+import nasse
+
+
+def make_handler(index: int):
+    """Creates a documented handler, as a real endpoint would be"""
+
+    def handler(id: int, limit: int = 10):
+        """
+        Retrieves an item
+
+        Parameters
+        ----------
+        id: int
+            The item ID
+        limit: int, default = 10
+            The maximum number of results
+        """
+        return {"index": index, "id": id}
+
+    handler.__name__ = "item_{index}".format(index=index)
+    return handler
+
+
+def run(routes: int = 5000):
+    """Runs the benchmark and returns the results (in seconds)"""
+    handlers = [make_handler(index) for index in range(routes)]
+    start = time.perf_counter()
+    app = nasse.Nasse("benchmark", logging_level="ERROR")
+    for index, handler in enumerate(handlers):
+        app.route("/items/{index}/<int:id>".format(index=index), methods="GET")(handler)
+    declared = time.perf_counter()
+    for endpoint in app.endpoints.values():
+        endpoint.parameters  # what the first request to each endpoint needs
+    resolved = time.perf_counter()
+    return {
+        "declaration ({routes} routes)".format(routes=routes): declared - start,
+        "first access to the parameters": resolved - declared
+    }
+
+
+if __name__ == "__main__":
+    for name, result in run().items():
+        print(f"{name:<36}{result * 1e3:.1f}ms")
@@ -2,7 +2,7 @@
 
 # autopep8: off
 from .__info__ import __version__, __license__, __author__, __copyright__ # isort:skip
-from . import docs # isort:skip
+from . import utils # isort:skip (needs to be loaded before `config`)
 from flask import g # isort:skip
 from flask.wrappers import Request as FlaskRequest # isort:skip
 from flask.wrappers import Response as FlaskResponse # isort:skip
@@ -10,6 +10,7 @@ from flask.wrappers import Response as FlaskResponse # isort:skip
 from .nasse import Nasse # isort:skip
 from .config import NasseConfig # isort:skip
 from .request import Request # isort:skip
+from .request import current as _current_request # isort:skip
 from .response import Response # isort:skip
 from .models import * # isort:skip
 from . import logging # isort:skip
@@ -22,11 +23,22 @@ class RequestProxy(FlaskRequest, Request):
         return
 
     def __getattribute__(self, name: str):
-        return getattr(g.request, name)
+        context = _current_request.get(None)
+        if context is None:
+            context = g.request
+        return getattr(context, name)
 
 
 request = RequestProxy()
 
+
+def __getattr__(name: str):
+    # the documentation generators and the testing utilities are only imported when needed
+    if name in ("docs", "testing"):
+        import importlib
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {module!r} has no attribute {name!r}".format(module=__name__, name=name))
+
 # For backward compatibility
 # old_name = new_name
 # if something has been renamed in the new versions
@@ -17,7 +17,6 @@ import nasse
 import nasse.servers
 import nasse.localization
 from nasse.utils.types import StringEnum
-from nasse.tui.apps import http_app
 
 
 class ServerEnum(StringEnum):
@@ -102,6 +101,131 @@ def prepare_docs_parser(parser: argparse.ArgumentParser):
     parser.add_argument("--docs-python", action="store_true", help="(docs) If we need to render the python examples")
 
 
+def prepare_compile_parser(parser: argparse.ArgumentParser):
+    """Populates the parser with the `compile` arguments"""
+    parser.add_argument("--compile", action="store_true", help="(compile) Compiles the endpoints registry and exits")
+    parser.add_argument("--registry", action="store", required=False, help="(compile) The file to write the compiled registry to")
+
+
+def prepare_bench_parser(parser: argparse.ArgumentParser):
+    """Populates the parser with the `bench` arguments"""
+    parser.add_argument("--bench", action="store_true", help="(bench) Load tests the given URL, app or Postman collection and exits")
+    parser.add_argument("--endpoint", "-e", nargs="*", default=[], help="(bench) The endpoints paths to load test (defaults to all of the static ones)")
+    parser.add_argument("--method", action="store", required=False, default=None, help="(bench) The HTTP method to use")
+    parser.add_argument("--param", action="append", default=[], help="(bench) A query parameter to send, as key=value")
+    parser.add_argument("--url", action="store", required=False, default=None,
+                        help="(bench) The URL of the running server (an app is otherwise called in-process, and a Postman collection on http://127.0.0.1:5005)")
+    parser.add_argument("--requests", "-n", action="store", type=int, default=1000, help="(bench) The number of requests to send to each endpoint")
+    parser.add_argument("--concurrency", action="store", type=int, default=8, help="(bench) The number of concurrent clients")
+    parser.add_argument("--rate", action="store", type=float, required=False, default=None,
+                        help="(bench) The number of requests per second to send (as fast as possible by default)")
+    parser.add_argument("--bench-output", action="store", required=False, default=None, help="(bench) A JSON file to write the results to")
+    parser.add_argument("--replay", action="store", required=False, default=None,
+                        help="(bench) Replays the requests captured in the given file (see `capture`) against the app or --url and exits")
+    parser.add_argument("--speed", action="store", type=float, default=1,
+                        help="(bench) How fast the captured requests are replayed (2 is twice as fast, 0 is as fast as possible)")
+    parser.add_argument("--baseline", action="store", required=False, default=None,
+                        help="(bench) A JSON file written by a previous --replay to compare the latencies to")
+
+
+def bench_targets(args: argparse.Namespace,
+                  instance: typing.Optional[nasse.Nasse],
+                  endpoints: typing.List[nasse.Endpoint]) -> typing.List[typing.Tuple[str, str]]:
+    """Returns the (path, method) couples to load test"""
+    if args.endpoint:
+        return [(path, args.method or "GET") for path in args.endpoint]
+    if instance:
+        endpoints = [endpoint for endpoint in instance.endpoints.values() if not endpoint.path.startswith("/@nasse")]
+    elif not endpoints:  # a URL
+        return [("", args.method or "GET")]
+    targets = []
+    for endpoint in endpoints:
+        path = str(endpoint.path)
+        if any(char in path for char in "<{:"):  # needs dynamic values
+            continue
+        methods = {method.upper() for method in endpoint.methods}
+        method = args.method or ("GET" if "*" in methods or "GET" in methods or not methods else sorted(methods)[0])
+        targets.append(("/" + path.lstrip("/"), method))
+    return targets
+
+
+def print_bench_results(method: str, target: str, result: "nasse.testing.LoadResult"):
+    """Prints the results of a load test"""
+    print(f"{method} {target} — {result.requests} requests in {result.duration:.2f}s ({result.throughput:.1f} req/s)")
+    print("  " + "  ".join(f"{name} {value * 1e3:.2f}ms" for name, value in result.percentiles().items() if value is not None))
+    histogram = result.histogram()
+    highest = max((count for _, count in histogram), default=0) or 1
+    for bound, count in histogram:
+        print(f"  ≤ {bound * 1e3:>10.2f}ms {'█' * round(30 * count / highest):<30} {count}")
+    print("  statuses: " + ", ".join(f"{status} × {count}" for status, count in sorted(result.statuses.items())))
+    for error, count in sorted(result.errors.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {error}: {count}")
+
+
+def bench(args: argparse.Namespace, instance: typing.Optional[nasse.Nasse], endpoints: typing.List[nasse.Endpoint]):
+    """Load tests the given URL, app or Postman collection"""
+    from nasse import testing
+
+    params = dict(param.split("=", 1) if "=" in param else (param, "") for param in args.param)
+    base = args.url
+    if base is None and not instance:
+        base = args.input if str(args.input).startswith(("http://", "https://")) else "http://127.0.0.1:5005"
+
+    targets = bench_targets(args, instance, endpoints)
+    if not targets:
+        raise ValueError("Couldn't find any endpoint to load test, use --endpoint to give them")
+
+    results = {}
+    for path, method in targets:
+        if base is None:
+            target = path
+            result = testing.load(instance, path, method=method, requests=args.requests,
+                                  threads=args.concurrency, rate=args.rate, query_string=params)
+        else:
+            target = base.rstrip("/") + path if path else base
+            result = testing.load_http(target, method=method, requests=args.requests,
+                                       threads=args.concurrency, rate=args.rate, params=params)
+        print_bench_results(method, target, result)
+        results[target] = {"method": method, **result.summary()}
+
+    if args.bench_output:
+        with open(args.bench_output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4, ensure_ascii=False)
+    return results
+
+
+def replay(args: argparse.Namespace, instance: typing.Optional[nasse.Nasse]):
+    """Replays captured requests and compares their latencies to a previous run"""
+    from nasse import testing
+    from nasse.utils import capture
+
+    if instance is None and args.url is None:
+        raise ValueError("Couldn't find any Nasse instance to replay the requests on, use --url to replay them on a running server")
+
+    records = capture.read(args.replay)
+    if instance is not None:
+        # the replayed requests should not be captured again
+        instance.config.capture = None
+    result = testing.replay(records, app=None if args.url else instance, url=args.url,
+                            speed=args.speed, threads=args.concurrency)
+    for name, group in sorted(result.groups.items()):
+        method, _, target = name.partition(" ")
+        print_bench_results(method, target, group)
+    summary = result.summary()
+    print(f"{result.requests} requests replayed in {result.duration:.2f}s ({result.throughput:.1f} req/s)")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        for name, ratios in testing.compare(baseline, summary).items():
+            print(f"{name}: " + "  ".join(f"{percent} ×{ratio:.2f}" for percent, ratio in ratios.items() if ratio is not None))
+
+    if args.bench_output:
+        with open(args.bench_output, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=4, ensure_ascii=False)
+    return summary
+
+
 def get_runner_args(parser: argparse.ArgumentParser) -> typing.Dict[str, typing.Any]:
     """Retrieves the arguments to pass to Nasse"""
     args = parser.parse_args()
@@ -130,7 +254,7 @@ def get_docs_args(parser: argparse.ArgumentParser) -> typing.Dict[str, typing.An
         "curl": args.docs_curl,
         "javascript": args.docs_javascript,
         "python": args.docs_python,
-        "localization": http_app.language_to_localization(args.language)
+        "localization": nasse.localization.language_to_localization(args.language)
     }
 
 
@@ -215,19 +339,37 @@ def entry():
 
     prepare_runnner_parser(parser)
     prepare_docs_parser(parser)
+    prepare_compile_parser(parser)
+    prepare_bench_parser(parser)
 
     args = parser.parse_args()
 
     instance, endpoints = main(input=args.input)
 
+    if args.replay:
+        replay(args, instance)
+        return None
+    if args.bench:
+        # the results are printed and written to --bench-output, the console script exits with the returned value
+        bench(args, instance, endpoints)
+        return None
+
     if instance:
         if args.make_docs:
             return instance.make_docs(**get_docs_args(parser))
+        if args.compile:
+            # the console script exits with the returned value
+            instance.compile_registry(args.registry)
+            return None
         return instance.run(**get_runner_args(parser))
 
     if args.make_docs:
         raise ValueError("Couldn't find any Nasse instance to generate the docs fors")
+    if args.compile:
+        raise ValueError("Couldn't find any Nasse instance to compile")
 
+    # Textual is only imported when the HTTP app is actually used
+    from nasse.tui.apps import http_app
     return http_app.HTTP(str(args.input or "http://localhost"), endpoints=endpoints).run()
 
 
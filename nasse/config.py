@@ -116,8 +116,23 @@ class NasseConfig:
     max_request_size: int = int(1e+9)
     compress: bool = True
     log_file: typing.Optional[pathlib.Path] = None
+    log_file_max_size: typing.Optional[int] = None
+    log_file_backups: int = 3
+    async_logging: bool = False
+    log_queue_size: int = 10000
+    log_queue_policy: str = "drop"
+    access_log: typing.Optional[typing.Union[pathlib.Path, str]] = None
+    access_log_sampling: typing.Dict[str, float] = dataclasses.field(default_factory=dict)
+    access_log_slow: typing.Optional[float] = 1.0
+    request_history: int = 0
+    request_history_ips: bool = False
+    exception_report_window: typing.Optional[float] = 60
+    registry: typing.Optional[typing.Union[pathlib.Path, str]] = None
+    capture: typing.Optional[typing.Union[pathlib.Path, str]] = None
+    capture_values: typing.Set[str] = dataclasses.field(default_factory=set)
     logging_level: typing.Optional["LoggingLevel"] = "INFO"
     logger: typing.Optional["Logger"] = None
     server_header: str = "nasse/{version} ({name})"
     sanitize_user_input: bool = True
+    fast_dispatch: bool = False
     base_dir: pathlib.Path = pathlib.Path().resolve().absolute()
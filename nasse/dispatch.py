@@ -0,0 +1,203 @@
+"""
+The Nasse native WSGI entry point
+
+Requests to Nasse endpoints are matched with a precompiled router and processed
+straight from the WSGI environ, without going through Flask's dispatching machinery.
+Anything else falls back to Flask.
+"""
+import re
+import typing
+
+import werkzeug.exceptions
+import werkzeug.wrappers
+
+from nasse import models, receive, utils
+
+# The werkzeug converters which can be matched by the router
+SUPPORTED_CONVERTERS = {"int", "float", "str", "string"}
+
+_FLOAT = re.compile(r"\d+\.\d+")
+
+
+def _int(value: str) -> int:
+    """Casts like the werkzeug `int` converter (unsigned integers only)"""
+    if not value.isdecimal():
+        raise ValueError("Not an unsigned integer")
+    return int(value)
+
+
+def _float(value: str) -> float:
+    """Casts like the werkzeug `float` converter (unsigned floats with a decimal part only)"""
+    if not _FLOAT.fullmatch(value):
+        raise ValueError("Not an unsigned float")
+    return float(value)
+
+
+def hooks(flask_app) -> typing.Iterator[typing.Callable]:
+    """Yields the functions Flask runs around each request (`before_request`, `after_request`, `teardown_request`, etc.)"""
+    for registry in (flask_app.before_request_funcs, flask_app.after_request_funcs,
+                     flask_app.teardown_request_funcs, flask_app.url_value_preprocessors):
+        for functions in registry.values():
+            yield from functions
+    yield from flask_app.teardown_appcontext_funcs
+
+
+class DispatchRequest(werkzeug.wrappers.Request):
+    """A lightweight request, created directly from the WSGI environ"""
+
+    def __init__(self, environ: dict, config: typing.Mapping[str, typing.Any]) -> None:
+        super().__init__(environ)
+        # the same limits as the ones Flask applies
+        self.max_content_length = config.get("MAX_CONTENT_LENGTH", None)
+        self.max_form_memory_size = config.get("MAX_FORM_MEMORY_SIZE", self.max_form_memory_size)
+        self.max_form_parts = config.get("MAX_FORM_PARTS", self.max_form_parts)
+
+
+class Dispatcher:
+    """
+    A WSGI application dispatching the requests to Nasse endpoints directly
+
+    The request goes through Flask when:
+
+    - No Nasse endpoint matches the path
+    - The method is not allowed by the endpoint, or is `OPTIONS` or `HEAD`
+    - The path has a trailing or a double slash (Flask redirects those)
+    - A response could be compressed (`config.compress` and an `Accept-Encoding` header)
+    - Any endpoint uses a converter not supported by the router (`path`, `uuid`, etc.)
+    - Flask has a non-Nasse rule which would take the request (`@app.flask.route`)
+    - Request hooks were registered on the Flask app (`@app.flask.before_request`, `after_request`, `teardown_request`, etc.)
+    """
+
+    def __init__(self, app) -> None:
+        """
+        Parameters
+        ----------
+        app: Nasse
+            The Nasse app
+        """
+        self.app = app
+        self.router = utils.router.Router(casts={int: _int, float: _float})
+        self.receivers: typing.Dict[str, typing.Tuple[models.Endpoint, receive.Receive]] = {}
+        self.enabled = True
+        # the hooks registered by Nasse itself (see `Nasse.__init__`)
+        self.own_hooks: typing.Set[typing.Callable] = set()
+        # what is registered directly on the Flask app, recomputed when it changes
+        self._signature = None
+        self._hooked = False
+        self._foreign_paths: typing.Set[str] = set()
+        self._foreign_prefixes: typing.Tuple[str, ...] = ()
+
+    def __repr__(self) -> str:
+        return "Dispatcher({name})".format(name=self.app.config.name)
+
+    def add(self, endpoint: models.Endpoint, receiver: receive.Receive) -> None:
+        """
+        Registers a new endpoint
+
+        Parameters
+        ----------
+        endpoint: models.Endpoint
+            The endpoint
+        receiver: receive.Receive
+            The object processing the requests for the endpoint
+        """
+        path = utils.router.Path(endpoint.path)
+        for dynamic in path.dynamics:
+            if dynamic.type not in SUPPORTED_CONVERTERS:
+                # the router could take routes Flask would not take
+                self.app.config.logger.debug("The `{type}` converter used by {path} is not supported by the dispatcher, falling back to Flask"
+                                             .format(type=dynamic.type, path=endpoint.path))
+                self.enabled = False
+                return
+        route = self.router.add(path)
+        self.receivers.setdefault(route.path, (endpoint, receiver))
+
+    def match(self, method: str, path: str) -> typing.Optional[typing.Tuple[models.Endpoint, receive.Receive, dict]]:
+        """
+        Matches the request with a Nasse endpoint
+
+        Returns
+        -------
+        tuple[models.Endpoint, receive.Receive, dict] | None
+            The endpoint, its receiver and the dynamic routing values.
+            None if the request should go through Flask.
+        """
+        if not self.enabled or method in ("OPTIONS", "HEAD") or "//" in path or (path.endswith("/") and path != "/"):
+            return None
+        try:
+            route, dynamics = self.router.resolve(path)
+        except utils.router.PathNotFound:
+            return None
+        endpoint, receiver = self.receivers[route.path]
+        if "*" not in endpoint.methods and method not in endpoint.methods:
+            return None
+        return endpoint, receiver, dynamics
+
+    def _update(self) -> None:
+        """Internal method looking for the hooks and non-Nasse rules registered on the Flask app, when they changed"""
+        flask_app = self.app.flask
+        functions = list(hooks(flask_app))
+        signature = (len(flask_app.view_functions), len(functions))
+        if signature == self._signature:
+            return
+        self._hooked = any(function not in self.own_hooks for function in functions)
+        paths = set()
+        prefixes = set()
+        for rule in flask_app.url_map.iter_rules():
+            if isinstance(flask_app.view_functions.get(rule.endpoint, None), receive.Receive):
+                continue
+            if "<" in rule.rule:
+                prefixes.add(rule.rule.partition("<")[0])
+            else:
+                paths.add(rule.rule)
+                paths.add(rule.rule.rstrip("/") or "/")  # with `strict_slashes`, Flask redirects to it
+        self._foreign_paths = paths
+        self._foreign_prefixes = tuple(prefixes)
+        self._signature = signature
+
+    def shadowed(self, raw: DispatchRequest, receiver: receive.Receive) -> bool:
+        """
+        Checks if Flask would send the request to something else than the given receiver
+
+        Only the requests whose path could be taken by a non-Nasse rule are matched against Flask's `url_map`.
+        """
+        path = raw.path
+        if path not in self._foreign_paths and not path.startswith(self._foreign_prefixes):
+            return False
+        try:
+            rule, _ = self.app.flask.create_url_adapter(raw).match(return_rule=True)
+        except werkzeug.exceptions.HTTPException:  # redirections, method not allowed, etc.
+            return True
+        return self.app.flask.view_functions.get(rule.endpoint, None) is not receiver
+
+    def __call__(self, environ: dict, start_response: typing.Callable) -> typing.Iterable[bytes]:
+        if self.app.config.compress and environ.get("HTTP_ACCEPT_ENCODING"):
+            return self.app.flask(environ, start_response)
+
+        self._update()
+        if self._hooked:
+            # the hooks need the Flask request context
+            return self.app.flask(environ, start_response)
+
+        raw = DispatchRequest(environ, self.app.flask.config)
+        matched = self.match(raw.method, raw.path)
+        if matched is None or self.shadowed(raw, matched[1]):
+            return self.app.flask(environ, start_response)
+
+        _, receiver, dynamics = matched
+        try:
+            response = self.app.before_request()
+            if response is None:
+                response = receiver.receive(raw, dynamics=dynamics)
+            elif not isinstance(response, werkzeug.wrappers.Response):
+                response = self.app.flask.response_class(response)
+        except Exception as err:  # pylint: disable=broad-except
+            response = self.app.handle_exception(err, request=raw)
+        response = self.app.after_request(response, request=raw)
+        if self.app.config.compress:
+            # as Flask-Compress would do
+            response.vary.add("Accept-Encoding")
+
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        start_response(status, headers)
+        return app_iter
@@ -3,7 +3,7 @@ Defines the base exception
 """
 
 import typing
-from nasse.utils.logging import logger
+from nasse.utils.logging import get_logger
 
 
 class NasseException(Exception):
@@ -29,5 +29,5 @@ class NasseException(Exception):
         super().__init__(self.MESSAGE, *args)
 
         if self.LOG:
-            # should be the context's logger
-            logger.error(self.MESSAGE)
+            # the logger of the request being processed
+            get_logger().error(self.MESSAGE)
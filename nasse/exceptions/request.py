@@ -51,6 +51,12 @@ class MissingCookie(MissingValue):
     EXCEPTION_NAME = "MISSING_COOKIE"
 
 
+class InvalidProjection(ClientError):
+    """When the requested `fields` projection is malformed or requests unknown fields"""
+    MESSAGE = "The requested fields are invalid"
+    EXCEPTION_NAME = "INVALID_PROJECTION"
+
+
 class MissingContext(NasseException):
     """Server side error when a value only accessible in a Nasse context is accessed outside of oneƒ"""
     MESSAGE = "You are not actively in a Nasse context"
@@ -2,3 +2,12 @@ from nasse.localization.base import Localization
 from nasse.localization.fra import FrenchLocalization
 from nasse.localization.eng import EnglishLocalization
 from nasse.localization.jpn import JapaneseLocalization
+
+
+def language_to_localization(lang: str = "eng"):
+    """Returns the correct localization from the given language string"""
+    if lang == JapaneseLocalization.__id__:
+        return JapaneseLocalization
+    elif lang == FrenchLocalization.__id__:
+        return FrenchLocalization
+    return EnglishLocalization
@@ -5,6 +5,7 @@ import abc
 import dataclasses
 import inspect
 import pathlib
+import threading
 import typing
 import miko
 from nasse import utils, response
@@ -43,6 +44,24 @@ def method_validation(method: typing.Any):
     return result
 
 
+STREAM_MODES = ("ndjson",)
+"""The supported streaming modes for the responses"""
+
+# serializes the lazy resolution of the endpoints fields (see `Endpoint._resolve`)
+_resolving = threading.RLock()
+
+
+def stream_validation(mode: typing.Any) -> typing.Optional[str]:
+    """Validates the given streaming mode"""
+    if not mode:
+        return None
+    result = str(mode).lower().strip()
+    if result not in STREAM_MODES:
+        utils.logging.logger.warn(f"Unknown streaming mode {result}, the responses won't be streamed")
+        return None
+    return result
+
+
 def path_to_name(path: str):
     """Turns a path into an endpoint name"""
     return " > ".join(elem
@@ -245,6 +264,21 @@ class Error:
     """The status code of the response sent along this error"""
 
 
+def _source_file(handler: typing.Callable) -> pathlib.Path:
+    """Returns the file where the given handler got defined"""
+    # module = inspect.getmodule(self.handler)
+    # if module:
+    #     filepath = pathlib.Path(module.__file__)
+    # else:
+    try:
+        filepath = inspect.getsourcefile(inspect.unwrap(handler))
+        if not filepath:
+            raise ValueError("internal: filepath cannot be None")
+    except Exception:
+        filepath = handler.__code__.co_filename
+    return pathlib.Path(filepath or "")
+
+
 def non_implemented():
     """This represents a non implemented endpoint"""
     return NotImplementedError("Unitialized Endpoint")
@@ -290,6 +324,9 @@ class Endpoint:
     # Response
     json: bool
     """Whether the returned response should be JSON formatted or not"""
+    stream: typing.Optional[str]
+    """The streaming mode of the response.
+    With `"ndjson"`, iterables returned by the handler are sent one JSON item per line."""
     returns: Types.FinalMethodVariant[Types.FinalIterable[Return]]
     """The structure of the returned value"""
     errors: Types.FinalMethodVariant[Types.FinalIterable[Error]]
@@ -322,6 +359,7 @@ class Endpoint:
 
                  # Response,
                  json: bool = True,
+                 stream: typing.Optional[str] = None,
                  returns: Types.MethodVariant[Types.OptionalIterable[Return]] = None,
                  errors: Types.MethodVariant[Types.OptionalIterable[Error]] = None):
 
@@ -344,37 +382,14 @@ class Endpoint:
             "cookies": cookies,
             "dynamics": dynamics,
             "json": json,
+            "stream": stream,
             "returns": returns,
             "errors": errors
         }
 
-        # Getting the file where the function got defined
-        # module = inspect.getmodule(self.handler)
-        # if module:
-        #     filepath = pathlib.Path(module.__file__)
-        # else:
-        try:
-            filepath = inspect.getsourcefile(inspect.unwrap(handler))
-            if not filepath:
-                raise ValueError("internal: filepath cannot be None")
-        except Exception:
-            filepath = handler.__code__.co_filename
-
-        filepath = pathlib.Path(filepath or "")
-
-        # Getting the handler signature
-        signature = inspect.signature(handler)
-
-        # Parsing the doc-string
-        func = miko.Function(handler)
-        docs = func.docs
-
         if not name:
-            initial["name"] = func.name
-
-        # I might add custom parsers for each method
-        if not description:
-            initial["description"] = docs.description
+            # what `miko.Function(handler).name` would give, without parsing the docstring
+            initial["name"] = handler.__name__
 
         init_args = {k: v for k, v in initial.items() if v}
 
@@ -386,6 +401,16 @@ class Endpoint:
             except Exception:
                 extra_args = {}
 
+        # the documentation only fields are derived from the handler when first accessed
+        # (see `Endpoint._resolve`)
+        lazy = {"parameters", "dynamics"}
+        if not description:
+            # the docstring description takes precedence over the one of `endpoint`
+            lazy.add("description")
+            init_args.pop("description", None)
+        if not returns:
+            lazy.add("returns")
+
         for key, value in extra_args.items():
             if key == "path":
                 # `path` would seem implemented by `endpoint` but it isn't
@@ -396,17 +421,14 @@ class Endpoint:
             init_args.setdefault(key, value)
 
         if not init_args["category"]:
-            init_args["category"] = (filepath.stem or
-                (handler.__module__ or "").rpartition(".")[2] or
-                "Main")
+            lazy.add("category")
 
         # init_args = {k: v for k, v in init_args.items() if v}
 
         # Initializing instance
-        init_class(Endpoint, self, **init_args)
+        init_class(Endpoint, self, **{k: v for k, v in init_args.items() if k not in lazy})
 
         # Type Validations
-        self.description = validates_method_variant(self.description, str)
         self.base_dir = pathlib.Path(self.base_dir) if self.base_dir else pathlib.Path()
 
         if not self.path:
@@ -419,14 +441,10 @@ class Endpoint:
                 base_len = len(base)
 
                 # A fail-safe version of pathlib.Path.relative_to
-                result = ""
+                # (keeps the letters which differ from the base path at the same position)
                 # removing the suffix
-                for index, letter in enumerate(filepath.resolve().absolute().as_posix().rpartition(".")[0]):
-                    # If we are still within the base path
-                    # And the letter is in the base path
-                    if index < base_len and letter == base[index]:
-                        continue
-                    result += letter
+                filepath = _source_file(handler).resolve().absolute().as_posix().rpartition(".")[0]
+                result = "".join(letter for letter, base_letter in zip(filepath, base) if letter != base_letter) + filepath[base_len:]
                 self.path = (utils.sanitize.to_path(result)
                              + utils.sanitize.to_path(self.handler.__name__))
             else:
@@ -448,27 +466,121 @@ class Endpoint:
                                  + utils.sanitize.to_path(self.handler.__name__))
 
         self.methods = validates_optional_iterable(self.methods, method_validation)
+        self.stream = stream_validation(self.stream)
         self.login = validates_method_variant(self.login, Login, iter=True)
 
         parsed_path = utils.router.Path(self.path)
         self.path = parsed_path.join(flask=True)
 
-        self.parameters = validates_method_variant(self.parameters, Parameter, iter=True)
-        self.dynamics = validates_method_variant(self.dynamics, Dynamic, iter=True)
+        self.headers = validates_method_variant(self.headers, Header, iter=True)
+        self.cookies = validates_method_variant(self.cookies, Cookie, iter=True)
+        self.errors = validates_method_variant(self.errors, Error, iter=True)
+        if "description" not in lazy:
+            self.description = validates_method_variant(self.description, str)
+        if "returns" not in lazy:
+            self.returns = validates_method_variant(self.returns, Return, iter=True)
+
+        self._pending = {
+            "fields": lazy,
+            "description": init_args.get("description", None),
+            "returns": init_args.get("returns", None),
+            "parameters": validates_method_variant(init_args["parameters"], Parameter, iter=True),
+            "dynamics": validates_method_variant(init_args["dynamics"], Dynamic, iter=True),
+            "path": parsed_path
+        }
+
+    def __getattr__(self, name: str):
+        # only called when the attribute is not set (yet)
+        pending = self.__dict__.get("_pending", None)
+        if pending is not None and name in pending["fields"]:
+            self._resolve()
+            return getattr(self, name)
+        raise AttributeError("'{cls}' object has no attribute '{name}'".format(cls=self.__class__.__name__, name=name))
+
+    def _resolve(self, values: typing.Optional[typing.Dict[str, typing.Any]] = None) -> None:
+        """
+        Internal method computing the fields derived from the handler docstring, signature and source file
+
+        Those are mostly used by the documentation, and the parameters and dynamics are needed
+        by the first request, so it is not done when the endpoint is declared.
+
+        Parameters
+        ----------
+        values: dict, optional
+            The already computed fields, from a compiled registry (see `utils.registry`)
+        """
+        if self.__dict__.get("_pending", None) is None:
+            return
+        # the first requests might be received concurrently, without the GIL on free-threaded builds
+        with _resolving:
+            pending = self.__dict__.get("_pending", None)
+            if pending is None:  # resolved by another thread in the meantime
+                return
+            if values is None:
+                values = self._compute(pending)
+            for key, value in values.items():
+                # keeping the values set in the meantime
+                self.__dict__.setdefault(key, value)
+            self._pending = None
+
+    def _compute(self, pending: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        """
+        Internal method computing the pending fields (see `Endpoint._resolve`)
+
+        Parameters
+        ----------
+        pending: dict
+            The inputs of the computation
+
+        Returns
+        -------
+        dict
+            The computed fields
+        """
+        handler = self.handler
+        fields = pending["fields"]
+        values = {}
+
+        # Parsing the doc-string
+        docs = miko.Function(handler).docs
+
+        # I might add custom parsers for each method
+        if "description" in fields:
+            values["description"] = validates_method_variant(docs.description or pending["description"], str)
+
+        if "category" in fields:
+            values["category"] = (_source_file(handler).stem or
+                                  (handler.__module__ or "").rpartition(".")[2] or
+                                  "Main")
+
+        if "returns" in fields:
+            returns = pending["returns"]
+            try:
+                # Getting the handler signature
+                handler_return = inspect.signature(handler).return_annotation
+                if issubclass(handler_return, response.Response):
+                    returns = handler_return.__returning__
+            except TypeError:  # issubclass
+                pass
+            values["returns"] = validates_method_variant(returns, Return, iter=True)
+
+        # not modifying the pending values in place, they are the inputs of the computation
+        parameters = {method: set(elements) for method, elements in pending["parameters"].items()}
+        dynamics = {method: set(elements) for method, elements in pending["dynamics"].items()}
 
         # retrieving all of the already defined parameters
         names = ["app", "nasse", "config", "logger", "endpoint",
                  "nasse_endpoint", "request", "method", "values",
                  "params", "parameters", "args", "form", "headers",
-                 "account", "dynamics"]
+                 "account", "dynamics", "projection"]
 
         param_names = []
-        for parameters in self.parameters.values():
-            param_names.extend([param.name for param in parameters])
+        for elements in parameters.values():
+            param_names.extend([param.name for param in elements])
 
         dyn_names = []
-        for dynamics in self.dynamics.values():
-            dyn_names.extend([dynamic.name for dynamic in dynamics])
+        for elements in dynamics.values():
+            dyn_names.extend([dynamic.name for dynamic in elements])
 
         names.extend(param_names)
         names.extend(dyn_names)
@@ -476,7 +588,7 @@ class Endpoint:
         names_set = set(names)
 
         # checking all of the dynamic parameters of the path
-        for dynamic in parsed_path.dynamics:
+        for dynamic in pending["path"].dynamics:
             if not dynamic.name in dyn_names:
                 # adding the dynamic parameter of the path to the endpoint definition
                 if dynamic.name in docs.parameters:
@@ -491,9 +603,9 @@ class Endpoint:
                                       type=dynamic.cast)
 
                 try:
-                    self.dynamics["*"].add(element)
+                    dynamics["*"].add(element)
                 except KeyError:
-                    self.dynamics["*"] = {element}
+                    dynamics["*"] = {element}
                 dyn_names.append(element.name)
                 names_set.add(element.name)
 
@@ -508,22 +620,18 @@ class Endpoint:
                                     required=not parameter.optional,
                                     type=next(iter(parameter.types)) if parameter.types else None)
                 try:
-                    self.parameters["*"].add(element)
+                    parameters["*"].add(element)
                 except KeyError:
-                    self.parameters["*"] = {element}
+                    parameters["*"] = {element}
 
-        self.headers = validates_method_variant(self.headers, Header, iter=True)
-        self.cookies = validates_method_variant(self.cookies, Cookie, iter=True)
-
-        try:
-            handler_return = signature.return_annotation
-            if not returns and issubclass(handler_return, response.Response):
-                self.returns = handler_return.__returning__
-        except TypeError:  # issubclass
-            pass
+        values["parameters"] = parameters
+        values["dynamics"] = dynamics
+        return values
 
-        self.returns = validates_method_variant(self.returns, Return, iter=True)
-        self.errors = validates_method_variant(self.errors, Error, iter=True)
+    @property
+    def internal(self) -> bool:
+        """If the endpoint is one of Nasse's own debugging endpoints (under `/@nasse/`)"""
+        return self.path.startswith("/@nasse/")
 
     def __getitem__(self, key: str):
         return getattr(self, key)
@@ -13,29 +13,34 @@ import urllib.parse
 import dataclasses
 
 import flask
-import rich.progress
-import rich.status
-import watchdog.events
-import watchdog.observers
 
-from nasse import config, docs, models, receive, request, utils
+from nasse import config, dispatch, models, receive, request, utils
 from nasse.config import NasseConfig
 from nasse.localization.base import Localization
-from nasse.response import exception_to_response
+from nasse.response import encode_exception
 from nasse.servers import ServerBackend
 from nasse.servers.flask import Flask
 
 
-class FileEventHandler(watchdog.events.FileSystemEventHandler):
-    """An internal file event handler for the debug mode"""
+class FileEventHandler:
+    """
+    An internal file event handler for the debug mode
+
+    Note: This follows the `watchdog.events.FileSystemEventHandler` interface
+    without subclassing it, so that watchdog is only imported when the debug mode is used
+    """
 
     def __init__(self, callback: typing.Callable, watch: typing.List[pathlib.Path], ignore: typing.List[pathlib.Path], config: NasseConfig = None) -> None:
-        super().__init__()
         self.config = config or NasseConfig()
         self.callback = callback
         self.watch = [str(file) for file in watch]
         self.ignore = [str(file) for file in ignore]
 
+    def dispatch(self, event):
+        """Called by the watchdog observer for each event"""
+        if event.event_type == "modified":
+            self.on_modified(event)
+
     def on_modified(self, event):
         src_path = str(pathlib.Path(str(event.src_path)).resolve())
         if src_path not in self.watch or src_path in self.ignore:
@@ -101,6 +106,16 @@ class Nasse:
         self.flask = flask.Flask(self.config.name, **(flask_options or {}))
 
         self.endpoints = {}
+        self.dispatcher = dispatch.Dispatcher(self)
+        self.access_log = utils.access.AccessLog(self.config)
+        self.capture = utils.capture.Capture(self.config)
+        self.history = utils.history.RequestHistory(self.config.request_history) if self.config.request_history else None
+        self.registry = None
+        if self.config.registry is not None:
+            try:
+                self.registry = utils.registry.Registry.load(self.config.registry)
+            except Exception as err:
+                self.config.logger.warning("Couldn't load the compiled registry at {path} ({err})".format(path=self.config.registry, err=err))
 
         # security
         self.flask.config["MAX_CONTENT_LENGTH"] = int(self.config.max_request_size) if self.config.max_request_size is not None else None
@@ -116,15 +131,61 @@ class Nasse:
             import flask_compress
             flask_compress.Compress(self.flask)
 
+        # the dispatcher falls back to Flask when other hooks are registered
+        self.dispatcher.own_hooks = set(dispatch.hooks(self.flask))
+
         logging.getLogger('werkzeug').disabled = True
         self.flask.logger.disabled = True
 
+        if self.history is not None and not (self.config.debug or self.config.account_management):
+            self.config.logger.warn("The request history is not served at /@nasse/requests "
+                                    "because it could not be protected, set `account_management` or enable the debug mode")
+        elif self.history is not None:
+            def requests(values):
+                """Returns back the most recent requests"""
+                return 200, {
+                    "size": self.history.size,
+                    # the values are already casted (see `parameters`)
+                    "requests": self.history.query(endpoint=values.get("endpoint", None),
+                                                   errors=values.get("errors", False),
+                                                   slowest=values.get("slowest", False),
+                                                   limit=values.get("limit", 100))
+                }
+
+            self.route("/@nasse/requests",
+                       name="Requests",
+                       category="@Nasse Debug",
+                       methods="GET",
+                       # not protected in debug mode, like the other debugging endpoints
+                       login=None if self.config.debug else models.Login(required=True),
+                       parameters=[
+                           models.Parameter("endpoint", "Only the requests made to this endpoint", required=False),
+                           models.Parameter("errors", "Only the requests which failed", required=False, type=utils.boolean.to_bool),
+                           models.Parameter("slowest", "Sorting the requests by duration", required=False, type=utils.boolean.to_bool),
+                           models.Parameter("limit", "The maximum number of requests", required=False, type=int)
+                       ])(requests)
+
         # on debug
         self._observer = None
 
     def __repr__(self) -> str:
         return "Nasse({name})".format(name=self.config.name)
 
+    def __call__(self, environ: dict, start_response: typing.Callable) -> typing.Iterable[bytes]:
+        """The WSGI application, see `Nasse.wsgi`"""
+        return self.wsgi(environ, start_response)
+
+    @property
+    def wsgi(self) -> typing.Callable[[dict, typing.Callable], typing.Iterable[bytes]]:
+        """
+        The WSGI application to serve
+
+        This is the native dispatcher if `config.fast_dispatch` is enabled, the Flask app otherwise
+        """
+        if self.config.fast_dispatch:
+            return self.dispatcher
+        return self.flask
+
     @property
     def logger(self) -> utils.logging.Logger:
         return self.config.logger
@@ -154,6 +215,7 @@ class Nasse:
 
               # Response,
               json: bool = True,
+              stream: typing.Optional[str] = None,
               returns: models.Types.MethodVariant[models.Types.OptionalIterable[models.Return]] = None,
               errors: models.Types.MethodVariant[models.Types.OptionalIterable[models.Error]] = None,
               flask_options: typing.Optional[dict] = None) -> typing.Callable[..., models.Endpoint]:
@@ -174,6 +236,10 @@ class Nasse:
 
         Parameters
         -----------
+        stream: str, optional
+            The streaming mode of the endpoint.
+            With `"ndjson"`, iterables and generators returned by the handler
+            are sent progressively as newline delimited JSON (`application/x-ndjson`)
         flask_options: dict
             If needed, extra options to give to flask.Flask
         """
@@ -196,9 +262,13 @@ class Nasse:
                                            cookies=cookies,
                                            dynamics=dynamics,
                                            json=json,
+                                           stream=stream,
                                            returns=returns,
                                            errors=errors)
 
+            if self.registry is not None:
+                self.registry.apply(new_endpoint)
+
             try:
                 flask_options["methods"] = (new_endpoint.methods
                                             if "*" not in new_endpoint.methods
@@ -206,12 +276,14 @@ class Nasse:
             except Exception:
                 pass
 
+            receiver = receive.Receive(self, new_endpoint)
             self.flask.add_url_rule(new_endpoint.path,
                                     flask_options.pop("endpoint", None),
-                                    receive.Receive(self, new_endpoint),
+                                    receiver,
                                     **flask_options)
 
             self.endpoints[new_endpoint.path] = new_endpoint
+            self.dispatcher.add(new_endpoint, receiver)
             return handler
 
         if callable(path):
@@ -250,6 +322,9 @@ class Nasse:
             This might come handy in complex environments where you are already using
             a `rich.progress.Progress object, which might conflict.
         """
+        # only needed when actually running the server
+        import rich.progress
+
         if watch is None:
             watch = ["**/*.py"]
 
@@ -290,6 +365,8 @@ class Nasse:
                                 storage.extend(child.resolve() for child in path.iterdir())
                             else:
                                 storage.extend(child.resolve() for child in pathlib.Path().glob(file))
+                    import watchdog.observers
+
                     self._observer = watchdog.observers.Observer()
                     self._observer.schedule(FileEventHandler(callback=self.restart, watch=watching,
                                             ignore=ignoring, config=self.config), ".", recursive=True)
@@ -312,7 +389,8 @@ class Nasse:
                                 "base_dir": endpoint.base_dir,
                                 "path": endpoint.path,
                                 "methods": endpoint.methods,
-                                "json": endpoint.json
+                                "json": endpoint.json,
+                                "stream": endpoint.stream
                             }
                             for element in ("login", "parameters", "headers", "cookies", "dynamics", "returns", "errors"):
                                 result[element] = {key: [dataclasses.asdict(val) for val in value]
@@ -354,29 +432,40 @@ class Nasse:
                 pass
         self.config.logger.log("Stopping the server instance")
         self.instance.stop()
+        # `os.execv` does not run the exit handlers
+        self.config.logger.reporter.close()
+        self.config.logger.writer.close()
+        self.access_log.writer.close()
+        if self.config.capture:
+            self.capture.writer.close()
         os.execv(sys.executable, [sys.executable] + sys.argv)
 
-    def handle_exception(self, e):
+    def handle_exception(self, e, request=None):
         """
         Handles exception for flask.Flask
+
+        Parameters
+        ----------
+        e: Exception
+            The exception raised
+        request: werkzeug.Request, optional
+            The request being processed, defaults to `flask.request`
         """
         try:
             try:
-                message, error, code = exception_to_response(e)
+                if request is None:
+                    request = flask.request
+                xml = utils.sanitize.remove_spaces(request.values.get("format", "json")).lower() in {"xml", "html"}
             except Exception:
-                message, error, code = "An error occured on the server", "SERVER_ERROR", 500
-            result = {"success": False, "message": message, "error": error, "data": {}}
-            content_type = "application/json"
+                xml = False
             try:
-                if utils.sanitize.remove_spaces(flask.request.values.get("format", "json")).lower() in {"xml", "html"}:
-                    body = utils.xml.encode(data=result, minify=True)
-                    content_type = "application/xml"
-                raise ValueError("Not XML")
+                body, code = encode_exception(e, xml=xml)
             except Exception:
-                body = utils.json.minified_encoder.encode(result)
-            return flask.Response(response=body, status=code, content_type=content_type)
+                xml = False
+                body, code = '{"success":false,"message":"An error occured on the server","error":"SERVER_ERROR","data":{}}', 500
+            return flask.Response(response=body, status=code, content_type="application/xml" if xml else "application/json")
         except Exception:
-            return flask.Response(response='{"success": false, "message": "An error occured on the server", "error": "SERVER_ERROR", "data": {}', status=500, content_type="application/json")
+            return flask.Response(response='{"success": false, "message": "An error occured on the server", "error": "SERVER_ERROR", "data": {}}', status=500, content_type="application/json")
 
     def before_request(self):
         """
@@ -389,7 +478,7 @@ class Nasse:
         """
         return
 
-    def after_request(self, response: flask.Response):
+    def after_request(self, response: flask.Response, request=None):
         """
         Internal function called before sending back a response
         It applies multiple security headers to ensure HTTPS, CORS, etc.
@@ -398,6 +487,8 @@ class Nasse:
         -----------
         response: flask.flask.Response
             The response to send back
+        request: werkzeug.Request, optional
+            The request being processed, defaults to `flask.request`
 
         Returns
         --------
@@ -405,14 +496,17 @@ class Nasse:
             The response to send
         """
         try:
+            if request is None:
+                request = flask.request
+
             # Ensuring HTTPS (for a year)
             response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
 
             # Managing CORS
             # Allowing the right methods
             try:
-                if flask.request.method.upper() == "OPTIONS":
-                    current_endpoint = self.endpoints.get(flask.request.url_rule.rule,
+                if request.method.upper() == "OPTIONS":
+                    current_endpoint = self.endpoints.get(request.url_rule.rule,
                                                           None)
                     if current_endpoint is not None:
                         try:
@@ -423,10 +517,10 @@ class Nasse:
                             self.config.logger.warn("An error occured while setting the Access-Control-Allow-Methods header")
                         try:
                             requested_headers = [header.lower() for header in utils.sanitize.remove_spaces(
-                                flask.request.headers.get("Access-Control-Request-Headers", "")).split(",")]
+                                request.headers.get("Access-Control-Request-Headers", "")).split(",")]
                             endpoint_headers = [header.name.lower() for header in current_endpoint.headers]
 
-                            # login_rules = current_endpoint.login.get(flask.request.method.upper(), current_endpoint.login.get("*", None))
+                            # login_rules = current_endpoint.login.get(request.method.upper(), current_endpoint.login.get("*", None))
                             # if login_rules is not None and not login_rules.no_login:
                             #     endpoint_headers.append("authorization")
                             endpoint_headers.append("authorization")
@@ -446,7 +540,7 @@ class Nasse:
             # Allowing the right origins
             if self.config.cors:
                 if "*" in self.config.cors:
-                    origin = flask.request.environ.get("HTTP_ORIGIN", None)
+                    origin = request.environ.get("HTTP_ORIGIN", None)
                     if origin is not None:
                         response.headers["Vary"] = "Origin"
                         response.headers["Access-Control-Allow-Origin"] = origin
@@ -454,7 +548,7 @@ class Nasse:
                         response.headers["Access-Control-Allow-Origin"] = "*"
                 else:
                     response.headers["Vary"] = "Origin"
-                    request_origin = flask.request.environ.get(
+                    request_origin = request.environ.get(
                         "HTTP_ORIGIN", None)
                     if request_origin in self.config.cors:
                         response.headers["Access-Control-Allow-Origin"] = request_origin
@@ -474,6 +568,41 @@ class Nasse:
 
         return response
 
+    def test_client(self, **kwargs) -> "testing.Client":
+        """
+        Returns a client calling this app in-process, see `nasse.testing`
+
+        Parameters
+        ----------
+        **kwargs
+            Extra arguments passed to `werkzeug.test.Client`
+        """
+        from nasse import testing
+        return testing.Client(self, **kwargs)
+
+    def compile_registry(self, path: typing.Optional[typing.Union[pathlib.Path, str]] = None) -> pathlib.Path:
+        """
+        Resolves all of the endpoints and writes their derived fields to a registry,
+        which can be loaded by the production workers with `config.registry`
+
+        Parameters
+        ----------
+        path: str | Path
+            The file to write to. Defaults to `config.registry`, or `.nasse/registry.pickle`
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the written registry
+        """
+        registry = utils.registry.Registry()
+        skipped = [endpoint.path for endpoint in self.endpoints.values() if not registry.add(endpoint)]
+        for endpoint in skipped:
+            self.config.logger.debug("The endpoint {endpoint} couldn't be compiled".format(endpoint=endpoint))
+        result = registry.dump(path or self.config.registry)
+        self.config.logger.log("🧾 Compiled {count} endpoints to {path}".format(count=len(registry), path=result))
+        return result
+
     def make_docs(self, base_dir: typing.Optional[typing.Union[pathlib.Path, str]] = None,
                   curl: bool = True, javascript: bool = True, python: bool = True,
                   localization: typing.Union[typing.Type[Localization], Localization] = Localization):
@@ -494,6 +623,10 @@ class Nasse:
         localization: Localization
             The language for the docs
         """
+        import rich.progress
+
+        from nasse import docs
+
         with rich.progress.Progress(rich.progress.SpinnerColumn(),
                                     *rich.progress.Progress.get_default_columns(),
                                     transient=True) as progress:
@@ -517,12 +650,14 @@ class Nasse:
             result += "## {localization__index}\n\n".format(localization__index=localization.index)
 
             # Sorting the sections alphabetically
-            sections = sorted({endpoint.category for endpoint in self.endpoints.values()})
+            # Nasse's own debugging endpoints are not part of the API
+            endpoints = [endpoint for endpoint in self.endpoints.values() if not endpoint.internal]
+            sections = sorted({endpoint.category for endpoint in endpoints})
 
             # Getting the endpoints for each section
             sections_registry = {}
             for section in sections:
-                for endpoint in self.endpoints.values():
+                for endpoint in endpoints:
                     if endpoint.category == section:
                         try:
                             sections_registry[section].append(endpoint)
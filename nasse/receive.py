@@ -2,17 +2,33 @@
 This is where the requests are received and first processed
 """
 import base64
+import functools
 import inspect
-import sys
 import typing
 
 import flask
+import werkzeug
 
 from nasse import config, exceptions, models, request, utils
-from nasse.response import Response, exception_to_response
+from nasse.response import Response, exception_to_response, stream_ndjson
 from nasse.utils import timer
 
-RECEIVERS_COUNT = 0
+# numbers the receivers
+RECEIVERS = utils.concurrency.Counter(1)
+
+
+def with_request(iterable: typing.Iterable, context: request.Request) -> typing.Generator:
+    """
+    Internal function keeping the request available while a streamed response is being sent outside of Flask
+    """
+    token = request.current.set(context)
+    try:
+        yield from iterable
+    finally:
+        try:
+            request.current.reset(token)
+        except ValueError:  # finalized in another context
+            pass
 
 
 def retrieve_token(context: request.Request = None) -> str:
@@ -25,7 +41,10 @@ def retrieve_token(context: request.Request = None) -> str:
         The current request, if not properly set, the current context is used.
     """
     if not isinstance(context, request.Request):
-        context = flask.g.request or flask.request
+        try:
+            context = request.get_current()
+        except Exception:
+            context = flask.request
     token = context.headers.get("Authorization", None)
     if token is None:
         # should be app.id + "_token"
@@ -49,102 +68,260 @@ class Receive:
         It performs some verification, according to what the user provided for the endpoint
         and sets some important variables, like nasse.request
         """
-        # boo i need to use a global variable
-        global RECEIVERS_COUNT
         self.app = app
         self.endpoint = endpoint
-        RECEIVERS_COUNT += 1
-        self.__name__ = "__nasse_receiver_{number}".format(number=RECEIVERS_COUNT)
+        self.__name__ = "__nasse_receiver_{number}".format(number=next(RECEIVERS))
+        self.specs = inspect.getfullargspec(self.endpoint.handler)
 
     def __call__(self, *args: typing.Any, **kwds: typing.Any) -> typing.Any:
+        # called by Flask, with the dynamic routing values as keyword arguments
+        return self.receive(flask.request._get_current_object(), dynamics=kwds, args=args, flask_context=True)
+
+    def authenticate(self, context: request.Request) -> typing.Any:
+        """
+        Applies the login rules of the endpoint to the given request
+
+        Parameters
+        ----------
+        context: request.Request
+            The current request
+
+        Returns
+        -------
+        Any
+            The account making the request, if any
+
+        Raises
+        ------
+        Exception
+            If a required login failed
+        """
+        account = None
+        login_rules = self.endpoint.login.get(context.method, self.endpoint.login["*"])
+        for rule in login_rules:
+            if not rule.skip:
+                try:
+                    token = retrieve_token(context)
+                    if self.app.config.account_management:
+                        if not rule.skip_fetch:
+                            account = self.app.config.account_management.retrieve_account(token)
+                            if len(rule.types) > 0:
+                                if self.app.config.account_management.retrieve_type(account) not in rule.types:
+                                    account = None  # if login is not required, the account might be passed with a wrong type
+                                    raise exceptions.authentication.Forbidden(
+                                        "You can't access this endpoint with your account")
+                        else:
+                            verification = self.app.config.account_management.verify_token(token)
+                            if verification == False:
+                                raise exceptions.authentication.Forbidden("We couldn't verify your token")
+                    else:
+                        self.app.config.logger.warn("Couldn't verify login details because the 'account_management' is not set properly on {name}"
+                                                    .format(name=self.app.config.name))
+                except Exception as e:
+                    if rule.required:
+                        raise e
+        return account
+
+    def arguments(self, context: request.Request, account: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the keyword arguments to call the handler with
+
+        Parameters
+        ----------
+        context: request.Request
+            The current request
+        account: Any, optional
+            The account making the request
+        """
+        # TODO: Maybe use function signatures here ?
+        specs = self.specs
+        arguments = {}
+
+        for arg in specs.args:  # for the function arguments
+            for storage in (context.values, context.headers, context.cookies):
+                if arg in storage:
+                    val = storage.getlist(arg)
+                    if len(val) > 1:
+                        arguments[arg] = val
+                    else:
+                        arguments[arg] = val[0]
+                    break
+
+        if account is not None:
+            arguments.pop("account", None)
+
+        for attr, current_values in [
+            ("app", self.app),
+            ("nasse", self.app),
+            ("config", self.app.config),
+            ("logger", self.app.logger),
+            ("endpoint", self.endpoint),
+            ("nasse_endpoint", self.endpoint),
+            ("request", context),
+            ("method", context.method),
+            ("values", context.values),
+            ("params", context.values),
+            ("parameters", context.values),
+            ("args", context.args),
+            ("form", context.form),
+            ("headers", context.headers),
+            ("account", account),
+            ("dynamics", context.dynamics),
+            ("projection", context.projection)
+        ]:
+            if (attr in specs.args or specs.varkw) and attr not in arguments:
+                arguments[attr] = current_values
+
+        for key, val in context.dynamics.items():  # no need for multi=True as dynamics should only have one value
+            if key in specs.args or specs.varkw:
+                arguments[key] = val
+
+        return arguments
+
+    def finish(self,
+               raw: werkzeug.Request,
+               context: typing.Union[request.Request, werkzeug.Request],
+               response: flask.Response,
+               counter: typing.Optional[utils.wsgi.CountingIterable],
+               error: typing.Optional[str],
+               timers: typing.Tuple[typing.Optional[timer.Timer], ...]) -> None:
+        """
+        Logs and records a request, once its response has been sent
+
+        Parameters
+        ----------
+        raw: werkzeug.Request
+            The underlying request
+        context: nasse.request.Request | werkzeug.Request
+            The Nasse request, or the underlying request if it could not be created
+        response: flask.Response
+            The response sent
+        counter: utils.wsgi.CountingIterable, optional
+            The iterable which counted the bytes of a streamed response
+        error: str, optional
+            The error name, if any
+        timers: tuple[timer.Timer | None, ...]
+            The global, verification, authentication, processing and formatting timers
+        """
+        status = response.status_code
+        method = str(raw.method).upper()
+        if method == "HEAD" or 100 <= status < 200 or status in (204, 304):
+            size = 0  # no body is sent
+        elif counter is not None and response.response is counter:
+            size = counter.size
+        else:
+            size = response.calculate_content_length() or 0
+        ip = context.client_ip if isinstance(context, request.Request) else utils.ip.get_ip(raw)
+        global_timer, verification_timer, authentication_timer, processing_timer, formatting_timer = timers
+
+        try:
+            if size < 500000:
+                color = "{green}"
+            elif size < 1000000:
+                color = "{yellow}"
+            else:
+                color = "{magenta}"
+            if status < 200:  # ?
+                status_color = "{white}"
+            elif status < 300:
+                status_color = "{blue}"
+            elif status < 400:
+                status_color = "{green}"
+            elif status < 500:
+                status_color = "{yellow}"
+            else:
+                status_color = "{magenta}"
+            self.app.config.logger.info("← Sent back {color}{size}{{normal}} bytes of data to {ip} following {status_color}{status}{{normal}} {{blue}}{method} {path}{{normal}}".format(
+                color=color,
+                size=size,
+                ip=ip,
+                method=method,
+                status=status,
+                status_color=status_color,
+                path=self.endpoint.path,
+            ))
+        except Exception:
+            # utils.logging.logger.print_exception()
+            pass
+
+        # the repeated exceptions are summarized once their window is over
+        self.app.config.logger.reporter.summarize()
+
+        if self.app.history is not None and not self.endpoint.internal:
+            self.app.history.record(self.endpoint.path, method, status, global_timer.time, size,
+                                    ip if self.app.config.request_history_ips else None, error)
+
+        if self.app.config.access_log:
+            try:
+                self.app.access_log.log(endpoint=self.endpoint.path,
+                                        path=raw.path,
+                                        method=method,
+                                        status=status,
+                                        ip=ip,
+                                        size=size,
+                                        timings={
+                                            "global": global_timer.time,
+                                            "verification": verification_timer.time if verification_timer else None,
+                                            "authentication": authentication_timer.time if authentication_timer else None,
+                                            "processing": processing_timer.time if processing_timer else None,
+                                            "formatting": formatting_timer.time if formatting_timer else None
+                                        },
+                                        error=error)
+            except Exception:
+                self.app.config.logger.report_exception()
+
+        if self.app.config.capture:
+            try:
+                self.app.capture.record(raw,
+                                        endpoint=self.endpoint.path,
+                                        dynamics=context.dynamics if isinstance(context, request.Request) else raw.view_args,
+                                        status=status,
+                                        duration=global_timer.time)
+            except Exception:
+                self.app.config.logger.report_exception()
+
+    def receive(self,
+                raw: werkzeug.Request,
+                dynamics: typing.Optional[dict] = None,
+                args: typing.Iterable = (),
+                flask_context: bool = False) -> flask.Response:
+        """
+        Processes the given request
+
+        Parameters
+        ----------
+        raw: werkzeug.Request
+            The underlying request
+        dynamics: dict, optional
+            The dynamic routing values
+        args: Iterable
+            The positional arguments to pass to the handler
+        flask_context: bool, default = False
+            If the request is being processed inside a Flask request context
+        """
+        current = raw
+        context_token = None
         try:
             with self.app.config.logger as logger:
                 with utils.logging.CallStackRecorder() as call_stack:
                     with timer.Timer() as global_timer:
+                        streaming = False
                         try:
                             with timer.Timer() as verification_timer:
-                                context = request.Request(app=self.app, endpoint=self.endpoint, dynamics=kwds)
-                                flask.g.request = context
-                                logger.info("→ Incoming {{blue}}{method}{{normal}} request to {{blue}}{route}{{normal}} from {client}".format(method=flask.g.request.method,
+                                context = request.Request(app=self.app, endpoint=self.endpoint, dynamics=dynamics, request=raw)
+                                current = context
+                                context_token = request.current.set(context)
+                                if flask_context:
+                                    flask.g.request = context
+                                logger.info("→ Incoming {{blue}}{method}{{normal}} request to {{blue}}{route}{{normal}} from {client}".format(method=current.method,
                                                                                                                                               route=self.endpoint.path,
-                                                                                                                                              client=flask.g.request.client_ip))
+                                                                                                                                              client=current.client_ip))
 
-                            account = None
                             with timer.Timer() as authentication_timer:
-                                method = flask.g.request.method
-                                login_rules = self.endpoint.login.get(method, self.endpoint.login["*"])
-                                for rule in login_rules:
-                                    if not rule.skip:
-                                        try:
-                                            token = retrieve_token(context)
-                                            if self.app.config.account_management:
-                                                if not rule.skip_fetch:
-                                                    account = self.app.config.account_management.retrieve_account(token)
-                                                    if len(rule.types) > 0:
-                                                        if self.app.config.account_management.retrieve_type(account) not in login_rules.types:
-                                                            account = None  # if login is not required, the account might be passed with a wrong type
-                                                            raise exceptions.authentication.Forbidden(
-                                                                "You can't access this endpoint with your account")
-                                                else:
-                                                    verification = self.app.config.account_management.verify_token(token)
-                                                    if verification == False:
-                                                        raise exceptions.authentication.Forbidden("We couldn't verify your token")
-                                            else:
-                                                logger.warn("Couldn't verify login details because the 'account_management' is not set properly on {name}"
-                                                            .format(name=self.app.config.name))
-                                        except Exception as e:
-                                            if rule.required:
-                                                raise e
+                                account = self.authenticate(context)
 
                             with timer.Timer() as processing_timer:
-                                # TODO: Maybe use function signatures here ?
-                                specs = inspect.getfullargspec(self.endpoint.handler)
-                                arguments = {}
-
-                                for arg in specs.args:  # for the function arguments
-                                    for storage in (flask.g.request.values, flask.g.request.headers, flask.g.request.cookies):
-                                        if arg in storage:
-                                            val = storage.getlist(arg)
-                                            if len(val) > 1:
-                                                arguments[arg] = val
-                                            else:
-                                                arguments[arg] = val[0]
-                                            break
-
-                                if account is not None:
-                                    arguments.pop("account", None)
-
-                                for attr, current_values in [
-                                    ("app", self.app),
-                                    ("nasse", self.app),
-                                    ("config", self.app.config),
-                                    ("logger", self.app.logger),
-                                    ("endpoint", self.endpoint),
-                                    ("nasse_endpoint", self.endpoint),
-                                    ("request", flask.g.request),
-                                    ("method", flask.g.request.method),
-                                    ("values", flask.g.request.values),
-                                    ("params", flask.g.request.values),
-                                    ("parameters", flask.g.request.values),
-                                    ("args", flask.g.request.args),
-                                    ("form", flask.g.request.form),
-                                    ("headers", flask.g.request.headers),
-                                    ("account", account),
-                                    ("dynamics", flask.g.request.dynamics)
-                                ]:
-                                    if (attr in specs.args or specs.varkw) and attr not in arguments:
-                                        arguments[attr] = current_values
-
-                                for key, val in flask.g.request.dynamics.items():  # no need for multi=True as dynamics should only have one value
-                                    if key in specs.args or specs.varkw:
-                                        arguments[key] = val
-
-                                # we don't need this because "dynamics" already holds those values
-                                # and it saves us from making another loop
-                                # arguments.update(kwds)
-                                # for arg in arguments:
-                                #     if arg not in specs:
-                                #         arguments.pop(arg, None)
+                                arguments = self.arguments(context, account)
 
                                 # calling the request handler
                                 response = self.endpoint.handler(*args, **arguments)
@@ -177,6 +354,9 @@ class Receive:
                                 elif isinstance(response, Exception):
                                     # return NasseException("Something went wrong")
                                     message, error, code = exception_to_response(response)
+                                elif self.endpoint.stream and isinstance(response, list):
+                                    # return [row, row, ...] on a streaming endpoint
+                                    data = response
                                 elif isinstance(response, typing.Iterable) and not isinstance(response, typing.Generator):
                                     found = False
                                     if utils.unpack.is_unpackable(response):
@@ -209,7 +389,30 @@ class Receive:
                                     logger.warn("The returning HTTP status code doesn't seem to be a standard status code: {code}"
                                                 .format(code=code))
 
-                                if not self.endpoint.json:
+                                if (error is None and current.projection is not None
+                                        and (self.endpoint.json or self.endpoint.stream)):
+                                    # only keeping the fields requested with `fields=`
+                                    data = utils.projection.apply(data, current.projection)
+
+                                if (self.endpoint.stream == "ndjson" and error is None
+                                        and isinstance(data, typing.Iterable)
+                                        and not isinstance(data, (str, bytes))
+                                        and not utils.unpack.is_unpackable(data)
+                                        and not hasattr(data, "read")):
+                                    # data: a generator, a list of rows, etc. sent one JSON item per line
+                                    streaming = True
+                                    body = stream_ndjson(data, config=self.app.config)
+                                    final = flask.Response(flask.stream_with_context(body) if flask_context else with_request(body, context),
+                                                           status=code,
+                                                           content_type="application/x-ndjson")
+
+                                    if self.app.config.debug:
+                                        final.headers["X-NASSE-TIME-GLOBAL"] = str(global_timer.stop())
+                                        final.headers["X-NASSE-TIME-VERIFICATION"] = str(verification_timer.time)
+                                        final.headers["X-NASSE-TIME-AUTHENTICATION"] = str(authentication_timer.time)
+                                        final.headers["X-NASSE-TIME-PROCESSING"] = str(processing_timer.time)
+                                        final.headers["X-NASSE-TIME-FORMATTING"] = str(formatting_timer.stop())
+                                elif not self.endpoint.json:
                                     final = flask.Response(response=data, status=code)
 
                                     try:
@@ -233,7 +436,7 @@ class Receive:
                                     }
                                     if utils.unpack.is_unpackable(data):
                                         # data: {"username": "someone", "token": "something"}
-                                        result["data"] = dict(data)
+                                        result["data"] = data if isinstance(data, dict) else dict(data)
                                     elif isinstance(data, bytes):
                                         # data: bytes data, raw file content
                                         result["data"]["base64"] = base64.b64encode(data).decode("utf-8")
@@ -263,7 +466,7 @@ class Receive:
                         except Exception as e:
                             if self.app.config.debug:
                                 if not isinstance(e, exceptions.authentication.MissingToken):
-                                    logger.print_exception()
+                                    logger.report_exception()
                                 else:
                                     logger.debug("The request seems to be lacking an authentication token")
 
@@ -275,11 +478,6 @@ class Receive:
                                 "data": {}
                             }
 
-                        try:
-                            flask.g.request
-                        except Exception:
-                            flask.g.request = flask.request
-
                         try:
                             verification_timer
                         except Exception:
@@ -302,12 +500,7 @@ class Receive:
                         except Exception:
                             result = {}
 
-                        if self.endpoint.json:
-                            try:
-                                flask.g.request
-                            except Exception:
-                                flask.g.request = flask.request
-
+                        if self.endpoint.json and not streaming:
                             if self.app.config.debug:
                                 result["debug"] = {
                                     "time": {
@@ -317,10 +510,10 @@ class Receive:
                                         "processing": processing_timer.time if processing_timer else None,
                                         "formatting": formatting_timer.stop() if formatting_timer else None
                                     },
-                                    "ip": flask.g.request.client_ip if isinstance(flask.g.request, request.Request) else utils.ip.get_ip(),
-                                    "headers": dict(flask.g.request.headers),
-                                    "values": dict(flask.g.request.values),
-                                    "domain": flask.g.request.host,
+                                    "ip": current.client_ip if isinstance(current, request.Request) else utils.ip.get_ip(raw),
+                                    "headers": dict(current.headers),
+                                    "values": dict(current.values),
+                                    "domain": current.host,
                                     "logs": [{
                                         "time": r.time,
                                         "level": r.level.name,
@@ -329,18 +522,19 @@ class Receive:
                                     "call_stack": ["pass the 'call_stack' parameter to get the call stack"]
                                 }
 
-                                if "call_stack" in flask.g.request.values:
+                                if "call_stack" in current.values:
                                     result["debug"]["call_stack"] = [frame.as_dict()
                                                                      for frame in call_stack.call_stack]
 
-                            minify = utils.boolean.to_bool(flask.g.request.values.get("minify", False))
+                            minify = utils.boolean.to_bool(current.values.get("minify", False))
 
                             content_type = "application/json"
-                            if utils.sanitize.remove_spaces(flask.g.request.values.get("format", "json")).lower() in {"xml", "html"}:
-                                body = utils.xml.encode(data=result, minify=minify)
+                            if utils.sanitize.remove_spaces(current.values.get("format", "json")).lower() in {"xml", "html"}:
+                                # streamed, big lists would otherwise need to be fully serialized before sending anything
+                                body = utils.xml.iterencode(result, minify=minify, buffer=utils.xml.BUFFER_SIZE)
                                 content_type = "application/xml"
                             else:
-                                body = (utils.json.minified_encoder if minify else utils.json.encoder).encode(result)
+                                body = utils.json.encode_response(result, minify=minify)
 
                             final = flask.Response(body, status=code)
                             final.headers["Content-Type"] = content_type
@@ -365,10 +559,6 @@ class Receive:
                     except Exception:
                         pass
 
-                try:
-                    flask.g.request
-                except Exception:
-                    flask.g.request = flask.request
                 try:
                     cookies
                 except Exception:
@@ -377,6 +567,10 @@ class Receive:
                     headers
                 except Exception:
                     headers = {}
+                try:
+                    error
+                except Exception:
+                    error = None
 
                 # final is now defined
                 for cookie in cookies:
@@ -386,46 +580,20 @@ class Receive:
                 for key, value in headers.items():
                     final.headers.add(str(key), str(value))
 
-                try:
-                    size = sys.getsizeof(final.data)
-                    if isinstance(flask.g.request, request.Request):
-                        path = flask.g.request.nasse_endpoint.path
-                        ip = flask.g.request.client_ip
-                        method = flask.g.request.method
-                    else:
-                        path = flask.g.request.path
-                        ip = utils.ip.get_ip()
-                        method = str(flask.g.request.method).upper()
-                    if size < 500000:
-                        color = "{green}"
-                    elif size < 1000000:
-                        color = "{yellow}"
-                    else:
-                        color = "{magenta}"
-                    if final.status_code < 200:  # ?
-                        status_color = "{white}"
-                    elif final.status_code < 300:
-                        status_color = "{blue}"
-                    elif final.status_code < 400:
-                        status_color = "{green}"
-                    elif final.status_code < 500:
-                        status_color = "{yellow}"
-                    else:
-                        status_color = "{magenta}"
-                    self.app.config.logger.info("← Sending back {color}{size}{{normal}} bytes of data to {ip} following {status_color}{status}{{normal}} {{blue}}{method} {path}{{normal}}".format(
-                        color=color,
-                        size=size,
-                        ip=ip,
-                        method=method,
-                        status=final.status_code,
-                        status_color=status_color,
-                        path=path,
-                    ))
-                except Exception:
-                    # utils.logging.logger.print_exception()
-                    pass
+                counter = None
+                if final.is_streamed:
+                    # counting the bytes while they are sent, reading `final.data` would buffer the whole stream
+                    counter = utils.wsgi.CountingIterable(final.response)
+                    final.response = counter
+                # logged once the response has been fully sent
+                final.call_on_close(functools.partial(self.finish, raw, current, final, counter, error,
+                                                      (global_timer, verification_timer, authentication_timer,
+                                                       processing_timer, formatting_timer)))
 
                 return final
         except Exception as err:
-            utils.logging.logger.print_exception(show_locals=True)
+            self.app.config.logger.report_exception(show_locals=True)
             raise err
+        finally:
+            if context_token is not None:
+                request.current.reset(context_token)
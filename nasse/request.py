@@ -2,21 +2,49 @@
 This is where the request context is created and gets sanitized
 """
 
+import contextvars
 import typing
 
 import flask
 import werkzeug.datastructures
+import werkzeug.test
 
 from nasse import config, exceptions, models, utils
 
-_overwritten = {"nasse", "app", "nasse_endpoint",
-                "client_ip", "method", "headers", "values", "args", "form", "params", "cookies"}
+_overwritten = ("nasse", "app", "nasse_endpoint", "raw",
+                "client_ip", "method", "headers", "values", "args", "form", "params", "cookies", "dynamics", "projection")
+
+current: contextvars.ContextVar = contextvars.ContextVar("nasse_request")
+"""Holds the request currently being processed"""
+
+
+def get_current() -> "Request":
+    """
+    Returns the request currently being processed
+
+    Raises
+    ------
+    RuntimeError
+        If used outside of a request context
+    """
+    try:
+        return current.get()
+    except LookupError:
+        pass
+    try:
+        # set when the request is processed inside a Flask request context
+        return flask.g.request
+    except (AttributeError, RuntimeError):  # not set, or outside of any Flask application context
+        raise RuntimeError("Working outside of a request context") from None
 
 
 class Request(object):
     """Represents the current request"""
 
-    def __init__(self, app, endpoint: models.Endpoint, dynamics: dict = None) -> None:
+    # the other attributes are looked up on the underlying request
+    __slots__ = _overwritten
+
+    def __init__(self, app, endpoint: models.Endpoint, dynamics: dict = None, request: typing.Optional[werkzeug.Request] = None) -> None:
         """
         A request object looking like the flask.Request one, but with the current endpoint in it and verification
 
@@ -33,6 +61,10 @@ class Request(object):
         ----------
             endpoint: Nasse.models.Endpoint
                 The request's endpoint
+            dynamics: dict
+                The dynamic routing values
+            request: werkzeug.Request
+                The underlying request, defaults to the current `flask.request`
         """
         dynamics = dynamics or {}
 
@@ -42,33 +74,35 @@ class Request(object):
         self.nasse = app
         self.app = self.nasse
         self.nasse_endpoint = endpoint
+        self.raw = request if request is not None else flask.request._get_current_object()
+        raw = self.raw
 
-        self.client_ip = utils.ip.get_ip()
+        self.client_ip = utils.ip.get_ip(raw)
 
-        self.method = flask.request.method.upper()
+        self.method = raw.method.upper()
 
         # sanitize
         if self.app.config.sanitize_user_input:
             self.values = werkzeug.datastructures.MultiDict((key, utils.sanitize.sanitize_text(value))
-                                                            for key, value in flask.request.values.items(multi=True))
+                                                            for key, value in raw.values.items(multi=True))
             # values.append((key, value.replace("<", "&lt").replace(">", "&gt")))
         else:
-            self.values = werkzeug.datastructures.MultiDict(flask.request.values.items(multi=True))
+            self.values = werkzeug.datastructures.MultiDict(raw.values.items(multi=True))
         self.params = self.values
 
         if self.app.config.sanitize_user_input:
             self.args = werkzeug.datastructures.MultiDict((key, utils.sanitize.sanitize_text(value))
-                                                          for key, value in flask.request.args.items(multi=True))
+                                                          for key, value in raw.args.items(multi=True))
         else:
             self.args = werkzeug.datastructures.MultiDict(
-                flask.request.args.items(multi=True))
+                raw.args.items(multi=True))
 
         if self.app.config.sanitize_user_input:
             self.form = werkzeug.datastructures.MultiDict((key, utils.sanitize.sanitize_text(value))
-                                                          for key, value in flask.request.form.items(multi=True))
+                                                          for key, value in raw.form.items(multi=True))
         else:
             self.form = werkzeug.datastructures.MultiDict(
-                flask.request.form.items(multi=True))
+                raw.form.items(multi=True))
 
         if self.app.config.sanitize_user_input:
             self.dynamics = werkzeug.datastructures.MultiDict((key, utils.sanitize.sanitize_text(value))
@@ -76,8 +110,8 @@ class Request(object):
         else:
             self.dynamics = werkzeug.datastructures.MultiDict(dynamics.items())
 
-        self.headers = werkzeug.datastructures.MultiDict(flask.request.headers)
-        self.cookies = werkzeug.datastructures.MultiDict(flask.request.cookies)
+        self.headers = werkzeug.datastructures.MultiDict(raw.headers)
+        self.cookies = werkzeug.datastructures.MultiDict(raw.cookies)
 
         # verify if missing
         for attr, exception, current_values in [("parameters", exceptions.request.MissingParam, self.values),
@@ -105,12 +139,42 @@ class Request(object):
                                     raise exceptions.request.InvalidType(name=key) from err
                         current_values.setlist(value.name, results)
 
+        # the fields requested by the client, unless the endpoint uses its own `fields` parameter
+        self.projection = None
+        fields = self.values.get("fields", None)
+        if fields is not None and not any(parameter.name == "fields"
+                                          for parameter in models.get_method_variant(self.method, self.nasse_endpoint.parameters)):
+            try:
+                self.projection = utils.projection.parse(fields)
+                utils.projection.validate(self.projection, models.get_method_variant(self.method, self.nasse_endpoint.returns))
+            except ValueError as err:
+                raise exceptions.request.InvalidProjection(message=str(err)) from err
+
     def __setattr__(self, name: str, value: typing.Any) -> None:
         if name in _overwritten:
-            return super().__setattr__(name, value)
-        return flask.request.__setattr__(name, value)
+            return object.__setattr__(self, name, value)
+        return setattr(self.raw, name, value)
 
-    def __getattribute__(self, name: str) -> typing.Any:
-        if name in _overwritten:
-            return super().__getattribute__(name)
-        return flask.request._get_current_object().__getattribute__(name)
+    def __getattr__(self, name: str) -> typing.Any:
+        # only called when `name` is not one of the slots
+        if name == "raw":  # not initialized yet
+            raise AttributeError(name)
+        return getattr(self.raw, name)
+
+
+def _delegate(name: str) -> property:
+    """Internal function creating a property forwarding `name` to the underlying request"""
+    def getter(self: Request) -> typing.Any:
+        return getattr(self.raw, name)
+
+    def setter(self: Request, value: typing.Any) -> None:
+        setattr(self.raw, name, value)
+
+    return property(getter, setter, doc="Forwarded to the underlying request")
+
+
+# Direct lookups for the request attributes (the class ones and the ones set when initializing it),
+# `__getattr__` only handles the remaining ones
+for _name in set(dir(flask.Request)) | set(vars(flask.Request(werkzeug.test.create_environ()))):
+    if not _name.startswith("_") and _name not in _overwritten and not hasattr(Request, _name):
+        setattr(Request, _name, _delegate(_name))
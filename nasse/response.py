@@ -11,10 +11,54 @@ import werkzeug.exceptions
 from nasse import config, exceptions, utils
 
 
+_error_names: typing.Dict[type, str] = {}
+_responses: typing.Dict[type, typing.Tuple[str, str, int]] = {}
+_bodies: typing.Dict[typing.Tuple[type, bool], typing.Tuple[str, int]] = {}
+
+
+def error_name(cls: type) -> str:
+    """
+    Internal function to convert a class name to an error name: NasseException -> NASSE_EXCEPTION
+
+    The results are cached per class.
+    """
+    try:
+        return _error_names[cls]
+    except KeyError:
+        pass
+    error = " ".join(utils.sanitize.split_on_uppercase(cls.__name__)).upper().strip().replace(" ", "_")
+    _error_names[cls] = error
+    return error
+
+
+def uses_defaults(value: Exception) -> bool:
+    """
+    Internal function to check if the response for the given exception only depends on its class
+
+    This is the case for Nasse exceptions and werkzeug HTTP exceptions raised without any custom message
+    """
+    if isinstance(value, exceptions.NasseException):
+        attributes = vars(value)
+        return "MESSAGE" not in attributes and "EXCEPTION_NAME" not in attributes and "STATUS_CODE" not in attributes
+    if isinstance(value, werkzeug.exceptions.HTTPException):
+        attributes = vars(value)
+        return "description" not in attributes and "code" not in attributes
+    return False
+
+
 def exception_to_response(value: Exception, config: typing.Optional[config.NasseConfig] = None):
     """
     Internal function to turn an exception to a tuple of values that can be used to make a response
+
+    The values are cached per class for the exceptions without any custom message.
     """
+    cacheable = uses_defaults(value)
+    if cacheable:
+        try:
+            return _responses[value.__class__]
+        except KeyError:
+            pass
+
     if isinstance(value, exceptions.NasseException):
         data = value.MESSAGE
         error = value.EXCEPTION_NAME
@@ -26,13 +70,13 @@ def exception_to_response(value: Exception, config: typing.Optional[config.Nasse
         # we consider that they are fewer non basic exceptions (non 500) that are dangerous to leak (i.e: 4xx errors are related to the client)
         else:
             data = value.description
-        error = " ".join(utils.sanitize.split_on_uppercase(value.__class__.__name__)).upper().strip().replace(" ", "_")
+        error = error_name(value.__class__)
     else:
         # converts class names to error names: NasseException -> NASSE_EXCEPTION
         if isinstance(value, type):
-            error = " ".join(utils.sanitize.split_on_uppercase(value.__name__)).upper().strip().replace(" ", "_")
+            error = error_name(value)
         else:
-            error = " ".join(utils.sanitize.split_on_uppercase(value.__class__.__name__)).upper().strip().replace(" ", "_")
+            error = error_name(value.__class__)
         if config and config.debug:
             data = "An error occured on the server while processing your request ({error})".format(error=value)
         else:
@@ -40,9 +84,74 @@ def exception_to_response(value: Exception, config: typing.Optional[config.Nasse
         code = 500
     if not data:
         data = "An error occured on the server while processing your request"
+
+    if cacheable:
+        _responses[value.__class__] = (data, error, code)
     return data, error, code
 
 
+def encode_exception(value: Exception, xml: bool = False, config: typing.Optional[config.NasseConfig] = None) -> typing.Tuple[str, int]:
+    """
+    Internal function to encode the minified error response body for the given exception
+
+    The bodies are pre-encoded once per class for the exceptions without any custom message.
+
+    Parameters
+    ----------
+    value: Exception
+        The exception to send back
+    xml: bool, default = False
+        If the body should be encoded to XML instead of JSON
+    config: NasseConfig, optional
+        The app configuration
+
+    Returns
+    -------
+    tuple[str, int]
+        The encoded body and the status code
+    """
+    cacheable = uses_defaults(value)
+    if cacheable:
+        try:
+            return _bodies[(value.__class__, xml)]
+        except KeyError:
+            pass
+    message, error, code = exception_to_response(value, config=config)
+    result = {"success": False, "message": message, "error": error, "data": {}}
+    if xml:
+        body = utils.xml.encode(data=result, minify=True)
+    else:
+        body = utils.json.minified_encoder.encode(result)
+    if cacheable:
+        _bodies[(value.__class__, xml)] = (body, code)
+    return body, code
+
+
+def stream_ndjson(iterable: typing.Iterable, config: typing.Optional[config.NasseConfig] = None) -> typing.Generator[str, None, None]:
+    """
+    Internal function to encode an iterable as newline delimited JSON (NDJSON), one item per line
+
+    If an exception is raised while iterating, a final error record is sent
+    and the stream is closed.
+
+    Parameters
+    ----------
+    iterable: Iterable
+        The items to send back
+    config: NasseConfig, optional
+        The app configuration, used to log the errors
+    """
+    encode = utils.json.minified_encoder.encode
+    try:
+        for item in iterable:
+            yield encode(item) + "\n"
+    except Exception as err:  # pylint: disable=broad-except
+        if config and config.debug:
+            config.logger.report_exception()
+        message, error, _ = exception_to_response(err, config=config)
+        yield encode({"success": False, "error": error, "message": message, "data": {}}) + "\n"
+
+
 def cookie_validation(value):
     """
     Internal function to validate a value that needs to be a `ResponseCookie` instance
@@ -26,7 +26,7 @@ class Flask(servers.ServerBackend):
         self.server = werkzeug.serving.make_server(
             host=self.config.host,
             port=self.config.port,
-            app=self.app.flask,
+            app=self.app.wsgi,
             *args,
             **kwargs
         )
@@ -42,7 +42,7 @@ class Gunicorn(Flask):
                 **kwargs
             }
             self.options.update(kwargs or {})
-            self.application = app.flask
+            self.application = app.wsgi
             gunicorn.SERVER_SOFTWARE = self.config.server_header
             gunicorn.SERVER = gunicorn.SERVER_SOFTWARE
             super().__init__()
@@ -54,7 +54,7 @@ class Gunicorn(Flask):
                 self.cfg.set(key.lower(), value)
 
         def load(self):
-            return self.app.flask
+            return self.app.wsgi
 
         def on_starting(self, server):
             self.config.logger.log("Running the server ✨")
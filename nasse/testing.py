@@ -0,0 +1,496 @@
+"""
+Drives a Nasse app in-process, without any socket, to test it or measure its performance
+"""
+import bisect
+import dataclasses
+import math
+import threading
+import time
+import typing
+
+import werkzeug.test
+from flask.wrappers import Response
+
+from nasse.utils.concurrency import Counter
+
+
+class Client(werkzeug.test.Client):
+    """
+    A test client calling the WSGI application of a Nasse app directly
+
+    The responses are buffered by default, so that the whole Nasse pipeline (including what runs once
+    the response got sent, like the access logs or the request history) is run for each request.
+
+    Example
+    -------
+    >>> client = app.test_client()
+    >>> client.get("/hello", query_string={"name": "someone"}).json["data"]
+    {'hello': 'someone'}
+    """
+
+    def __init__(self, app: "nasse.Nasse", **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        app: Nasse
+            The app to call
+        **kwargs
+            Extra arguments passed to `werkzeug.test.Client`
+        """
+        kwargs.setdefault("response_wrapper", Response)
+        super().__init__(app.wsgi, **kwargs)
+        self.nasse = app
+
+    def open(self, *args: typing.Any, buffered: bool = True, **kwargs: typing.Any) -> Response:
+        return super().open(*args, buffered=buffered, **kwargs)
+
+
+def error_name(response: Response) -> typing.Optional[str]:
+    """
+    Returns the Nasse error of a response, from the `X-NASSE-ERROR` header or the JSON body
+
+    Parameters
+    ----------
+    response: Response
+        The response, from `Client`
+    """
+    error = response.headers.get("X-NASSE-ERROR", None)
+    if error is None and response.status_code >= 400 and response.is_json:
+        try:
+            error = response.get_json().get("error", None)
+        except Exception:
+            pass
+    return error
+
+
+def http_error_name(response: "requests.Response") -> typing.Optional[str]:
+    """
+    Returns the Nasse error of a response received with `requests`
+
+    Parameters
+    ----------
+    response: requests.Response
+    """
+    error = response.headers.get("X-NASSE-ERROR", None)
+    if error is None and response.status_code >= 400:
+        try:
+            error = response.json().get("error", None)
+        except Exception:
+            pass
+    return error
+
+
+def percentile(values: typing.Sequence[float], percent: float) -> typing.Optional[float]:
+    """
+    Returns the given percentile of already sorted values, using the nearest-rank method
+
+    Parameters
+    ----------
+    values: Sequence[float]
+        The sorted values
+    percent: float
+        The percentile, between 0 and 100
+    """
+    if not values:
+        return None
+    rank = math.ceil(percent / 100 * len(values))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+@dataclasses.dataclass
+class LoadResult:
+    """The results of a load test"""
+    duration: float = 0
+    """The total time taken, in seconds"""
+    latencies: typing.List[float] = dataclasses.field(default_factory=list)
+    """The time taken by each request, in seconds"""
+    statuses: typing.Dict[int, int] = dataclasses.field(default_factory=dict)
+    """The number of responses for each status code"""
+    errors: typing.Dict[str, int] = dataclasses.field(default_factory=dict)
+    """The number of responses for each Nasse error (or exception raised by the client)"""
+    groups: typing.Dict[str, "LoadResult"] = dataclasses.field(default_factory=dict)
+    """The results of each group of requests (the endpoints when replaying a capture, etc.)"""
+
+    @property
+    def requests(self) -> int:
+        """The number of requests sent"""
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        """The number of requests per second"""
+        return self.requests / self.duration if self.duration > 0 else 0
+
+    def record(self,
+               latency: float,
+               status: typing.Optional[int] = None,
+               error: typing.Optional[str] = None,
+               group: typing.Optional[str] = None) -> None:
+        """
+        Records a request
+
+        Parameters
+        ----------
+        latency: float
+            The time taken by the request, in seconds
+        status: int, optional
+            The response status code, if a response got received
+        error: str, optional
+            The error, if any
+        group: str, optional
+            The group the request is part of
+        """
+        self.latencies.append(latency)
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        if group is not None:
+            try:
+                self.groups[group].record(latency, status, error)
+            except KeyError:
+                self.groups[group] = LoadResult()
+                self.groups[group].record(latency, status, error)
+
+    def merge(self, other: "LoadResult") -> None:
+        """
+        Adds the requests recorded by another result (from another thread, etc.)
+
+        Parameters
+        ----------
+        other: LoadResult
+        """
+        self.latencies.extend(other.latencies)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+        for name, result in other.groups.items():
+            self.groups.setdefault(name, LoadResult()).merge(result)
+
+    def percentiles(self, *percents: float) -> typing.Dict[str, typing.Optional[float]]:
+        """
+        Returns the latency percentiles, in seconds
+
+        Parameters
+        ----------
+        *percents: float
+            The percentiles to compute, defaults to 50, 90, 99 and 99.9
+        """
+        latencies = sorted(self.latencies)
+        return {"p{percent:g}".format(percent=percent).replace(".", ""): percentile(latencies, percent)
+                for percent in (percents or (50, 90, 99, 99.9))}
+
+    def histogram(self, buckets: int = 10) -> typing.List[typing.Tuple[float, int]]:
+        """
+        Returns the number of requests in logarithmically spaced latency buckets
+
+        Parameters
+        ----------
+        buckets: int, default = 10
+            The number of buckets
+
+        Returns
+        -------
+        list[tuple[float, int]]
+            The upper bound of each bucket (in seconds) and the number of requests in it
+        """
+        if not self.latencies:
+            return []
+        lowest = max(min(self.latencies), 1e-9)
+        highest = max(max(self.latencies), lowest)
+        ratio = (highest / lowest) ** (1 / buckets) if highest > lowest else 1
+        bounds = [lowest * ratio ** (index + 1) for index in range(buckets)]
+        bounds[-1] = highest
+        counts = [0] * buckets
+        for latency in self.latencies:
+            counts[min(bisect.bisect_left(bounds, latency), buckets - 1)] += 1
+        return list(zip(bounds, counts))
+
+    def summary(self) -> typing.Dict[str, typing.Any]:
+        """Returns a JSON serializable summary of the results"""
+        result = {
+            "requests": self.requests,
+            "duration": self.duration,
+            "throughput": self.throughput,
+            "latency": {
+                "min": min(self.latencies, default=None),
+                "mean": sum(self.latencies) / self.requests if self.requests else None,
+                "max": max(self.latencies, default=None),
+                **self.percentiles()
+            },
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": dict(sorted(self.errors.items(), key=lambda item: item[1], reverse=True))
+        }
+        if self.groups:
+            result["groups"] = {name: group.summary() for name, group in sorted(self.groups.items())}
+        return result
+
+
+Sender = typing.Callable[[int], typing.Tuple[int, typing.Optional[str]]]
+"""A function sending the request at the given index and returning its status code and Nasse error"""
+
+
+def drive(factory: typing.Callable[[], Sender],
+          requests: int = 1000,
+          threads: int = 4,
+          rate: typing.Optional[float] = None,
+          offsets: typing.Optional[typing.Sequence[float]] = None,
+          group: typing.Optional[typing.Callable[[int], str]] = None) -> LoadResult:
+    """
+    Sends requests from multiple threads and measures their latency
+
+    With a fixed `rate` (or `offsets`), the requests are scheduled and their latency is measured
+    from the time they were scheduled at, so that a slow server is not hidden by requests sent late.
+
+    Parameters
+    ----------
+    factory: Callable[[], Sender]
+        Called once per thread, returns the function sending a request
+    requests: int, default = 1000
+        The total number of requests to send
+    threads: int, default = 4
+        The number of threads sending requests concurrently
+    rate: float, optional
+        The number of requests to send per second, as fast as possible if not provided
+    offsets: Sequence[float], optional
+        The time at which each request should be sent, in seconds from the start, instead of `rate`
+    group: Callable[[int], str], optional
+        Returns the group of the request at the given index, to get separate results in `LoadResult.groups`
+
+    Returns
+    -------
+    LoadResult
+        The results
+    """
+    counter = Counter()
+    results = [LoadResult() for _ in range(max(int(threads), 1))]
+
+    def worker(result: LoadResult):
+        send = factory()
+        while True:
+            index = next(counter)
+            if index >= requests:
+                break
+            if offsets is not None or rate:
+                begin = start + (offsets[index] if offsets is not None else index / rate)
+                delay = begin - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                begin = time.perf_counter()
+            name = group(index) if group is not None else None
+            try:
+                status, error = send(index)
+            except Exception as err:
+                result.record(time.perf_counter() - begin, error=err.__class__.__name__, group=name)
+                continue
+            result.record(time.perf_counter() - begin, status, error, group=name)
+
+    workers = [threading.Thread(target=worker, args=(result,), daemon=True) for result in results]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    final = LoadResult(duration=time.perf_counter() - start)
+    for result in results:
+        final.merge(result)
+    for result in final.groups.values():
+        result.duration = final.duration
+    return final
+
+
+def load(app: "nasse.Nasse",
+         path: str,
+         method: str = "GET",
+         requests: int = 1000,
+         threads: int = 4,
+         rate: typing.Optional[float] = None,
+         **kwargs) -> LoadResult:
+    """
+    Sends requests to an app from multiple threads, in-process, and measures their latency
+
+    Parameters
+    ----------
+    app: Nasse
+        The app to test
+    path: str
+        The path to request
+    method: str, default = "GET"
+        The HTTP method
+    requests: int, default = 1000
+        The total number of requests to send
+    threads: int, default = 4
+        The number of threads sending requests concurrently
+    rate: float, optional
+        The number of requests to send per second, as fast as possible if not provided
+    **kwargs
+        Extra arguments passed to `Client.open` for each request (`query_string`, `json`, `headers`, etc.)
+
+    Returns
+    -------
+    LoadResult
+        The results
+    """
+    def factory() -> Sender:
+        client = Client(app)
+
+        def send(index: int):
+            response = client.open(path, method=method, **kwargs)
+            return response.status_code, error_name(response)
+        return send
+
+    return drive(factory, requests=requests, threads=threads, rate=rate)
+
+
+def load_http(url: str,
+              method: str = "GET",
+              requests: int = 1000,
+              threads: int = 4,
+              rate: typing.Optional[float] = None,
+              **kwargs) -> LoadResult:
+    """
+    Sends requests to a running server from multiple threads and measures their latency
+
+    Each thread keeps its connections open between its requests.
+
+    Parameters
+    ----------
+    url: str
+        The URL to request
+    method: str, default = "GET"
+        The HTTP method
+    requests: int, default = 1000
+        The total number of requests to send
+    threads: int, default = 4
+        The number of threads sending requests concurrently
+    rate: float, optional
+        The number of requests to send per second, as fast as possible if not provided
+    **kwargs
+        Extra arguments passed to `requests.Session.request` for each request (`params`, `json`, `headers`, etc.)
+
+    Returns
+    -------
+    LoadResult
+        The results
+    """
+    import requests as http
+
+    def factory() -> Sender:
+        session = http.Session()
+
+        def send(index: int):
+            response = session.request(method, url, **kwargs)
+            return response.status_code, http_error_name(response)
+        return send
+
+    return drive(factory, requests=requests, threads=threads, rate=rate)
+
+
+def _placeholders(record: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Internal function replacing the redacted values of a captured request by placeholders of the same size"""
+    redacted = record.get("redacted") or {}
+    result = dict(record)
+    for name in ("args", "form"):
+        values = dict(record.get(name) or {})
+        for key, sizes in redacted.get(name, {}).items():
+            values[key] = ["0" * size for size in sizes]
+        result[name] = values
+    return result
+
+
+def replay(records: typing.Sequence[typing.Dict[str, typing.Any]],
+           app: typing.Optional["nasse.Nasse"] = None,
+           url: typing.Optional[str] = None,
+           speed: typing.Optional[float] = 1,
+           threads: int = 8) -> LoadResult:
+    """
+    Replays captured requests (see `nasse.utils.capture`) and measures their latency
+
+    Parameters
+    ----------
+    records: Sequence[dict[str, Any]]
+        The captured requests, from `nasse.utils.capture.read`.
+        The redacted parameters are sent with placeholder values of the same size.
+    app: Nasse, optional
+        The app to call in-process
+    url: str, optional
+        The URL of the running server to send the requests to, instead of `app`
+    speed: float, optional, default = 1
+        How fast the requests are replayed compared to when they got captured (2 is twice as fast).
+        They are sent as fast as possible if 0 or None.
+    threads: int, default = 8
+        The number of threads sending requests concurrently
+
+    Returns
+    -------
+    LoadResult
+        The results, grouped by method and endpoint in `LoadResult.groups`
+    """
+    if app is None and url is None:
+        raise ValueError("An app or a URL is needed to replay the requests")
+
+    records = sorted((_placeholders(record) for record in records), key=lambda record: record.get("time", 0))
+    offsets = None
+    if records and speed:
+        first = records[0].get("time", 0)
+        offsets = [(record.get("time", 0) - first) / speed for record in records]
+
+    def factory() -> Sender:
+        if url is None:
+            client = Client(app)
+
+            def send(index: int):
+                record = records[index]
+                response = client.open(record["path"], method=record["method"],
+                                       query_string=record.get("args") or None, data=record.get("form") or None)
+                return response.status_code, error_name(response)
+        else:
+            import requests as http
+            session = http.Session()
+
+            def send(index: int):
+                record = records[index]
+                response = session.request(record["method"], url.rstrip("/") + record["path"],
+                                           params=record.get("args") or None, data=record.get("form") or None)
+                return response.status_code, http_error_name(response)
+        return send
+
+    return drive(factory, requests=len(records), threads=threads, offsets=offsets,
+                 group=lambda index: "{method} {endpoint}".format(method=records[index]["method"],
+                                                                  endpoint=records[index].get("endpoint") or records[index]["path"]))
+
+
+def compare(baseline: typing.Dict[str, typing.Any],
+            current: typing.Dict[str, typing.Any],
+            percents: typing.Iterable[str] = ("p50", "p90", "p99")) -> typing.Dict[str, typing.Dict[str, typing.Optional[float]]]:
+    """
+    Compares the latencies of two runs, for each group they both have
+
+    Parameters
+    ----------
+    baseline: dict
+        The `LoadResult.summary` of the reference run
+    current: dict
+        The `LoadResult.summary` of the run to compare
+    percents: Iterable[str], default = ("p50", "p90", "p99")
+        The latency percentiles to compare
+
+    Returns
+    -------
+    dict[str, dict[str, float | None]]
+        The ratio between the current and the baseline latency for each group and percentile (above 1 is slower)
+    """
+    results = {}
+    groups = current.get("groups", {})
+    for name, previous in baseline.get("groups", {}).items():
+        if name not in groups:
+            continue
+        results[name] = {}
+        for percent in percents:
+            before = previous["latency"].get(percent, None)
+            after = groups[name]["latency"].get(percent, None)
+            results[name][percent] = after / before if before and after is not None else None
+    return results
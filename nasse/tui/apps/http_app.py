@@ -42,7 +42,7 @@ from nasse.tui.components.inputs import Input
 from textual.worker import get_current_worker
 
 from nasse import __info__
-from nasse.localization import EnglishLocalization, Localization, FrenchLocalization, JapaneseLocalization
+from nasse.localization import EnglishLocalization, Localization, FrenchLocalization, JapaneseLocalization, language_to_localization
 from nasse.models import Endpoint, Types, UserSent, get_method_variant
 from nasse.tui.app import App
 from nasse.tui.components import series
@@ -63,14 +63,6 @@ from nasse.tui.widget import Widget
 """
 
 
-def language_to_localization(lang: str = "eng"):
-    """Returns the correct localization from the given language string"""
-    if lang == JapaneseLocalization.__id__:
-        return JapaneseLocalization
-    elif lang == FrenchLocalization.__id__:
-        return FrenchLocalization
-    return EnglishLocalization
-
 # @dataclasses.dataclass
 # class Profile:
 #     """A profile"""
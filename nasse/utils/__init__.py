@@ -1,4 +1,4 @@
 """
 A set of commonly used utilities for web servers
 """
-from nasse.utils import args, boolean, ip, json, logging, router, sanitize, timer, types, unpack, xml, formatter
+from nasse.utils import access, args, boolean, capture, concurrency, history, ip, json, logging, projection, registry, router, sanitize, timer, types, unpack, wsgi, xml, formatter
@@ -0,0 +1,153 @@
+"""
+Structured access logs, one minified JSON object per request
+"""
+import pathlib
+import threading
+import time
+import typing
+
+from nasse.utils import json
+from nasse.utils.concurrency import Counter
+from nasse.utils.logging import LogWriter
+
+
+class AccessLog:
+    """
+    Writes one minified JSON object per request to `config.access_log` ("-" to write to the console)
+
+    `config.access_log_sampling` maps the endpoints paths (or "*" for all of the other endpoints)
+    to the proportion of their requests which should be logged.
+    The sampling is deterministic: with a rate of 0.1, exactly one request out of ten is logged.
+
+    Failed requests (an error or a status code >= 400) and requests slower than
+    `config.access_log_slow` seconds are always logged.
+    """
+
+    def __init__(self, config: "config.NasseConfig") -> None:
+        """
+        Parameters
+        ----------
+        config: NasseConfig
+            The configuration holding the access log settings
+        """
+        self.config = config
+        self._counters: typing.Dict[str, Counter] = {}
+        self._writer: typing.Optional[LogWriter] = None
+        self._path = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "AccessLog({path})".format(path=self.config.access_log)
+
+    @property
+    def writer(self) -> LogWriter:
+        """The writer for the current `config.access_log`"""
+        path = self.config.access_log
+        if self._writer is None or self._path != path:
+            with self._lock:
+                # another thread might have opened it while waiting for the lock
+                if self._writer is None or self._path != path:
+                    if self._writer is not None:
+                        self._writer.close()
+                    self._writer = LogWriter(self.config, path=None if str(path) == "-" else pathlib.Path(path))
+                    self._path = path
+        return self._writer
+
+    def rate(self, endpoint: str) -> float:
+        """
+        Returns the sampling rate for the given endpoint
+
+        Parameters
+        ----------
+        endpoint: str
+            The endpoint path
+        """
+        rates = self.config.access_log_sampling or {}
+        try:
+            return rates[endpoint]
+        except KeyError:
+            return rates.get("*", 1)
+
+    def sampled(self, endpoint: str, rate: float) -> bool:
+        """
+        Returns if the next request to the given endpoint should be logged
+
+        Parameters
+        ----------
+        endpoint: str
+            The endpoint path
+        rate: float
+            The proportion of requests to log
+        """
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        counter = self._counters.get(endpoint, None)
+        if counter is None:
+            counter = self._counters.setdefault(endpoint, Counter())
+        index = next(counter)
+        return int((index + 1) * rate) > int(index * rate)
+
+    def log(self,
+            endpoint: str,
+            path: str,
+            method: str,
+            status: int,
+            ip: typing.Optional[str] = None,
+            size: typing.Optional[int] = None,
+            timings: typing.Optional[typing.Dict[str, typing.Optional[float]]] = None,
+            error: typing.Optional[str] = None) -> bool:
+        """
+        Logs a request, if it is sampled
+
+        Parameters
+        ----------
+        endpoint: str
+            The endpoint path
+        path: str
+            The requested path
+        method: str
+            The HTTP method
+        status: int
+            The response status code
+        ip: str, optional
+            The client IP address
+        size: int, optional
+            The number of bytes sent
+        timings: dict[str, float], optional
+            The time taken by each processing phase, in seconds
+        error: str, optional
+            The error name, if any
+
+        Returns
+        -------
+        bool
+            If the request got logged
+        """
+        timings = timings or {}
+        rate = self.rate(endpoint)
+        slow = self.config.access_log_slow
+        forced = (error is not None
+                  or status >= 400
+                  or (slow is not None and (timings.get("global", None) or 0) >= slow))
+        if not forced and not self.sampled(endpoint, rate):
+            return False
+
+        line = json.minified_encoder.encode({
+            "time": time.time(),
+            "method": method,
+            "endpoint": endpoint,
+            "path": path,
+            "status": status,
+            "error": error,
+            "ip": ip,
+            "bytes": size,
+            "timings": timings,
+            "rate": 1 if forced else rate
+        }) + "\n"
+        if str(self.config.access_log) == "-":
+            self.writer.write(console=line)
+        else:
+            self.writer.write(file=line)
+        return True
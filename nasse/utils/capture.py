@@ -0,0 +1,130 @@
+"""
+Captures the shape of the requests received, to replay them later (see `nasse.testing.replay`)
+"""
+import json
+import pathlib
+import threading
+import time
+import typing
+
+from nasse.utils.json import minified_encoder
+from nasse.utils.logging import LogWriter
+
+
+class Capture:
+    """
+    Appends one minified JSON object per request to `config.capture`
+
+    Only what is needed to replay the requests is kept: the method, the path, the dynamic values,
+    the query and form parameters names, the headers and cookies names (without their values),
+    the body size, the time it got received at, the time it took and the response status code.
+
+    The parameters values are redacted, only their sizes being kept (under `redacted`),
+    unless their names are in `config.capture_values` ("*" to keep all of them).
+    The login token is never kept.
+    """
+
+    def __init__(self, config: "config.NasseConfig") -> None:
+        """
+        Parameters
+        ----------
+        config: NasseConfig
+            The configuration holding the capture settings
+        """
+        self.config = config
+        self._writer: typing.Optional[LogWriter] = None
+        self._path = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "Capture({path})".format(path=self.config.capture)
+
+    @property
+    def writer(self) -> LogWriter:
+        """The writer for the current `config.capture`"""
+        path = self.config.capture
+        if self._writer is None or self._path != path:
+            with self._lock:
+                # another thread might have opened it while waiting for the lock
+                if self._writer is None or self._path != path:
+                    if self._writer is not None:
+                        self._writer.close()
+                    self._writer = LogWriter(self.config, path=pathlib.Path(path))
+                    self._path = path
+        return self._writer
+
+    def record(self,
+               raw: "werkzeug.Request",
+               endpoint: str,
+               dynamics: typing.Optional[typing.Mapping[str, typing.Any]],
+               status: int,
+               duration: float) -> None:
+        """
+        Records a request
+
+        Parameters
+        ----------
+        raw: werkzeug.Request
+            The underlying request
+        endpoint: str
+            The endpoint path
+        dynamics: Mapping[str, Any], optional
+            The dynamic routing values
+        status: int
+            The response status code
+        duration: float
+            The time taken to process the request, in seconds
+        """
+        token = "{id}_token".format(id=self.config.id)
+        kept = self.config.capture_values or ()
+        values = {"args": {}, "form": {}}
+        redacted = {"args": {}, "form": {}}
+        for name, source in (("args", raw.args), ("form", raw.form)):
+            for key, elements in source.lists():
+                if key == token:
+                    continue
+                if key in kept or "*" in kept:
+                    values[name][key] = elements
+                else:
+                    redacted[name][key] = [len(element) for element in elements]
+        line = minified_encoder.encode({
+            "time": time.time() - duration,
+            "duration": duration,
+            "method": str(raw.method).upper(),
+            "endpoint": endpoint,
+            "path": raw.path,
+            "dynamics": dict(dynamics or {}),
+            "args": values["args"],
+            "form": values["form"],
+            "redacted": redacted,
+            "headers": sorted({name.lower() for name in raw.headers.keys()}),
+            "cookies": sorted(raw.cookies.keys()),
+            "size": raw.content_length or 0,
+            "status": status
+        }) + "\n"
+        self.writer.write(file=line)
+
+
+def read(path: typing.Union[pathlib.Path, str]) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    Reads the requests captured in the given file, sorted by time
+
+    Parameters
+    ----------
+    path: pathlib.Path | str
+        The capture file
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The captured requests (the malformed lines are skipped)
+    """
+    results = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                results.append(json.loads(line))
+            except ValueError:  # a partially written line
+                continue
+    results.sort(key=lambda element: element.get("time", 0))
+    return results
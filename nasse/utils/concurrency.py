@@ -0,0 +1,56 @@
+"""
+Helpers to share state between the threads serving the requests, with or without the GIL
+"""
+import itertools
+import sys
+import threading
+import typing
+
+
+def gil_enabled() -> bool:
+    """
+    Returns whether the GIL is enabled
+
+    On free-threaded builds of Python (PEP 703, "python3.13t"), the GIL is disabled
+    unless an extension module requires it or `PYTHON_GIL=1` is set.
+    """
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else is_enabled()
+
+
+class Counter:
+    """
+    A counter which can be incremented from multiple threads, each `next` call returning a different number
+
+    `next` on an `itertools.count` is atomic when the GIL is enabled,
+    but it is not guaranteed to be on free-threaded builds, where a lock is used instead.
+    """
+    __slots__ = ("_next",)
+
+    def __init__(self, start: int = 0) -> None:
+        """
+        Parameters
+        ----------
+        start: int, default = 0
+            The first number returned
+        """
+        count = itertools.count(start)
+        if gil_enabled():
+            self._next: typing.Callable[[], int] = count.__next__
+        else:
+            lock = threading.Lock()
+
+            def locked() -> int:
+                with lock:
+                    return next(count)
+
+            self._next = locked
+
+    def __repr__(self) -> str:
+        return "Counter()"
+
+    def __iter__(self) -> "Counter":
+        return self
+
+    def __next__(self) -> int:
+        return self._next()
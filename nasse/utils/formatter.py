@@ -8,9 +8,12 @@ Animenosekai
 """
 import datetime
 import enum
-import inspect
+import functools
 import os
+import sys
 import threading
+import time as _time
+import types
 import typing
 from string import Formatter
 
@@ -30,6 +33,23 @@ class Colors(enum.Enum):
     MAGENTA = '\033[95m'
 
 
+# code object -> (module name, if `self` is a local, function name)
+_callers: typing.Dict[types.CodeType, typing.Tuple[typing.Optional[str], bool, typing.Optional[str]]] = {}
+_CALLERS_CACHE_SIZE = 4096
+
+
+def _caller_info(code: types.CodeType, f_globals: dict) -> typing.Tuple[typing.Optional[str], bool, typing.Optional[str]]:
+    """Computes the static part of a caller name for the given code object"""
+    module = f_globals.get("__name__", None)
+    has_self = "self" in code.co_varnames or "self" in code.co_cellvars or "self" in code.co_freevars
+    codename = code.co_name if code.co_name != "<module>" else None  # top level usually
+    if len(_callers) >= _CALLERS_CACHE_SIZE:
+        # dynamically created code objects should not grow the cache forever
+        _callers.clear()
+    result = _callers[code] = (module, has_self, codename)
+    return result
+
+
 def caller_name(skip: int = 2):
     """
     Get a name of a caller in the format module.class.method
@@ -45,21 +65,27 @@ def caller_name(skip: int = 2):
     ----------
     skip: int, default = 2
     """
-    stack = inspect.stack()
-    start = 0 + skip
-    if len(stack) < start + 1:
+    try:
+        parentframe = sys._getframe(skip)  # pylint: disable=protected-access
+    except ValueError:  # the stack is not deep enough
         return ''
-    parentframe = stack[start][0]
+    code = parentframe.f_code
+    try:
+        module, has_self, codename = _callers[code]
+    except KeyError:
+        module, has_self, codename = _caller_info(code, parentframe.f_globals)
     name = []
-    module = inspect.getmodule(parentframe)
     if module:
-        name.append(module.__name__)
-    if 'self' in parentframe.f_locals:
-        name.append(parentframe.f_locals['self'].__class__.__name__)
-    codename = parentframe.f_code.co_name
-    if codename != '<module>':  # top level usually
+        name.append(module)
+    if has_self:
+        # the class depends on the instance, not only on the code
+        try:
+            name.append(parentframe.f_locals["self"].__class__.__name__)
+        except KeyError:  # `self` is not bound yet
+            pass
+    if codename:
         name.append(codename)  # function or a method
-    del parentframe, stack
+    del parentframe
     return ".".join(name)
 
 
@@ -95,6 +121,239 @@ class SilentFormatter(Formatter):
             except KeyError:
                 return Unformatted(key)
 
+COLORS = {
+    "normal": Colors.NORMAL.value,
+    "grey": Colors.GREY.value,
+    "gray": Colors.GREY.value,
+    "red": Colors.RED.value,
+    "green": Colors.GREEN.value,
+    "blue": Colors.BLUE.value,
+    "cyan": Colors.CYAN.value,
+    "turquoise": Colors.CYAN.value,
+    "white": Colors.WHITE.value,
+    "yellow": Colors.YELLOW.value,
+    "purple": Colors.MAGENTA.value,
+    "pink": Colors.MAGENTA.value,
+    "magenta": Colors.MAGENTA.value
+}
+"""The color names available in the templates"""
+
+CONFIG_FIELDS = {
+    "name": lambda config: config.name,
+    "app": lambda config: config.name,
+    "id": lambda config: config.id,
+    "host": lambda config: config.host,
+    "port": lambda config: config.port,
+    "debug": lambda config: config.debug,
+    "version": lambda config: __version__,
+    "base_dir": lambda config: config.base_dir
+}
+"""The fields filled from the configuration, looked up when rendering"""
+
+_SILENT_FORMATTER = SilentFormatter()
+
+
+class _Values(dict):
+    """The fields values, leaving the unknown fields as is"""
+
+    def __missing__(self, key):
+        return Unformatted(key)
+
+
+def remove_colors(string: str) -> str:
+    """Removes the ANSI colors from the given string"""
+    if "\033" not in string:
+        return string
+    for element in Colors:
+        string = string.replace(element.value, "")
+    return string
+
+
+class Field:
+    """A replacement field of a compiled template"""
+
+    __slots__ = ("name", "key", "spec", "conversion")
+
+    def __init__(self, name: typing.Union[str, int], spec: str = "", conversion: typing.Optional[str] = None) -> None:
+        self.name = name
+        # the first part of `name.attribute` or `name[index]`
+        self.key = name if isinstance(name, int) else name.partition(".")[0].partition("[")[0]
+        if isinstance(self.key, str) and self.key.isdigit():
+            # `{0.real}` or `{0[1]}`, a positional argument
+            self.key = int(self.key)
+        self.spec = spec
+        self.conversion = conversion
+
+    def render(self, value: typing.Any) -> str:
+        """Formats the given value for the field"""
+        if self.conversion == "r":
+            value = repr(value)
+        elif self.conversion == "s":
+            value = str(value)
+        elif self.conversion == "a":
+            value = ascii(value)
+        return value.__format__(self.spec)
+
+
+class Template:
+    """
+    A string template parsed once
+
+    The static parts (and the colors) are pre-rendered, with a colored and an uncolored variant,
+    so that rendering only looks up the replacement fields and joins the parts.
+
+    Example
+    -------
+    >>> template = Template("{grey}{time} | {normal}[{level}] ({app}) {message}")
+    >>> template.render(config=config, level="INFO", message="Hello")
+    '\x1b[90m2023/01/01, 12:00:00 | \x1b[0m[INFO] (Nasse) Hello'
+    >>> template.render(config=config, colored=False, level="INFO", message="Hello")
+    '2023/01/01, 12:00:00 | [INFO] (Nasse) Hello'
+    """
+
+    def __init__(self, string: str, time_format: typing.Union[str, typing.Callable[[datetime.datetime], typing.Any]] = "%Y/%m/%d, %H:%M:%S") -> None:
+        self.string = str(string)
+        self.time_format = time_format
+        # caching the formatted time for the current second (not for sub-second or custom formats)
+        self._cache_time = isinstance(time_format, str) and "%f" not in time_format
+        self._time: typing.Tuple[int, str] = (-1, "")
+
+        colored: typing.List[typing.Union[str, Field]] = []
+        uncolored: typing.List[typing.Union[str, Field]] = []
+        automatic = 0
+        for literal, name, spec, conversion in Formatter().parse(self.string):
+            if literal:
+                colored.append(literal)
+                uncolored.append(literal)
+            if name is None:
+                continue
+            if name == "":
+                name = automatic
+                automatic += 1
+            elif name.isdigit():
+                name = int(name)
+            if name in COLORS and not spec and not conversion:
+                colored.append(COLORS[name])
+                continue
+            field = Field(name, spec or "", conversion)
+            colored.append(field)
+            uncolored.append(field)
+
+        self.colored = self._merge(colored)
+        self.uncolored = self._merge(uncolored)
+        self.fields = {part.key for part in self.colored if isinstance(part, Field)}
+        # without positional fields, the template can be rendered with `str.format_map`
+        self.positional = any(isinstance(key, int) for key in self.fields)
+        self._colored_format = self._format_string(self.colored)
+        self._uncolored_format = self._format_string(self.uncolored)
+
+    def __repr__(self) -> str:
+        return "Template({string!r})".format(string=self.string)
+
+    @staticmethod
+    def _merge(parts: typing.List[typing.Union[str, Field]]) -> typing.Tuple[typing.Union[str, Field], ...]:
+        """Internal function to merge the consecutive static parts"""
+        results = []
+        for part in parts:
+            if isinstance(part, str) and results and isinstance(results[-1], str):
+                results[-1] += part
+            else:
+                results.append(part)
+        return tuple(results)
+
+    @staticmethod
+    def _format_string(parts: typing.Tuple[typing.Union[str, Field], ...]) -> str:
+        """Internal function to build the `str.format` string equivalent to the given parts"""
+        results = []
+        for part in parts:
+            if isinstance(part, str):
+                results.append(part.replace("{", "{{").replace("}", "}}"))
+            else:
+                results.append("{" + str(part.name)
+                               + ("!" + part.conversion if part.conversion else "")
+                               + (":" + part.spec if part.spec else "") + "}")
+        return "".join(results)
+
+    def time(self) -> str:
+        """Returns the formatted current time"""
+        if not self._cache_time:
+            now = datetime.datetime.now()
+            return self.time_format(now) if callable(self.time_format) else now.strftime(self.time_format)
+        second = int(_time.time())
+        cached_second, result = self._time
+        if cached_second != second:
+            result = datetime.datetime.fromtimestamp(second).strftime(self.time_format)
+            self._time = (second, result)
+        return result
+
+    def render(self, *args, config: "NasseConfig" = None, colored: bool = True, _depth: int = 0, **kwargs) -> str:
+        """
+        Renders the template
+
+        Parameters
+        ----------
+        *args
+            The positional fields values
+        config: NasseConfig, default = None
+            The configuration used to fill the config fields (name, host, port, etc.)
+        colored: bool, default = True
+            If the colors should be kept
+        **kwargs
+            The fields values
+        """
+        values = _Values(kwargs)
+        for key in self.fields:
+            if key in kwargs or isinstance(key, int):
+                continue
+            if key == "time":  # current time
+                values["time"] = self.time()
+            elif key == "caller":  # caller function
+                values["caller"] = caller_name(skip=2 + _depth)
+            elif key == "thread":  # thread id
+                values["thread"] = threading.get_ident()
+            elif key == "pid":  # process id
+                values["pid"] = os.getpid()
+            elif key == "cwd":  # current working directory
+                values["cwd"] = os.getcwd()
+            elif config and key in CONFIG_FIELDS:
+                values[key] = CONFIG_FIELDS[key](config)
+            elif key in COLORS:
+                values[key] = COLORS[key] if colored else ""
+
+        if not self.positional:
+            return (self._colored_format if colored else self._uncolored_format).format_map(values)
+
+        results = []
+        for part in (self.colored if colored else self.uncolored):
+            if part.__class__ is str:
+                results.append(part)
+                continue
+            try:
+                if part.name == part.key:
+                    value = args[part.key] if isinstance(part.key, int) else values[part.key]
+                else:
+                    value = _SILENT_FORMATTER.get_field(part.name, args, values)[0]
+            except (KeyError, IndexError):
+                value = Unformatted(part.name)
+            results.append(part.render(value))
+        return "".join(results)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile(string: str, time_format: typing.Union[str, typing.Callable[[datetime.datetime], typing.Any]] = "%Y/%m/%d, %H:%M:%S") -> Template:
+    """
+    Parses the given string into a `Template`
+
+    The compiled templates are cached.
+
+    Parameters
+    ----------
+    string: str
+    time_format: typing.Union[str, typing.Callable[[datetime.datetime], typing.Any]], default = "%Y/%m/%d %H: %M:%S"
+    """
+    return Template(string, time_format=time_format)
+
+
 # pylint: disable=redefined-builtin
 
 
@@ -109,48 +368,7 @@ def format(string: str, time_format: typing.Union[str, typing.Callable[[datetime
     config: NasseConfig, default = None
     level: str, default = None
     """
-    formatting = {
-        # colors
-        "normal": Colors.NORMAL.value,
-        "grey": Colors.GREY.value,
-        "gray": Colors.GREY.value,
-        "red": Colors.RED.value,
-        "green": Colors.GREEN.value,
-        "blue": Colors.BLUE.value,
-        "cyan": Colors.CYAN.value,
-        "turquoise": Colors.CYAN.value,
-        "white": Colors.WHITE.value,
-        "yellow": Colors.YELLOW.value,
-        "purple": Colors.MAGENTA.value,
-        "pink": Colors.MAGENTA.value,
-        "magenta": Colors.MAGENTA.value
-    }
-    if config:
-        formatting.update({
-            "name": config.name,
-            "app": config.name,
-            "id": config.id,
-            "host": config.host,
-            "port": config.port,
-            "debug": config.debug,
-            "version": __version__,
-            "base_dir": config.base_dir
-        })
-    time = datetime.datetime.now()
-    if "{time}" in string:  # current time
-        formatting["time"] = time_format(time) if callable(time_format) else time.strftime(time_format)
-    if "{caller}" in string:  # caller function
-        formatting["caller"] = caller_name()
-    if "{thread}" in string:  # thread id
-        formatting["thread"] = threading.get_ident()
-    if "{pid}" in string:  # process id
-        formatting["pid"] = os.getpid()
-    if "{cwd}" in string:  # current working directory
-        formatting["cwd"] = os.getcwd()
-
-    # Might optionally add stuff from psutil
-
-    return SilentFormatter().format(string, *args, **{
-        **formatting,
-        **kwargs
-    })
+    string = str(string)
+    if "{" not in string and "}" not in string:
+        return string
+    return compile(string, time_format).render(*args, config=config, _depth=1, **kwargs)
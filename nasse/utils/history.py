@@ -0,0 +1,163 @@
+"""
+An in-memory history of the recent requests
+"""
+import array
+import threading
+import time
+import typing
+
+from nasse.utils.concurrency import Counter
+
+
+class RequestHistory:
+    """
+    A fixed-size ring buffer keeping a summary of the most recent requests
+
+    The summaries are stored column by column in preallocated arrays,
+    the endpoints, methods and errors being stored as indexes into an interning table,
+    so that recording a request does not allocate any new object.
+
+    Note: Under heavy concurrency, a summary being overwritten while it is read might be reported half-updated.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Parameters
+        ----------
+        size: int
+            The number of requests to keep
+        """
+        self.size = max(int(size), 1)
+        # 0 means that the slot is empty, otherwise the position of the request + 1
+        self.sequences = array.array("q", bytes(8 * self.size))
+        self.times = array.array("d", bytes(8 * self.size))
+        self.durations = array.array("d", bytes(8 * self.size))
+        self.statuses = array.array("H", bytes(2 * self.size))
+        # -1 when the size is not known
+        self.sizes = array.array("q", bytes(8 * self.size))
+        self.endpoints = array.array("I", bytes(4 * self.size))
+        self.methods = array.array("I", bytes(4 * self.size))
+        self.errors = array.array("I", bytes(4 * self.size))
+        # not interned, the number of clients is not bounded
+        self.ips: typing.List[typing.Optional[str]] = [None] * self.size
+
+        self._strings: typing.List[typing.Optional[str]] = [None]
+        self._indexes: typing.Dict[typing.Optional[str], int] = {None: 0}
+        self._lock = threading.Lock()
+        self._counter = Counter()
+
+    def __repr__(self) -> str:
+        return "RequestHistory({count}/{size})".format(count=len(self), size=self.size)
+
+    def __len__(self) -> int:
+        return sum(1 for sequence in self.sequences if sequence)
+
+    def _intern(self, value: typing.Optional[str]) -> int:
+        """Internal method returning the index of the given string in the interning table"""
+        try:
+            return self._indexes[value]
+        except KeyError:
+            with self._lock:
+                index = self._indexes.get(value, None)
+                if index is None:
+                    index = len(self._strings)
+                    self._strings.append(value)
+                    self._indexes[value] = index
+                return index
+
+    def record(self,
+               endpoint: str,
+               method: str,
+               status: int,
+               duration: float,
+               size: typing.Optional[int] = None,
+               ip: typing.Optional[str] = None,
+               error: typing.Optional[str] = None) -> None:
+        """
+        Records a request
+
+        Parameters
+        ----------
+        endpoint: str
+            The endpoint path
+        method: str
+            The HTTP method
+        status: int
+            The response status code
+        duration: float
+            The time taken to process the request, in seconds
+        size: int, optional
+            The number of bytes sent
+        ip: str, optional
+            The client IP address
+        error: str, optional
+            The error name, if any
+        """
+        position = next(self._counter)
+        slot = position % self.size
+        self.sequences[slot] = 0
+        self.times[slot] = time.time()
+        self.durations[slot] = duration
+        self.statuses[slot] = min(max(int(status), 0), 65535)
+        self.sizes[slot] = -1 if size is None else size
+        self.endpoints[slot] = self._intern(endpoint)
+        self.methods[slot] = self._intern(method)
+        self.errors[slot] = self._intern(error)
+        self.ips[slot] = ip
+        self.sequences[slot] = position + 1
+
+    def summary(self, slot: int) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the summary stored at the given slot
+
+        Parameters
+        ----------
+        slot: int
+            The position in the ring buffer
+        """
+        size = self.sizes[slot]
+        return {
+            "id": self.sequences[slot],
+            "time": self.times[slot],
+            "duration": self.durations[slot],
+            "status": self.statuses[slot],
+            "size": None if size < 0 else size,
+            "endpoint": self._strings[self.endpoints[slot]],
+            "method": self._strings[self.methods[slot]],
+            "error": self._strings[self.errors[slot]],
+            "ip": self.ips[slot]
+        }
+
+    def query(self,
+              endpoint: typing.Optional[str] = None,
+              errors: bool = False,
+              slowest: bool = False,
+              limit: typing.Optional[int] = 100) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Returns the recorded requests, the most recent first
+
+        Parameters
+        ----------
+        endpoint: str, optional
+            Only returns the requests to this endpoint
+        errors: bool, default = False
+            Only returns the failed requests (an error or a status code >= 400)
+        slowest: bool, default = False
+            Sorts the requests by duration, the slowest first
+        limit: int, optional, default = 100
+            The maximum number of requests to return
+        """
+        endpoint_index = self._indexes.get(endpoint, -1) if endpoint is not None else None
+        if endpoint_index == -1:  # never recorded
+            return []
+
+        slots = [slot for slot in range(self.size) if self.sequences[slot]
+                 and (endpoint_index is None or self.endpoints[slot] == endpoint_index)
+                 and (not errors or self.errors[slot] or self.statuses[slot] >= 400)]
+        if slowest:
+            slots.sort(key=self.durations.__getitem__, reverse=True)
+        else:
+            slots.sort(key=self.sequences.__getitem__, reverse=True)
+        if limit is not None:
+            slots = slots[:max(int(limit), 0)]
+        return [self.summary(slot) for slot in slots]
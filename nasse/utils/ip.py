@@ -4,19 +4,21 @@ A utility to retrieve the IP address of the client
 import flask
 
 
-def get_ip():
+def get_ip(request=None):
     """
-    Retrieves the client IP address from the current request
+    Retrieves the client IP address from the given request (defaults to the current request)
     """
+    if request is None:
+        request = flask.request
     # if the server uses a proxy
-    if "HTTP_X_FORWARDED_FOR" in flask.request.environ:
-        x_forwarded_for = str(flask.request.environ['HTTP_X_FORWARDED_FOR']).split(',')[0]
+    if "HTTP_X_FORWARDED_FOR" in request.environ:
+        x_forwarded_for = str(request.environ['HTTP_X_FORWARDED_FOR']).split(',')[0]
         try:
             if x_forwarded_for.replace('.', '').isdigit():
                 return x_forwarded_for
             else:
-                return flask.request.remote_addr
+                return request.remote_addr
         except Exception:
-            return flask.request.remote_addr
+            return request.remote_addr
     else:
-        return flask.request.remote_addr
+        return request.remote_addr
@@ -234,7 +234,9 @@ class NasseJSONEncoder(json.JSONEncoder):
                     pass
 
         def _iterencode(o, _current_indent_level):
-            o = _default(o)
+            if o is not None and not isinstance(o, (str, int, float, list, tuple, dict)):
+                # primitives are encoded as is, `default` would turn them into strings
+                o = _default(o)
             if isinstance(o, str):
                 yield _encoder(o)
             elif o is None:
@@ -277,7 +279,7 @@ class NasseJSONEncoder(json.JSONEncoder):
     def encode_iterable(self, a: typing.Iterable):
         return list(a)
 
-    def iterencode(self, o, _one_shot=False):
+    def iterencode(self, o, _one_shot=False, _current_indent_level=0):
         """Encode the given object and yield each string
         representation as available.
 
@@ -286,6 +288,8 @@ class NasseJSONEncoder(json.JSONEncoder):
             for chunk in JSONEncoder().iterencode(bigobject):
                 mysocket.write(chunk)
 
+        `_current_indent_level` can be used to encode an object
+        which will be nested inside another one.
         """
         if self.check_circular:
             markers = {}
@@ -321,7 +325,7 @@ class NasseJSONEncoder(json.JSONEncoder):
         return self._make_iterencode(
             markers, self.default, _encoder, self.indent, floatstr,
             self.key_separator, self.item_separator, self.sort_keys,
-            self.skipkeys, _one_shot)(o, 0)
+            self.skipkeys, _one_shot)(o, _current_indent_level)
 
     def default(self, o: typing.Any) -> typing.Any:
         if dataclasses.is_dataclass(o):
@@ -342,9 +346,72 @@ class NasseJSONEncoder(json.JSONEncoder):
             return PYTHON_DEFAULT_DECODER(o)
         except TypeError:
             pass
-        utils.logging.logger.debug("Object of type <{type}> will be converted to str while encoding to JSON".format(type=o.__class__.__name__))
+        utils.logging.get_logger().debug("Object of type <{type}> will be converted to str while encoding to JSON".format(type=o.__class__.__name__))
         return str(o)
 
 
 encoder = NasseJSONEncoder(ensure_ascii=False, indent=4)
 minified_encoder = NasseJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+ENVELOPE_KEYS = (("success", "error", "message", "data"), ("success", "error", "message", "data", "debug"))
+_envelopes = {}
+
+
+def _envelope(success: bool, minify: bool) -> typing.Tuple[str, str, str, str, str]:
+    """Internal function returning the pre-encoded parts of the response envelope"""
+    try:
+        return _envelopes[(success, minify)]
+    except KeyError:
+        pass
+    current = minified_encoder if minify else encoder
+    newline = "" if current.indent is None else "\n" + " " * current.indent
+
+    def key(name: str, first: bool = False) -> str:
+        return ("" if first else current.item_separator) + newline + current.encode(name) + current.key_separator
+
+    parts = ("{" + key("success", first=True) + ("true" if success else "false") + key("error"),
+             key("message"),
+             key("data"),
+             key("debug"),
+             ("" if current.indent is None else "\n") + "}")
+    _envelopes[(success, minify)] = parts
+    return parts
+
+
+def _encode_scalar(current: NasseJSONEncoder, value: typing.Any) -> str:
+    """Internal function to encode the envelope's `error` and `message` without building a new encoder"""
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return json.encoder.encode_basestring_ascii(value) if current.ensure_ascii else json.encoder.encode_basestring(value)
+    # nested in the envelope, like `data`
+    return "".join(current.iterencode(value, _current_indent_level=1))
+
+
+def encode_response(result: dict, minify: bool = False) -> str:
+    """
+    Encodes a response envelope (`{"success", "error", "message", "data"}`, and optionally `"debug"`)
+
+    The envelope is encoded once and the encoded values are spliced into it,
+    which gives the same result as `encoder.encode(result)` without walking the envelope.
+
+    Parameters
+    ----------
+    result: dict
+        The response envelope
+    minify: bool, default = False
+        If the result should be minified
+    """
+    current = minified_encoder if minify else encoder
+    if tuple(result) not in ENVELOPE_KEYS or not isinstance(result["success"], bool):
+        return current.encode(result)
+
+    start, message_key, data_key, debug_key, end = _envelope(result["success"], minify)
+    chunks = [start, _encode_scalar(current, result["error"]), message_key, _encode_scalar(current, result["message"]), data_key]
+    chunks.extend(current.iterencode(result["data"], _current_indent_level=1))
+    if "debug" in result:
+        chunks.append(debug_key)
+        chunks.extend(current.iterencode(result["debug"], _current_indent_level=1))
+    chunks.append(end)
+    return "".join(chunks)
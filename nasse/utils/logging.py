@@ -6,13 +6,19 @@ Copyright
 Animenosekai
     Original author, MIT License
 """
+import atexit
+import contextvars
 import dataclasses
 import datetime
 import enum
 import linecache
+import pathlib
+import queue
+import sys
+import threading
+import time
 import typing
 
-import rich.console
 from nasse.utils import formatter
 
 
@@ -40,6 +46,345 @@ class Record:
     msg: str
 
 
+def _timestamp(time: datetime.datetime) -> int:
+    """The time format used in the log file"""
+    return int(time.timestamp())
+
+
+class LogWriter:
+    """
+    Writes the log lines to the console and to the log file
+
+    The log file is kept open and rotated when it gets bigger than `config.log_file_max_size`.
+
+    With `config.async_logging`, the lines are put in a bounded queue, drained
+    by a background thread which writes them by batches.
+    When the queue is full, the lines are either dropped (`config.log_queue_policy = "drop"`, the default)
+    or the logging thread waits for some space (`"block"`).
+    The remaining lines are flushed when the program exits.
+
+    Once closed, the writer ignores the lines it is given.
+    """
+
+    BATCH_SIZE = 512
+    """The maximum number of lines written at once by the background thread"""
+
+    def __init__(self, config: "config.NasseConfig", path: typing.Optional[pathlib.Path] = None) -> None:
+        """
+        Parameters
+        ----------
+        config: NasseConfig
+            The configuration, holding the log file and the queue settings
+        path: pathlib.Path, optional
+            The file to write to instead of `config.log_file`
+        """
+        self.config = config
+        self.path = path
+        self.dropped = 0
+        self.closed = False
+        self._lock = threading.RLock()
+        self._dropped_lock = threading.Lock()
+        self._file = None
+        self._file_path = None
+        self._queue: typing.Optional[queue.Queue] = None
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def write(self, console: typing.Optional[str] = None, file: typing.Optional[str] = None) -> None:
+        """
+        Writes the given lines
+
+        Parameters
+        ----------
+        console: str, optional
+            The text to write to the console
+        file: str, optional
+            The text to write to the log file
+        """
+        if self.closed:
+            return
+        if not self.config.async_logging:
+            with self._lock:
+                if not self.closed:
+                    self._write_batch([(console, file)])
+            return
+
+        if self._thread is None:
+            self._start()
+        lines = self._queue
+        if lines is None:  # closed in the meantime
+            return
+        try:
+            if str(self.config.log_queue_policy).lower() == "block":
+                lines.put((console, file))
+            else:
+                lines.put_nowait((console, file))
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def flush(self) -> None:
+        """Waits for all of the queued lines to be written"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        """Flushes the remaining lines, stops the background thread and closes the log file"""
+        self.closed = True
+        if self._thread is not None:
+            if self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+            atexit.unregister(self.close)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _start(self) -> None:
+        """Internal method starting the background thread"""
+        with self._lock:
+            if self._thread is not None or self.closed:
+                return
+            self._queue = queue.Queue(maxsize=max(int(self.config.log_queue_size or 0), 0))
+            self._thread = threading.Thread(target=self._run, name="nasse-log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        """Internal method draining the queue"""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = None in batch
+            try:
+                with self._lock:
+                    self._write_batch([item for item in batch if item is not None])
+            except Exception:  # the logging thread should never die
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _open(self) -> typing.Optional[typing.TextIO]:
+        """Internal method returning the log file, opening it if needed"""
+        path = self.path if self.path is not None else self.config.log_file
+        if not path:
+            return None
+        path = pathlib.Path(path)
+        if self._file is not None and self._file_path == path:
+            return self._file
+        if self._file is not None:
+            self._file.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._file_path = path
+        return self._file
+
+    def _rotate(self) -> None:
+        """Internal method rotating the log file: log -> log.1 -> log.2 -> ..."""
+        self._file.close()
+        self._file = None
+        backups = max(int(self.config.log_file_backups or 0), 0)
+        path = self._file_path
+        if backups <= 0:
+            path.unlink()
+            return
+        for index in range(backups - 1, 0, -1):
+            source = path.with_name("{name}.{index}".format(name=path.name, index=index))
+            if source.exists():
+                source.replace(path.with_name("{name}.{index}".format(name=path.name, index=index + 1)))
+        path.replace(path.with_name("{name}.1".format(name=path.name)))
+
+    def _write_batch(self, batch: typing.List[typing.Tuple[typing.Optional[str], typing.Optional[str]]]) -> None:
+        """Internal method writing the given lines (the lock should be held)"""
+        console = "".join(item[0] for item in batch if item[0] is not None)
+        file = "".join(item[1] for item in batch if item[1] is not None)
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            notice = "{count} log lines were dropped because the logging queue was full\n".format(count=dropped)
+            console = notice + console
+            file = notice + file if file else file
+        if console:
+            sys.stdout.write(console)
+            sys.stdout.flush()
+        if file:
+            handle = self._open()
+            if handle is not None:
+                handle.write(file)
+                handle.flush()
+                max_size = self.config.log_file_max_size
+                if max_size and handle.tell() >= max_size:
+                    self._rotate()
+
+
+class ExceptionReporter:
+    """
+    Reports the exceptions without flooding the console
+
+    Each exception is fingerprinted (its type and the code locations of its traceback)
+    and only the first occurrence of a fingerprint is fully rendered during
+    `config.exception_report_window` seconds. The following occurrences are counted
+    and a summary is logged once the window is over, by a timer (so that it does not wait for
+    another request) or when the reporter is closed.
+    """
+
+    def __init__(self, logger: "Logger") -> None:
+        """
+        Parameters
+        ----------
+        logger: Logger
+            The logger to report the exceptions to
+        """
+        self.logger = logger
+        # fingerprint -> [window start, repeats, description]
+        self._seen: typing.Dict[tuple, list] = {}
+        self._next_check = 0
+        self._lock = threading.Lock()
+        self._timer: typing.Optional[threading.Timer] = None
+        self._closed = False
+
+    @staticmethod
+    def fingerprint(exception: BaseException) -> tuple:
+        """
+        Returns the fingerprint of the given exception
+
+        Parameters
+        ----------
+        exception: BaseException
+            The exception
+        """
+        locations = []
+        traceback = exception.__traceback__
+        while traceback is not None:
+            locations.append((traceback.tb_frame.f_code, traceback.tb_lineno))
+            traceback = traceback.tb_next
+        return (exception.__class__, tuple(locations))
+
+    @staticmethod
+    def describe(exception: BaseException) -> str:
+        """Returns a short description of where the exception got raised"""
+        traceback = exception.__traceback__
+        if traceback is None:
+            return exception.__class__.__name__
+        while traceback.tb_next is not None:
+            traceback = traceback.tb_next
+        code = traceback.tb_frame.f_code
+        return "{name} in {function} ({file}:{line})".format(name=exception.__class__.__name__,
+                                                             function=code.co_name,
+                                                             file=code.co_filename,
+                                                             line=traceback.tb_lineno)
+
+    def report(self, show_locals: bool = False, **kwargs) -> bool:
+        """
+        Reports the exception currently being handled
+
+        Parameters
+        ----------
+        show_locals: bool, default = False
+            When enabled, shows the local variables to the console
+
+        Returns
+        -------
+        bool
+            If the exception got fully rendered
+        """
+        exception = sys.exc_info()[1]
+        window = self.logger.config.exception_report_window
+        if exception is None or not window:
+            self.logger.print_exception(show_locals=show_locals, **kwargs)
+            return True
+
+        fingerprint = self.fingerprint(exception)
+        now = time.monotonic()
+        self.summarize(now=now)
+        with self._lock:
+            entry = self._seen.get(fingerprint, None)
+            if entry is None:
+                self._seen[fingerprint] = [now, 0, self.describe(exception)]
+                self._next_check = min(self._next_check, now + window)
+            else:
+                entry[1] += 1
+        if entry is not None:
+            return False
+        self.logger.print_exception(show_locals=show_locals, **kwargs)
+        with self._lock:
+            # once printed, for the exit handler to run before the log writer gets closed
+            self._schedule(window)
+        return True
+
+    def summarize(self, force: bool = False, now: typing.Optional[float] = None) -> None:
+        """
+        Logs a summary of the repeated exceptions whose window is over
+
+        Parameters
+        ----------
+        force: bool, default = False
+            Summarizes all of the exceptions, even if their window is not over
+        now: float, optional
+            The current `time.monotonic()` value
+        """
+        now = time.monotonic() if now is None else now
+        if not force and now < self._next_check:
+            return
+        window = self.logger.config.exception_report_window or 0
+        summaries = []
+        with self._lock:
+            self._next_check = now + window
+            for fingerprint, (start, repeats, description) in list(self._seen.items()):
+                if force or now - start >= window:
+                    del self._seen[fingerprint]
+                    if repeats:
+                        summaries.append((description, repeats, now - start))
+                else:
+                    self._next_check = min(self._next_check, start + window)
+        for description, repeats, duration in summaries:
+            self.logger.warn("{description} occurred {repeats} more time(s) in the last {duration:.0f}s"
+                             .format(description=description, repeats=repeats, duration=duration))
+
+    def close(self) -> None:
+        """Stops the timer and logs the summary of all of the pending repeated exceptions"""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        atexit.unregister(self.close)
+        self.summarize(force=True)
+
+    def _schedule(self, delay: float) -> None:
+        """Internal method starting the timer summarizing the exceptions, if not already running (the lock should be held)"""
+        if self._timer is not None or self._closed:
+            return
+        # summarizing the remaining exceptions when exiting (only registered once)
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+        self._timer = threading.Timer(max(delay, 0.01), self._run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run(self) -> None:
+        """Internal method called by the timer"""
+        with self._lock:
+            self._timer = None
+        self.summarize()
+        with self._lock:
+            if self._seen:
+                window = self.logger.config.exception_report_window or 0
+                start = min(entry[0] for entry in self._seen.values())
+                self._schedule(start + window - time.monotonic())
+
+
 class Logger:
     """
     A Nasse logging object, the logger used thoughout your app
@@ -62,6 +407,7 @@ class Logger:
     }
 
     def __init__(self, config: "config.NasseConfig" = None) -> None:
+        self.writer = LogWriter(config)
         self.config = config
         if not self.config:
             from nasse.config import NasseConfig
@@ -71,19 +417,51 @@ class Logger:
                     return
 
             self.config = NewConfig()
-        self.recording = False
-        self.record = []
+        # per context (thread, request, etc.), the logger being shared by all of the requests
+        self._recording = contextvars.ContextVar("nasse_logger_recording", default=False)
+        self._record = contextvars.ContextVar("nasse_logger_record", default=None)
+        self._tokens = contextvars.ContextVar("nasse_logger_tokens", default=())
+        self.reporter = ExceptionReporter(self)
 
-        self._rich_console = rich.console.Console()
+        self._rich_console = None
 
         if self.config.log_file:
-            self.config.log_file.parent.mkdir(parents=True, exist_ok=True)
-            self.config.log_file.touch(exist_ok=True)
-            with open(self.config.log_file, "a") as f:
-                WIDTH = 32
-                MESSAGE = "LOG START"
-                padding = WIDTH - len(MESSAGE) // 2
-                f.write(("=" * padding) + MESSAGE + ("=" * padding) + "\n")
+            WIDTH = 32
+            MESSAGE = "LOG START"
+            padding = WIDTH - len(MESSAGE) // 2
+            self.writer.write(file=("=" * padding) + MESSAGE + ("=" * padding) + "\n")
+
+    @property
+    def recording(self) -> bool:
+        """If the output is being recorded in the current context"""
+        return self._recording.get()
+
+    @recording.setter
+    def recording(self, value: bool) -> None:
+        self._recording.set(bool(value))
+
+    @property
+    def record(self) -> typing.List["Record"]:
+        """The output recorded in the current context"""
+        result = self._record.get()
+        if result is None:
+            result = []
+            self._record.set(result)
+        return result
+
+    @record.setter
+    def record(self, value: typing.List["Record"]) -> None:
+        self._record.set(value)
+
+    @property
+    def config(self) -> "config.NasseConfig":
+        """The configuration used by the logger"""
+        return self._config
+
+    @config.setter
+    def config(self, value: "config.NasseConfig") -> None:
+        self._config = value
+        self.writer.config = value
 
     def log(self, *msg,
             level: LoggingLevel = LoggingLevel.INFO,
@@ -95,18 +473,15 @@ class Logger:
         if level.value > self.config.logging_level.value:
             return
 
-        result = formatter.format(
-            str(sep).join(str(m) for m in msg),
-            time_format=self.TIME_FORMAT,
-            config=self.config,
-            level=level.name,
-            **kwargs
-        )
-
-        record_output = result
-        for element in formatter.Colors:
+        message = str(sep).join(str(m) for m in msg)
+        if "{" in message or "}" in message:
+            compiled = formatter.compile(message, self.TIME_FORMAT)
+            result = compiled.render(config=self.config, level=level.name, **kwargs)
             # removing the colors for any file or recording output
-            record_output = record_output.replace(element.value, "")
+            record_output = formatter.remove_colors(compiled.render(config=self.config, colored=False, level=level.name, **kwargs))
+        else:
+            result = message
+            record_output = formatter.remove_colors(message)
 
         if self.recording:
             self.record.append(Record(level=level, msg=record_output))
@@ -114,13 +489,19 @@ class Logger:
         if self.config.log_file:
             self.write_to_file(msg=record_output, level=level, **kwargs)
 
-        template = self.TEMPLATES.get(level, "{message}")
-        result = formatter.format(template, time_format=self.TIME_FORMAT, config=self.config, level=level.name, message=result, **kwargs)
+        template = formatter.compile(self.TEMPLATES.get(level, "{message}"), self.TIME_FORMAT)
+        result = template.render(config=self.config, level=level.name, message=result, **kwargs)
 
-        print(result, end=str(end))
+        self.writer.write(console=result + str(end))
 
     __call__ = log
 
+    def flush(self) -> None:
+        """
+        Waits for all of the pending log lines to be written
+        """
+        self.writer.flush()
+
     def write_to_file(self,
                       msg: str,
                       level: LoggingLevel = LoggingLevel.INFO,
@@ -131,14 +512,11 @@ class Logger:
         if not self.config.log_file:
             return
 
-        self.config.log_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.config.log_file, "a", encoding="utf-8") as f:
-            f.write(formatter.format("[{level}] ({name}) - {time} - {msg}\n",
-                                     time_format=lambda time: int(time.timestamp()),
-                                     level=level.name,
-                                     name=self.config.name,
-                                     msg=msg,
-                                     **kwargs))
+        template = formatter.compile("[{level}] ({name}) - {time} - {msg}\n", _timestamp)
+        self.writer.write(file=template.render(level=level.name,
+                                               name=self.config.name,
+                                               msg=msg,
+                                               **kwargs))
 
     def info(self, *msg, **kwargs):
         """
@@ -181,10 +559,13 @@ class Logger:
 
     def __enter__(self):
         """
-        Begins recording the output
+        Begins recording the output, in the current context only
+
+        The logger also becomes the one returned by `get_logger` in this context
         """
         self.recording = True
         self.record = []
+        self._tokens.set(self._tokens.get() + (_current.set(self),))
         return self
 
     def __exit__(self, type, value, traceback):
@@ -192,6 +573,13 @@ class Logger:
         Stops recording the output
         """
         self.recording = False
+        tokens = self._tokens.get()
+        if tokens:
+            self._tokens.set(tokens[:-1])
+            try:
+                _current.reset(tokens[-1])
+            except ValueError:  # created in another context
+                _current.set(None)
 
     def print_exception(self,
                         show_locals: bool = False,
@@ -204,13 +592,38 @@ class Logger:
         show_locals: bool, default = False
             When enabled, shows the local variables to the console
         """
+        # keeping the output in order
+        self.flush()
+        if self._rich_console is None:
+            # rich is only needed to render the exceptions
+            import rich.console
+            self._rich_console = rich.console.Console()
         self._rich_console.print_exception(show_locals=show_locals, **kwargs)
 
     exception = print_exception
 
+    def report_exception(self,
+                         show_locals: bool = False,
+                         **kwargs) -> bool:
+        """
+        Reports the latest exception, fully rendering it only if it did not
+        already occur recently (see `ExceptionReporter`)
+
+        Parameters
+        ----------
+        show_locals: bool, default = False
+            When enabled, shows the local variables to the console
 
-RECORDING = False
-CALL_STACK = []
+        Returns
+        -------
+        bool
+            If the exception got fully rendered
+        """
+        return self.reporter.report(show_locals=show_locals, **kwargs)
+
+
+# the calls recorded in the current context, if any
+_call_stack = contextvars.ContextVar("nasse_call_stack", default=None)
 
 
 class StackFrame:
@@ -260,32 +673,33 @@ class StackFrame:
 class CallStackRecorder:
     """
     A call stack recorder
+
+    Only the calls made in the context (thread, request, etc.) it got entered in are recorded
     """
 
+    def __init__(self) -> None:
+        self.recording = False
+        self.call_stack: typing.List[StackFrame] = []
+        self._token = None
+
     def __enter__(self):
         """
         Begins recording the calls
         """
-        global RECORDING
-        global CALL_STACK
-        RECORDING = True
-        CALL_STACK = []
+        self.call_stack = []
+        self._token = _call_stack.set(self.call_stack)
+        self.recording = True
         return self
 
-    @property
-    def recording(self):
-        return RECORDING
-
-    @property
-    def call_stack(self):
-        return CALL_STACK
-
     def __exit__(self, type, value, traceback):
         """
         Stops recording
         """
-        global RECORDING
-        RECORDING = False
+        self.recording = False
+        try:
+            _call_stack.reset(self._token)
+        except ValueError:  # entered in another context
+            _call_stack.set(None)
 
 
 def _generate_trace(config):
@@ -296,14 +710,27 @@ def _generate_trace(config):
         """
         Internal function to add a call to the call stack
         """
-        if RECORDING and event == "call" and frame.f_code.co_filename.startswith(str(config.base_dir)):
-            CALL_STACK.append(StackFrame(frame))
+        if event == "call":
+            call_stack = _call_stack.get()
+            if call_stack is not None and frame.f_code.co_filename.startswith(str(config.base_dir)):
+                call_stack.append(StackFrame(frame))
         return None
     return add_to_call_stack
 
 
 logger = Logger()
 
+# the logger of the request being processed in the current context
+_current = contextvars.ContextVar("nasse_current_logger", default=None)
+
+
+def get_logger() -> Logger:
+    """
+    Returns the logger of the request being processed in the current context,
+    or the logger of the last created app (`logger`) outside of any request
+    """
+    return _current.get() or logger
+
 
 def log(*msg,
         level: LoggingLevel = LoggingLevel.INFO,
@@ -312,7 +739,7 @@ def log(*msg,
     """
     Logging the given message to the console.
     """
-    logger.log(*msg, level=level, end=end, sep=sep, **kwargs)
+    get_logger().log(*msg, level=level, end=end, sep=sep, **kwargs)
 
 
 info = log
@@ -322,14 +749,14 @@ def debug(*msg, **kwargs) -> None:
     """
     Logs the given message with the `DEBUG` level
     """
-    logger.debug(*msg, **kwargs)
+    get_logger().debug(*msg, **kwargs)
 
 
 def warning(*msg, **kwargs) -> None:
     """
     Logs the given message with the `WARNING` level
     """
-    logger.warning(*msg, **kwargs)
+    get_logger().warning(*msg, **kwargs)
 
 
 warn = warning
@@ -339,7 +766,7 @@ def error(*msg, **kwargs) -> None:
     """
     Logs the given message with the `ERROR` level
     """
-    logger.error(*msg, **kwargs)
+    get_logger().error(*msg, **kwargs)
 
 
 def hidden(*msg, **kwargs) -> None:
@@ -348,7 +775,7 @@ def hidden(*msg, **kwargs) -> None:
 
     It only writes to the log file and the records
     """
-    logger.hidden(*msg, **kwargs)
+    get_logger().hidden(*msg, **kwargs)
 
 
 hide = hidden
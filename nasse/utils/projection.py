@@ -0,0 +1,177 @@
+"""
+Response fields projection (sparse fieldsets)
+
+Lets the clients ask for the fields they need using the `fields` request parameter.
+
+Example
+-------
+>>> parse("id,name,author(name,email),stats.views")
+{'id': None, 'name': None, 'author': {'name': None, 'email': None}, 'stats': {'views': None}}
+"""
+import dataclasses
+import typing
+
+from nasse import utils
+
+Projection = typing.Dict[str, typing.Optional["Projection"]]
+"""A parsed projection, mapping each requested field to its sub-projection (None to keep the whole value)"""
+
+
+def _merge(projection: Projection, names: typing.List[str], sub: typing.Optional[Projection]) -> None:
+    """Internal function to add the given path to the projection"""
+    for index, name in enumerate(names):
+        last = index == len(names) - 1
+        if name in projection and projection[name] is None:
+            # the whole value is already requested
+            return
+        if last and sub is None:
+            projection[name] = None
+            return
+        current = projection.setdefault(name, {})
+        if last:
+            for key, value in sub.items():
+                _merge(current, [key], value)
+            return
+        projection = current
+
+
+def _parse_group(text: str, index: int, nested: bool) -> typing.Tuple[Projection, int]:
+    """Internal function to parse a comma separated group of fields, starting at `index`"""
+    result: Projection = {}
+    length = len(text)
+    while index < length:
+        start = index
+        while index < length and text[index] not in ",()":
+            index += 1
+        names = text[start:index].split(".")
+        if not all(names):
+            raise ValueError("Expected a field name at position {position}".format(position=start))
+
+        sub = None
+        if index < length and text[index] == "(":
+            sub, index = _parse_group(text, index + 1, nested=True)
+        _merge(result, names, sub)
+
+        if index >= length:
+            break
+        if text[index] == ",":
+            index += 1
+            continue
+        if text[index] == ")" and nested:
+            return result, index + 1
+        raise ValueError("Unexpected `{char}` at position {position}".format(char=text[index], position=index))
+    if nested:
+        raise ValueError("A closing parenthesis is missing")
+    return result, index
+
+
+def parse(fields: typing.Optional[str]) -> typing.Optional[Projection]:
+    """
+    Parses the given fields projection
+
+    Fields are separated by commas, nested fields can either
+    be accessed with dots (`author.name`) or grouped with parentheses (`author(name,email)`).
+
+    Parameters
+    ----------
+    fields: str
+        The projection, as sent by the client
+
+    Returns
+    -------
+    Projection | None
+        The parsed projection, None if no field is requested
+
+    Raises
+    ------
+    ValueError
+        If the projection is malformed
+    """
+    text = "".join(str(fields or "").split())
+    if not text:
+        return None
+    return _parse_group(text, 0, nested=False)[0]
+
+
+def validate(projection: typing.Optional[Projection], returns: typing.Iterable["models.Return"], path: str = "") -> None:
+    """
+    Verifies that the projection only requests fields declared in `returns`
+
+    Nothing is verified if no return value is declared.
+
+    Raises
+    ------
+    ValueError
+        If a requested field is not declared
+    """
+    if not projection:
+        return
+    declared = {element.name: element for element in returns}
+    if not declared:
+        return
+    for name, sub in projection.items():
+        current_path = "{path}.{name}".format(path=path, name=name) if path else name
+        if name not in declared:
+            raise ValueError("`{path}` is not a field returned by this endpoint".format(path=current_path))
+        if sub:
+            validate(sub, declared[name].children, path=current_path)
+
+
+def includes(projection: typing.Optional[Projection], path: str) -> bool:
+    """
+    Checks if the given field path is requested by the projection
+
+    This can be used by the handlers to skip computing the fields which are not requested.
+
+    Example
+    -------
+    >>> @app.route
+    ... def article(projection):
+    ...     result = {"id": 1, "title": "Hello"}
+    ...     if includes(projection, "stats.views"):
+    ...         result["stats"] = {"views": count_views()}
+    ...     return result
+
+    Parameters
+    ----------
+    projection: Projection | None
+        The parsed projection, None meaning that every field is requested
+    path: str
+        The dot separated path to the field
+    """
+    for name in str(path).split("."):
+        if projection is None:
+            return True
+        if name not in projection:
+            return False
+        projection = projection[name]
+    return True
+
+
+def apply(data: typing.Any, projection: typing.Optional[Projection]) -> typing.Any:
+    """
+    Keeps only the requested fields in `data`
+
+    Mappings and dataclasses are projected, iterables are projected item by item
+    (lazily for generators and other iterators) and any other value is kept as is.
+
+    Parameters
+    ----------
+    data: Any
+        The data returned by the handler
+    projection: Projection | None
+        The parsed projection
+    """
+    if projection is None or data is None or isinstance(data, (str, bytes, int, float)):
+        return data
+    if isinstance(data, dict) or utils.unpack.is_unpackable(data):
+        return {name: apply(data[name], sub) for name, sub in projection.items() if name in data}
+    if dataclasses.is_dataclass(data) and not isinstance(data, type):
+        return {name: apply(getattr(data, name), sub) for name, sub in projection.items() if hasattr(data, name)}
+    if isinstance(data, (list, tuple, set, frozenset)):
+        return [apply(item, projection) for item in data]
+    if hasattr(data, "read") and hasattr(data, "tell") and hasattr(data, "seek"):
+        return data
+    if isinstance(data, typing.Iterable):
+        return (apply(item, projection) for item in data)
+    return data
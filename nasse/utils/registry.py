@@ -0,0 +1,210 @@
+"""
+Ahead-of-time compiled endpoints registries
+
+The fields of the endpoints which are derived from their handlers (docstring parameters,
+description, category, returned values) can be computed once, with `nasse --compile`,
+and loaded by the production workers instead of parsing the docstrings again.
+
+An entry is only used if the source file of the handler did not change since the compilation
+and if the endpoint is declared with the same arguments.
+
+Note: The registry is a pickle file, only load registries you generated yourself.
+"""
+import gc
+import os
+import pathlib
+import pickle
+import threading
+import typing
+
+from nasse.__info__ import __version__
+
+REGISTRY_VERSION = 1
+"""The version of the registry format"""
+
+DEFAULT_PATH = pathlib.Path(".nasse") / "registry.pickle"
+"""The default location of the compiled registry"""
+
+Key = typing.Tuple[str, str, str]
+
+
+def key(endpoint: "models.Endpoint") -> Key:
+    """
+    Returns the key identifying the given endpoint in a registry
+
+    Parameters
+    ----------
+    endpoint: models.Endpoint
+        The endpoint
+    """
+    handler = endpoint.handler
+    return (getattr(handler, "__module__", None) or "",
+            getattr(handler, "__qualname__", None) or getattr(handler, "__name__", ""),
+            endpoint.path)
+
+
+def _source(handler: typing.Callable) -> typing.Optional[str]:
+    """Internal function returning the file where the handler got defined"""
+    try:
+        return handler.__code__.co_filename
+    except AttributeError:
+        return None
+
+
+def _inputs(pending: dict) -> tuple:
+    """Internal function returning what the derived fields are computed from, besides the handler itself"""
+    return (sorted(pending["fields"]), pending["description"], pending["returns"],
+            pending["parameters"], pending["dynamics"])
+
+
+class Registry:
+    """A compiled endpoints registry"""
+
+    def __init__(self, entries: typing.Optional[typing.Dict[Key, dict]] = None) -> None:
+        """
+        Parameters
+        ----------
+        entries: dict, optional
+            The compiled entries
+        """
+        self.entries = entries or {}
+        self._mtimes: typing.Dict[str, typing.Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "Registry({count} endpoints)".format(count=len(self.entries))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def mtime(self, file: typing.Optional[str]) -> typing.Optional[int]:
+        """
+        Returns the modification time of the given file, in nanoseconds (cached)
+
+        Parameters
+        ----------
+        file: str, optional
+            The file path
+        """
+        if file is None:
+            return None
+        try:
+            return self._mtimes[file]
+        except KeyError:
+            try:
+                result = os.stat(file).st_mtime_ns
+            except OSError:
+                result = None
+            with self._lock:
+                self._mtimes[file] = result
+            return result
+
+    def add(self, endpoint: "models.Endpoint") -> bool:
+        """
+        Resolves the given endpoint and adds it to the registry
+
+        Parameters
+        ----------
+        endpoint: models.Endpoint
+            An endpoint which did not get resolved yet
+
+        Returns
+        -------
+        bool
+            If the endpoint could be added
+        """
+        pending = endpoint.__dict__.get("_pending", None)
+        file = _source(endpoint.handler)
+        mtime = self.mtime(file)
+        if pending is None or mtime is None:
+            return False
+        inputs = _inputs(pending)
+        endpoint._resolve()
+        entry = {
+            "source": (file, mtime),
+            "inputs": inputs,
+            "values": {field: getattr(endpoint, field) for field in pending["fields"]}
+        }
+        try:
+            # some values might not be picklable (types defined in functions, lambdas, etc.)
+            pickle.dumps(entry)
+        except Exception:
+            return False
+        self.entries[key(endpoint)] = entry
+        return True
+
+    def apply(self, endpoint: "models.Endpoint") -> bool:
+        """
+        Fills the derived fields of the given endpoint from the registry, if they are up to date
+
+        Parameters
+        ----------
+        endpoint: models.Endpoint
+            The endpoint which just got declared
+
+        Returns
+        -------
+        bool
+            If the registry got used
+        """
+        entry = self.entries.get(key(endpoint), None)
+        pending = endpoint.__dict__.get("_pending", None)
+        if entry is None or pending is None:
+            return False
+        file, mtime = entry["source"]
+        if file != _source(endpoint.handler) or mtime != self.mtime(file) or entry["inputs"] != _inputs(pending):
+            return False
+        endpoint._resolve(values=entry["values"])
+        return True
+
+    def dump(self, path: typing.Union[pathlib.Path, str, None] = None) -> pathlib.Path:
+        """
+        Writes the registry to the given file
+
+        Parameters
+        ----------
+        path: pathlib.Path | str, optional
+            The file to write to, `DEFAULT_PATH` by default
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the written file
+        """
+        path = pathlib.Path(path or DEFAULT_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            pickle.dump({"version": REGISTRY_VERSION, "nasse": __version__, "entries": self.entries},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
+        # workers never read a partially written registry
+        temporary.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: typing.Union[pathlib.Path, str, None] = None) -> "Registry":
+        """
+        Loads a registry previously written with `Registry.dump`
+
+        Parameters
+        ----------
+        path: pathlib.Path | str, optional
+            The file to read, `DEFAULT_PATH` by default
+
+        Raises
+        ------
+        ValueError
+            If the registry got compiled by another version of Nasse
+        """
+        # the collections triggered by the many small objects being unpickled make loading about ten times slower
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(pathlib.Path(path or DEFAULT_PATH), "rb") as file:
+                data = pickle.load(file)
+        finally:
+            if enabled:
+                gc.enable()
+        if not isinstance(data, dict) or data.get("version") != REGISTRY_VERSION or data.get("nasse") != __version__:
+            raise ValueError("The registry got compiled by another version of Nasse")
+        return cls(data["entries"])
@@ -161,3 +161,145 @@ def resolve(path: str, routes: typing.Iterable[Path]):
 
     # pylint: disable=protected-access
     return sorted(results, key=lambda element: element[0]._dynamics_num)[0]
+
+
+# The more specific casts are tried first when multiple dynamic parts could match a segment
+CAST_PRIORITY = {int: 0, float: 1, str: 2}
+
+
+class Node:
+    """A node of the Router trie, representing a path segment"""
+
+    __slots__ = ("static", "dynamics", "route", "names")
+
+    def __init__(self) -> None:
+        self.static: typing.Dict[str, "Node"] = {}
+        self.dynamics: typing.List[typing.Tuple[typing.Callable[[str], typing.Any], "Node"]] = []
+        self.route: typing.Optional[Path] = None
+        self.names: typing.Tuple[str, ...] = ()
+
+    def child(self, part: Part) -> "Node":
+        """Returns (and creates if needed) the child node for the given part"""
+        if not isinstance(part, Dynamic):
+            try:
+                return self.static[part.part]
+            except KeyError:
+                node = self.static[part.part] = Node()
+                return node
+        for cast, node in self.dynamics:
+            if cast is part.cast:
+                return node
+        node = Node()
+        self.dynamics.append((part.cast, node))
+        self.dynamics.sort(key=lambda element: CAST_PRIORITY.get(element[0], len(CAST_PRIORITY)))
+        return node
+
+
+class Router:
+    """
+    A segment trie compiled from `Path` objects
+
+    The lookup cost depends on the depth of the requested path instead of the number of routes.
+
+    Static segments always win over dynamic ones, and dynamic segments are tried
+    from the most specific cast (`int`, then `float`, then `str`), the values being cast while walking.
+    When two routes share the same path, the first one added is kept.
+
+    `casts` can be used to replace the function used to cast a dynamic part,
+    for example to make it stricter than the python type.
+
+    Example
+    -------
+    >>> router = Router(["/users/<int:id>", "/users/me"])
+    >>> router.resolve("/users/1")
+    (Path("/users/<int:id>"), {'id': 1})
+    >>> router.resolve("/users/me")
+    (Path("/users/me"), {})
+    """
+
+    def __init__(self,
+                 routes: typing.Optional[typing.Iterable[typing.Union[Path, str]]] = None,
+                 casts: typing.Optional[typing.Dict[typing.Callable, typing.Callable[[str], typing.Any]]] = None) -> None:
+        self.root = Node()
+        self.casts = dict(casts or {})
+        self.routes: typing.List[Path] = []
+        for route in routes or []:
+            self.add(route)
+
+    def __repr__(self) -> str:
+        return f"Router({len(self.routes)} routes)"
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def add(self, route: typing.Union[Path, str]) -> Path:
+        """
+        Adds a new route to the router
+
+        Parameters
+        ----------
+        route: Path | str
+            The route to add
+
+        Returns
+        -------
+        Path
+            The parsed route
+        """
+        if not isinstance(route, Path):
+            route = Path(route)
+        node = self.root
+        for part in route.parts:
+            node = node.child(part)
+        if node.route is None:
+            node.route = route
+            node.names = tuple(dynamic.name for dynamic in route.dynamics)
+            self.routes.append(route)
+        return route
+
+    def resolve(self, path: str) -> typing.Tuple[Path, typing.Dict[str, typing.Any]]:
+        """
+        Resolves the path to determine which route to go for
+
+        Parameters
+        ----------
+        path: str
+            The requested path
+
+        Returns
+        -------
+        tuple[Path, dict[str, Any]]
+            The matching route and its casted dynamic values
+
+        Raises
+        ------
+        PathNotFound
+            When no route matches the path
+        """
+        values = []
+        node = self._walk(self.root, Path.splitter(path), 0, values)
+        if node is None:
+            raise PathNotFound("(404) Couldn't find the given path")
+        return node.route, dict(zip(node.names, values))
+
+    def _walk(self, node: Node, parts: typing.List[str], index: int, values: typing.List[typing.Any]) -> typing.Optional[Node]:
+        """Internal method to walk down the trie, backtracking when a branch does not lead to any route"""
+        if index == len(parts):
+            return node if node.route is not None else None
+        part = parts[index]
+        child = node.static.get(part)
+        if child is not None:
+            found = self._walk(child, parts, index + 1, values)
+            if found is not None:
+                return found
+        for cast, child in node.dynamics:
+            try:
+                value = self.casts.get(cast, cast)(part)
+            except (ValueError, TypeError):
+                continue
+            values.append(value)
+            found = self._walk(child, parts, index + 1, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
@@ -107,7 +107,11 @@ def endpoint_to_python(endpoint: Endpoint, explicit_path: bool = True, indent: s
         result += indent + "methods=" + str(endpoint.methods) + ",\n"
 
     if not endpoint.json:
-        result += indent + "json=False"
+        result += indent + "json=False,\n"
+
+    if endpoint.stream:
+        result += indent + "stream=" + \
+            json.dumps(endpoint.stream, ensure_ascii=False) + ",\n"
 
     for attribute in ("name", "category", "sub_category", "description", "base_dir"):
         element = getattr(endpoint, attribute)
@@ -0,0 +1,41 @@
+"""
+WSGI helpers
+"""
+import typing
+
+
+class CountingIterable:
+    """
+    Wraps a response iterable, counting the bytes sent while it is consumed
+
+    The chunks are encoded to UTF-8 when needed, so that `size` is the number of bytes sent on the wire
+    (before any transfer encoding applied by the server).
+    """
+
+    __slots__ = ("iterable", "size")
+
+    def __init__(self, iterable: typing.Iterable[typing.Union[bytes, str]]) -> None:
+        """
+        Parameters
+        ----------
+        iterable: Iterable[bytes | str]
+            The response iterable
+        """
+        self.iterable = iterable
+        self.size = 0
+
+    def __repr__(self) -> str:
+        return "CountingIterable({size} bytes)".format(size=self.size)
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        for chunk in self.iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        """Closes the wrapped iterable, as required by the WSGI specification"""
+        close = getattr(self.iterable, "close", None)
+        if close is not None:
+            close()
@@ -35,34 +35,82 @@ Arranged for Nasse
 
 It supports bytes, file-like objects, null (None), booleans, and fallback for non-supported types.
 The API is also a little bit simpler.
+
+The `Node` tree is kept for compatibility, but `encode` and `iterencode` use
+a generator based writer which emits the chunks directly from the data.
 """
 import base64
 import collections
 import collections.abc
+import functools
 import re
 import typing
 
 from nasse import utils
 
-start_ranges = "|".join(
-    "[{0}]".format(r)
-    for r in [
-        "\xC0-\xD6",
-        "\xD8-\xF6",
-        "\xF8-\u02FF",
-        "\u0370-\u037D",
-        "\u037F-\u1FFF",
-        "\u200C-\u200D",
-        "\u2070-\u218F",
-        "\u2C00-\u2FEF",
-        "\u3001-\uD7FF",
-        "\uF900-\uFDCF",
-        "\uFDF0-\uFFFD",
-    ]
-)
-
-NameStartChar = re.compile(r"(:|[A-Z]|_|[a-z]|{0})".format(start_ranges))
-NameChar = re.compile(r"(\-|\.|[0-9]|\xB7|[\u0300-\u036F]|[\u203F-\u2040])")
+start_ranges = "".join([
+    "\xC0-\xD6",
+    "\xD8-\xF6",
+    "\xF8-\u02FF",
+    "\u0370-\u037D",
+    "\u037F-\u1FFF",
+    "\u200C-\u200D",
+    "\u2070-\u218F",
+    "\u2C00-\u2FEF",
+    "\u3001-\uD7FF",
+    "\uF900-\uFDCF",
+    "\uFDF0-\uFFFD",
+])
+char_ranges = "\\-.0-9\xB7\u0300-\u036F\u203F-\u2040"
+
+# most tags are plain ASCII names, checked without compiling the full unicode patterns
+_ASCII_NAME = re.compile(r"[:A-Z_a-z][:A-Z_a-z\-.0-9]*")
+
+
+@functools.lru_cache(maxsize=None)
+def _name_patterns() -> typing.Tuple[typing.Pattern, typing.Pattern, typing.Pattern]:
+    """
+    Internal function compiling the `NameStartChar`, `NameChar` and `ValidName` patterns
+
+    Compiling those big unicode ranges takes a while, so it is only done when needed.
+    """
+    return (re.compile("[:A-Z_a-z{0}]".format(start_ranges)),
+            re.compile("[{0}]".format(char_ranges)),
+            re.compile("[:A-Z_a-z{start}][:A-Z_a-z{start}{char}]*".format(start=start_ranges, char=char_ranges)))
+
+
+def __getattr__(name: str):
+    # the patterns are compiled lazily
+    if name in ("NameStartChar", "NameChar", "ValidName"):
+        return _name_patterns()[("NameStartChar", "NameChar", "ValidName").index(name)]
+    raise AttributeError("module {module!r} has no attribute {name!r}".format(module=__name__, name=name))
+
+INDENT = "    "
+"""The indentation unit used when the result is not minified"""
+BUFFER_SIZE = 16384
+"""The approximate size of the chunks sent when streaming"""
+
+
+@functools.lru_cache(maxsize=4096)
+def sanitize_tag(wrap: str) -> str:
+    """
+    Convert `wrap` into a valid tag name applying the XML Naming Rules.
+
+    The results are cached per key, as the same keys are usually found over and over.
+    Refer to `Node.sanitize_element` for more information on the rules.
+    """
+    if wrap.lower().startswith("xml"):
+        wrap = "_" + wrap
+    elif _ASCII_NAME.fullmatch(wrap):
+        return wrap
+    NameStartChar, NameChar, ValidName = _name_patterns()
+    if ValidName.fullmatch(wrap):
+        return wrap
+    return "".join(
+        ["_" if not NameStartChar.match(wrap) else ""]
+        + ["_" if not (NameStartChar.match(c)
+                       or NameChar.match(c)) else c for c in wrap]
+    )
 
 ########################
 # NODE
@@ -171,7 +219,7 @@ class Node(object):
         elif isinstance(data, typing.Iterable):
             return "iterable"
         else:
-            utils.logging.logger.debug("Object of type <{type}> will be converted to str while encoding to XML".format(type=data.__class__.__name__))
+            utils.logging.get_logger().debug("Object of type <{type}> will be converted to str while encoding to XML".format(type=data.__class__.__name__))
             return "flat"
 
     def convert(self):
@@ -249,17 +297,212 @@ class Node(object):
             :ref: http://www.w3.org/TR/REC-xml/#NT-NameChar
         """
         if wrap and isinstance(wrap, str):
-            if wrap.lower().startswith("xml"):
-                wrap = "_" + wrap
-            return "".join(
-                ["_" if not NameStartChar.match(wrap) else ""]
-                + ["_" if not (NameStartChar.match(c)
-                               or NameChar.match(c)) else c for c in wrap]
-            )
+            return sanitize_tag(wrap)
         else:
             return wrap
 
 
+########################
+# WRITER
+########################
+
+FLAT, NULL, MAPPING, BYTES, FILE, ITERABLE = range(6)
+
+
+def _kind(data: typing.Any) -> int:
+    """Returns the kind of data, following `Node.determine_type`"""
+    if isinstance(data, (int, float, str)):
+        return FLAT
+    if data is None:
+        return NULL
+    if isinstance(data, dict):
+        return MAPPING
+    if isinstance(data, (list, tuple)):
+        return ITERABLE
+    if utils.unpack.is_unpackable(data):
+        return MAPPING
+    if isinstance(data, bytes):
+        return BYTES
+    if hasattr(data, "read") and hasattr(data, "tell") and hasattr(data, "seek"):
+        return FILE
+    if isinstance(data, typing.Iterable):
+        return ITERABLE
+    utils.logging.get_logger().debug("Object of type <{type}> will be converted to str while encoding to XML".format(type=data.__class__.__name__))
+    return FLAT
+
+
+def _escape(value: str) -> str:
+    """Escapes the XML entities in the given text"""
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    return value
+
+
+def _text(kind: int, data: typing.Any) -> str:
+    """Returns the text content for a value which doesn't have any children"""
+    if kind == NULL:
+        return "null"
+    if kind == BYTES:
+        return base64.b64encode(data).decode("utf-8")
+    if kind == FILE:
+        position = data.tell()  # storing the current position
+        content = data.read()  # read it (place the cursor at the end)
+        data.seek(position)  # go back to the original position
+        if "b" in getattr(data, "mode", ""):  # if binary mode
+            return base64.b64encode(content).decode("utf-8")
+        return _escape(str(content))
+    if isinstance(data, (int, float)):
+        return str(data)
+    return _escape(str(data))
+
+
+def _keys(data: typing.Any) -> typing.Iterable:
+    """Returns the keys of the given mapping, in the order they should be written"""
+    if isinstance(data, collections.OrderedDict):
+        return data
+    return sorted(data)
+
+
+def _leaf(wrap: typing.Any, tag: typing.Any, kind: int, data: typing.Any, level: int, indent: typing.Optional[str]) -> str:
+    """Internal function writing a value which doesn't have any children"""
+    value = _text(kind, data)
+    if indent is not None and "\n" in value:
+        value = value.replace("\n", "\n" + indent * level)
+    if tag:
+        value = "<{0}>{1}</{0}>".format(tag, value)
+    if wrap:
+        return "<{0}>{1}</{0}>".format(wrap, value)
+    return value
+
+
+def _write(wrap: typing.Any, tag: typing.Any, data: typing.Any, level: int, indent: typing.Optional[str]) -> typing.Generator[str, None, None]:
+    """
+    Internal generator writing the given value
+
+    Every new line written at this level is followed by `level` indentations,
+    which produces the same result as `Node.serialize` without having to re-split
+    the serialized children on each nesting level.
+    """
+    start, end = "", ""
+    if wrap:
+        start = "<{0}>".format(wrap)
+        end = "</{0}>".format(wrap)
+
+    kind = _kind(data)
+
+    if kind == MAPPING:
+        keys = _keys(data)
+        if not keys:
+            yield start + end
+            return
+        yield start
+        if indent is None:
+            for key in keys:
+                yield from _write_child(sanitize_tag(key) if key and isinstance(key, str) else key, "", data[key], level, indent)
+        elif wrap:
+            # the children are indented one level deeper
+            newline = "\n" + indent * (level + 1)
+            for key in keys:
+                yield newline
+                yield from _write_child(sanitize_tag(key) if key and isinstance(key, str) else key, "", data[key], level + 1, indent)
+            yield "\n" + indent * level
+        else:
+            newline = "\n" + indent * level
+            first = True
+            for key in keys:
+                if first:
+                    first = False
+                else:
+                    yield newline
+                yield from _write_child(sanitize_tag(key) if key and isinstance(key, str) else key, "", data[key], level, indent)
+        yield end
+        return
+
+    if kind == ITERABLE:
+        # each item repeats the wrapping tag
+        newline = "\n" + indent * level if indent is not None else ""
+        deeper = "\n" + indent * (level + 1) if indent is not None else ""
+        empty = True
+        for item in data:
+            if empty:
+                empty = False
+            else:
+                yield newline
+            item_kind = _kind(item)
+            if item_kind == FLAT:
+                yield _leaf("", wrap, item_kind, item, level, indent)
+            else:
+                yield start + deeper
+                yield from _write("", wrap, item, level + 1, indent)
+                yield newline + end
+        if empty:
+            yield start + end
+        return
+
+    yield _leaf(wrap, tag, kind, data, level, indent)
+
+
+def _write_child(wrap: typing.Any, tag: typing.Any, data: typing.Any, level: int, indent: typing.Optional[str]) -> typing.Iterable[str]:
+    """Internal function writing a child value, avoiding to create a generator for the values without children"""
+    kind = _kind(data)
+    if kind == MAPPING or kind == ITERABLE:
+        return _write(wrap, tag, data, level, indent)
+    return (_leaf(wrap, tag, kind, data, level, indent),)
+
+
+def buffered(chunks: typing.Iterable[str], size: int = BUFFER_SIZE) -> typing.Generator[str, None, None]:
+    """
+    Groups the given chunks to yield strings of approximately `size` characters
+
+    Parameters
+    ----------
+        chunks: Iterable[str]
+            The chunks to group
+        size: int
+            The approximate size of the yielded strings
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def iterencode(data, minify: bool = False, buffer: typing.Optional[int] = None) -> typing.Generator[str, None, None]:
+    """
+    Encodes Python data to XML, yielding each string representation as available.
+
+    Example
+    -------
+    >>> for chunk in iterencode(big_list, buffer=16384):
+    ...     socket.write(chunk)
+
+    Parameters
+    ----------
+        data: Any
+            The data to be converted
+        minify: bool
+            If the result should be minified
+        buffer: int, optional
+            If provided, the chunks are grouped to approximately this size
+    """
+    # wrap should be app.id
+    chunks = _write("nasse", "", data, 0, None if minify else INDENT)
+    if buffer:
+        return buffered(chunks, size=buffer)
+    return chunks
+
+
 def encode(data, minify: bool = False):
     """
     Encodes Python data to XML
@@ -271,30 +514,4 @@ def encode(data, minify: bool = False):
         minify: bool
             If the result should be minified
     """
-    if minify:
-        def ret(nodes, wrapped): return "".join(nodes)
-    else:
-        def ret(nodes, wrapped):
-            """
-                Indent nodes depending on value of wrapped and indent
-                If not wrapped, then don't indent
-                Otherwise,
-                    Seperate each child by a newline
-                    and indent each line in the child by one indent unit
-            """
-            def eachline(nodes):
-                """Yield each line in each node"""
-                for node in nodes:
-                    for line in node.split("\n"):
-                        yield line
-            if wrapped:
-                seperator = "\n{0}".format("    ")
-                surrounding = "\n{0}{{0}}\n".format("    ")
-            else:
-                seperator = "\n"
-                surrounding = "{0}"
-            return surrounding.format(seperator.join(eachline(nodes)))
-
-    return Node(  # wrap should be app.id
-        wrap="nasse", data=data, iterables_repeat_wrap=True
-    ).serialize(ret)
+    return "".join(iterencode(data, minify=minify))
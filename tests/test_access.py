@@ -0,0 +1,31 @@
+import json
+
+import werkzeug.test
+
+from nasse import Nasse
+
+
+def test_access_log(tmp_path):
+    path = tmp_path / "access.log"
+    app = Nasse("test", logging_level="ERROR", access_log=path,
+                access_log_sampling={"/health": 0.25}, access_log_slow=None)
+
+    @app.route("/health", methods="GET")
+    def health():
+        return "ok"
+
+    @app.route("/fail", methods="GET")
+    def fail():
+        raise ValueError("nope")
+
+    client = werkzeug.test.Client(app.wsgi)
+    for _ in range(8):
+        client.get("/health", buffered=True)
+    client.get("/fail", buffered=True)
+    app.access_log.writer.flush()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["endpoint"] for record in records] == ["/health", "/health", "/fail"]
+    assert records[0]["status"] == 200 and records[0]["rate"] == 0.25 and records[0]["bytes"] > 0
+    assert records[-1]["error"] is not None and records[-1]["status"] == 500 and records[-1]["rate"] == 1
+    assert set(records[0]["timings"]) == {"global", "verification", "authentication", "processing", "formatting"}
@@ -0,0 +1,44 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+APP = '''
+from nasse import Nasse
+
+app = Nasse("cli", logging_level="ERROR")
+
+
+@app.route("/hello", methods="GET")
+def hello(name: str = "world"):
+    """Says hello"""
+    return "Hello " + name
+'''
+
+
+def run(tmp_path, *args):
+    """Runs the `nasse` console script (which exits with the value returned by `entry`)"""
+    (tmp_path / "app.py").write_text(APP)
+    return subprocess.run([sys.executable, "-c", "import sys; from nasse.__main__ import entry; sys.exit(entry())",
+                           "app.py", *args],
+                          cwd=tmp_path, capture_output=True, text=True, timeout=120,
+                          env=dict(os.environ, PYTHONPATH=str(pathlib.Path(__file__).parent.parent)))
+
+
+def test_compile(tmp_path):
+    result = run(tmp_path, "--compile", "--registry", "registry.pickle")
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "registry.pickle").is_file()
+
+
+def test_bench(tmp_path):
+    result = run(tmp_path, "--bench", "--endpoint", "/hello", "--requests", "20", "--concurrency", "2",
+                 "--bench-output", "bench.json")
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "bench.json").is_file()
+
+
+def test_replay(tmp_path):
+    (tmp_path / "capture").write_text('{"time":1,"method":"GET","endpoint":"/hello","path":"/hello","args":{"name":["a"]}}\n' * 5)
+    result = run(tmp_path, "--replay", "capture", "--speed", "0")
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,93 @@
+import pathlib
+import threading
+
+import requests
+from werkzeug.serving import make_server
+
+import nasse
+from nasse.utils import concurrency
+
+THREADS = 100
+REQUESTS = 3
+
+
+def make_app(tmp_path):
+    # only recording the calls made in this file
+    app = nasse.Nasse("concurrency", debug=True, log_file=tmp_path / "log", compress=False, base_dir=pathlib.Path(__file__).parent)
+    app.config.logger.writer.write = lambda console=None, file=None: None  # keeping the output quiet
+
+    @app.route("/echo")
+    def echo(marker: str, logger):
+        logger.log("marker {marker}".format(marker=marker))
+        return {"marker": marker}
+
+    return app
+
+
+def check(response, marker: str):
+    assert response["data"] == {"marker": marker}
+    logs = [log["msg"] for log in response["debug"]["logs"] if log["msg"].startswith("marker")]
+    assert logs == ["marker {marker}".format(marker=marker)]
+    assert [frame["name"] for frame in response["debug"]["call_stack"]].count("echo") == 1
+
+
+def hammer(send, threads: int = THREADS):
+    failures = []
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        barrier.wait()
+        for request in range(REQUESTS):
+            marker = "{index}-{request}".format(index=index, request=request)
+            try:
+                check(send(marker), marker)
+            except Exception as err:
+                failures.append(err)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert failures == []
+
+
+def test_in_process(tmp_path):
+    app = make_app(tmp_path)
+    try:
+        client = app.test_client()
+        hammer(lambda marker: client.get("/echo", query_string={"marker": marker, "call_stack": "true"}).json)
+        assert len(set(receiver.__name__ for _, receiver in app.dispatcher.receivers.values())) == len(app.endpoints)
+    finally:
+        threading.settrace(None)
+
+
+def test_threaded_server(tmp_path):
+    app = make_app(tmp_path)
+    server = make_server("127.0.0.1", 0, app.wsgi, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = "http://127.0.0.1:{port}/echo".format(port=server.server_port)
+    try:
+        hammer(lambda marker: requests.get(url, params={"marker": marker, "call_stack": "true"}).json(), threads=50)
+    finally:
+        server.shutdown()
+        threading.settrace(None)
+
+
+
+def test_counter(monkeypatch):
+    for gil in (True, False):
+        monkeypatch.setattr(concurrency, "gil_enabled", lambda: gil)
+        counter = concurrency.Counter(1)
+        numbers = []
+
+        def worker():
+            numbers.extend([next(counter) for _ in range(1000)])
+
+        workers = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        assert sorted(numbers) == list(range(1, 16001))
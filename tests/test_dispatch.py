@@ -0,0 +1,74 @@
+import werkzeug.test
+
+from nasse import Nasse
+
+
+def test_dispatch():
+    app = Nasse("test", fast_dispatch=True, logging_level="ERROR")
+
+    @app.route("/users/<int:id>", methods="GET")
+    def user(id):
+        return {"id": id}
+
+    @app.flask.route("/plain")
+    def plain():
+        return "flask"
+
+    fast = werkzeug.test.Client(app.wsgi)
+    slow = werkzeug.test.Client(app.flask)
+    for method, url in [("GET", "/users/12"), ("GET", "/users/-1"), ("POST", "/users/1"),
+                        ("GET", "/plain"), ("GET", "/nope"), ("GET", "/users/12?format=xml")]:
+        fast_response = fast.open(url, method=method)
+        slow_response = slow.open(url, method=method)
+        assert fast_response.status_code == slow_response.status_code
+        assert fast_response.get_data() == slow_response.get_data()
+
+
+def test_dispatch_flask_rules():
+    app = Nasse("test", fast_dispatch=True, logging_level="ERROR")
+
+    @app.route("/users/<name>", methods="GET")
+    def user(name):
+        return {"name": name}
+
+    @app.flask.route("/users/me")
+    def me():
+        return "raw"
+
+    fast = werkzeug.test.Client(app.wsgi)
+    slow = werkzeug.test.Client(app.flask)
+    for url in ("/users/me", "/users/other", "/users/meow"):
+        assert fast.get(url).get_data() == slow.get(url).get_data()
+    assert fast.get("/users/me").get_data() == b"raw"
+
+
+def test_dispatch_flask_hooks():
+    app = Nasse("test", fast_dispatch=True, logging_level="ERROR")
+    calls = []
+
+    @app.route("/hello", methods="GET")
+    def hello():
+        return "hello"
+
+    client = werkzeug.test.Client(app.wsgi)
+    assert client.get("/hello").status_code == 200
+
+    @app.flask.before_request
+    def hook():
+        calls.append(True)
+
+    assert client.get("/hello").status_code == 200
+    assert client.get("/hello").status_code == 200
+    assert len(calls) == 2
+
+
+def test_get_current():
+    import pytest
+    from nasse.request import get_current
+
+    with pytest.raises(RuntimeError):
+        get_current()
+    app = Nasse("test", logging_level="ERROR")
+    with app.flask.app_context():
+        with pytest.raises(RuntimeError):
+            get_current()
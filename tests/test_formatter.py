@@ -0,0 +1,34 @@
+from nasse.utils import formatter
+
+
+def test_format():
+    assert formatter.format("no fields") == "no fields"
+    assert formatter.format("{blue}x{normal}") == "\033[94mx\033[0m"
+    assert formatter.format("{a} and {b!r:>5}", a=1, b="c") == "1 and   'c'"
+    assert formatter.format("{unknown}") == "{unknown}"
+    assert formatter.format("{{escaped}}") == "{escaped}"
+    assert formatter.format("{}-{}", "%Y", None, "a", "b") == "a-b"
+
+
+def test_compile():
+    template = formatter.compile("{level} {blue}{message}{normal}", "%Y")
+    assert template is formatter.compile("{level} {blue}{message}{normal}", "%Y")
+    assert template.render(level="INFO", message="hey") == "INFO \033[94mhey\033[0m"
+    assert template.render(level="INFO", message="hey", colored=False) == "INFO hey"
+    assert formatter.remove_colors(formatter.format("{red}hey{normal}")) == "hey"
+
+
+class Caller:
+    def method(self):
+        return formatter.caller_name(skip=1)
+
+
+def test_caller_name():
+    assert Caller().method().endswith("test_formatter.Caller.method")
+    assert (lambda: formatter.caller_name(skip=1))().endswith(".<lambda>")
+    assert formatter.caller_name(skip=10000) == ""
+
+
+def test_positional_attributes():
+    assert formatter.format("{0.real}", "%Y", None, 7) == "7"
+    assert formatter.format("{0[1]} {1}", "%Y", None, "ab", "c") == "b c"
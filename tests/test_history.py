@@ -0,0 +1,90 @@
+import werkzeug.test
+
+from nasse import Nasse, models
+from nasse.utils.history import RequestHistory
+
+
+class Accounts(models.AccountManagement):
+    def retrieve_type(self, account):
+        return "admin"
+
+    def retrieve_account(self, token: str):
+        if token != "admin":
+            raise ValueError("Unknown token")
+        return {"token": token}
+
+    def verify_token(self, token: str):
+        return token == "admin"
+
+
+AUTHORIZATION = {"Authorization": "admin"}
+
+
+def test_history():
+    history = RequestHistory(3)
+    for index in range(5):
+        history.record("/a" if index % 2 else "/b", "GET", 200 if index != 3 else 500, index / 10, size=index)
+    assert len(history) == 3
+    assert [r["size"] for r in history.query()] == [4, 3, 2]
+    assert [r["size"] for r in history.query(endpoint="/a")] == [3]
+    assert [r["size"] for r in history.query(errors=True)] == [3]
+    assert [r["duration"] for r in history.query(slowest=True, limit=2)] == [0.4, 0.3]
+    assert history.query(endpoint="/unknown") == []
+
+
+def test_history_endpoint():
+    app = Nasse("test", logging_level="ERROR", request_history=10, account_management=Accounts())
+
+    @app.route("/hello", methods="GET")
+    def hello():
+        return "hello"
+
+    client = werkzeug.test.Client(app.wsgi)
+    client.get("/hello", buffered=True)
+    client.get("/hello", buffered=True)
+    assert client.get("/@nasse/requests").status_code == 403  # a login is required
+    data = client.get("/@nasse/requests?endpoint=/hello", headers=AUTHORIZATION).get_json()["data"]
+    assert data["size"] == 10
+    assert [r["endpoint"] for r in data["requests"]] == ["/hello", "/hello"]
+    assert data["requests"][0]["status"] == 200 and data["requests"][0]["size"] > 0
+
+
+def test_history_streamed_size():
+    app = Nasse("test", logging_level="ERROR", request_history=10)
+
+    @app.route("/rows", methods="GET", stream="ndjson")
+    def rows():
+        yield from ({"é": index} for index in range(3))
+
+    client = werkzeug.test.Client(app.wsgi)
+    body = client.get("/rows", buffered=True).get_data()
+    assert app.history.query()[0]["size"] == len(body)
+
+
+def test_history_endpoint_parameters():
+    app = Nasse("test", logging_level="ERROR", request_history=10, account_management=Accounts())
+    client = werkzeug.test.Client(app.wsgi)
+    response = client.get("/@nasse/requests?limit=abc", headers=AUTHORIZATION, buffered=True)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "INVALID_TYPE"
+    client.get("/@nasse/requests?limit=5", headers=AUTHORIZATION, buffered=True)
+    # the endpoint does not record itself
+    assert len(app.history) == 0
+    assert app.endpoints["/@nasse/requests"].internal
+
+
+def test_history_protection():
+    # without any way to protect it, the endpoint is not served
+    app = Nasse("test", logging_level="ERROR", request_history=10)
+    assert "/@nasse/requests" not in app.endpoints
+    assert app.history is not None
+
+    for ips in (False, True):
+        app = Nasse("test", logging_level="ERROR", request_history=10, request_history_ips=ips)
+
+        @app.route("/hello", methods="GET")
+        def hello():
+            return "hello"
+
+        werkzeug.test.Client(app.wsgi).get("/hello", environ_base={"REMOTE_ADDR": "10.0.0.1"}, buffered=True)
+        assert app.history.query()[0]["ip"] == ("10.0.0.1" if ips else None)
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+# modules which should only be imported when actually used
+LAZY_MODULES = ("nasse.docs", "nasse.tui", "rich.console", "rich.progress", "watchdog", "textual", "gunicorn")
+# generous limits, to catch regressions without being flaky (in seconds)
+MAX_IMPORT_TIME = 1.5
+MAX_OVERHEAD = 0.3  # on top of Flask
+
+
+def test_import_time():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import nasse"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative) / 1e6
+        except ValueError:  # the header
+            continue
+
+    for module in LAZY_MODULES:
+        assert module not in times
+    assert times["nasse"] < MAX_IMPORT_TIME
+    assert times["nasse"] - times["flask"] < MAX_OVERHEAD
@@ -0,0 +1,28 @@
+from nasse.utils import json
+
+
+def test_encode_response():
+    for success in (True, False):
+        result = {"success": success, "error": None if success else "ERROR", "message": "héllo \"world\"",
+                  "data": {"id": 1, "tags": ["a", {"b": None}], "empty": {}}}
+        assert json.encode_response(result) == json.encoder.encode(result)
+        assert json.encode_response(result, minify=True) == json.minified_encoder.encode(result)
+        result["debug"] = {"time": {"global": 0.1}, "logs": []}
+        assert json.encode_response(result) == json.encoder.encode(result)
+        assert json.encode_response(result, minify=True) == json.minified_encoder.encode(result)
+    assert json.encode_response({"other": 1}) == json.encoder.encode({"other": 1})
+    # non-string errors and messages are indented as nested values
+    for message in ({"reason": "a", "details": [1, 2]}, [1, {"a": None}], 1.5):
+        result = {"success": False, "error": ["A", "B"], "message": message, "data": None}
+        assert json.encode_response(result) == json.encoder.encode(result)
+        assert json.encode_response(result, minify=True) == json.minified_encoder.encode(result)
+
+
+def test_top_level_primitives():
+    # primitives at the top level are not given to `default`, which would turn them into strings
+    assert json.minified_encoder.encode(2) == "2"
+    assert json.minified_encoder.encode(1.5) == "1.5"
+    assert json.minified_encoder.encode(True) == "true"
+    assert json.minified_encoder.encode(None) == "null"
+    assert json.minified_encoder.encode("a") == '"a"'
+    assert json.minified_encoder.encode([1, 2]) == "[1,2]"
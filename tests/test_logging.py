@@ -0,0 +1,99 @@
+from nasse import Nasse
+
+
+def test_exception_reporter(monkeypatch):
+    app = Nasse("test", logging_level="ERROR")
+    rendered, warnings = [], []
+    monkeypatch.setattr(app.logger, "print_exception", lambda **kwargs: rendered.append(kwargs))
+    monkeypatch.setattr(app.logger, "warn", warnings.append)
+
+    def fail(value):
+        raise ValueError(value)
+
+    results = []
+    for index in range(5):
+        try:
+            fail(index)
+        except ValueError:
+            results.append(app.logger.report_exception())
+    try:
+        raise KeyError("other")
+    except KeyError:
+        results.append(app.logger.report_exception())
+
+    assert results == [True, False, False, False, False, True]
+    assert len(rendered) == 2
+    app.logger.reporter.summarize(force=True)
+    assert len(warnings) == 1 and "ValueError in fail" in warnings[0] and "4 more" in warnings[0]
+
+
+def make_writer(tmp_path, **kwargs):
+    from nasse.config import NasseConfig
+    from nasse.utils.logging import LogWriter
+    return LogWriter(NasseConfig(name="test", **kwargs), path=tmp_path / "log")
+
+
+def test_log_writer_rotation(tmp_path):
+    writer = make_writer(tmp_path, log_file_max_size=100, log_file_backups=2)
+    for index in range(10):
+        writer.write(file="{index}".format(index=index) * 60 + "\n")
+    writer.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["log.1", "log.2"]
+    # rotated every two lines, the oldest backups being removed
+    assert (tmp_path / "log.1").read_text() == "8" * 60 + "\n" + "9" * 60 + "\n"
+    assert (tmp_path / "log.2").read_text() == "6" * 60 + "\n" + "7" * 60 + "\n"
+
+
+def test_log_writer_drop(tmp_path):
+    writer = make_writer(tmp_path, async_logging=True, log_queue_size=1, log_queue_policy="drop")
+    with writer._lock:  # stalling the background thread
+        for index in range(10):
+            writer.write(file="line {index}\n".format(index=index))
+    writer.flush()
+    writer.write(file="last\n")
+    writer.close()
+    content = (tmp_path / "log").read_text()
+    assert "log lines were dropped because the logging queue was full" in content
+    assert content.endswith("last\n")
+    assert len(content.splitlines()) < 10
+
+
+def test_log_writer_close(tmp_path):
+    writer = make_writer(tmp_path, async_logging=True)
+    for index in range(1000):
+        writer.write(file="line {index}\n".format(index=index))
+    writer.close()
+    assert (tmp_path / "log").read_text().splitlines() == ["line {index}".format(index=index) for index in range(1000)]
+    writer.write(file="after\n")
+    assert writer._thread is None
+    writer.close()
+    assert "after" not in (tmp_path / "log").read_text()
+
+
+def test_exception_reporter_flush(monkeypatch):
+    import time
+
+    app = Nasse("test", logging_level="ERROR", exception_report_window=0.2)
+    warnings = []
+    monkeypatch.setattr(app.logger, "print_exception", lambda **kwargs: None)
+    monkeypatch.setattr(app.logger, "warn", warnings.append)
+
+    def fail():
+        raise ValueError("flush")
+
+    for _ in range(3):
+        try:
+            fail()
+        except ValueError:
+            app.logger.report_exception()
+    time.sleep(0.6)  # without any other request
+    assert len(warnings) == 1 and "2 more" in warnings[0]
+
+    app.config.exception_report_window = 100
+    for _ in range(2):
+        try:
+            fail()
+        except ValueError:
+            app.logger.report_exception()
+    app.logger.reporter.close()
+    assert len(warnings) == 2 and "1 more" in warnings[1]
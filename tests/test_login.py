@@ -0,0 +1,52 @@
+import pytest
+
+from nasse import Nasse, models
+from nasse.request import current
+
+
+class Accounts(models.AccountManagement):
+    def retrieve_type(self, account):
+        return account["type"]
+
+    def retrieve_account(self, token: str):
+        return {"type": token}
+
+    def verify_token(self, token: str):
+        return True
+
+
+@pytest.fixture
+def client():
+    app = Nasse("login", logging_level="ERROR", account_management=Accounts())
+
+    @app.route("/required", methods="GET", login=models.Login(required=True, types={"admin"}))
+    def required(account):
+        return account["type"]
+
+    @app.route("/optional", methods="GET", login=models.Login(required=False, types={"admin"}))
+    def optional(account=None):
+        return account["type"] if account else "anonymous"
+
+    return app.flask.test_client()
+
+
+def message(response):
+    return response.json["message"]
+
+
+def test_login_types(client):
+    assert message(client.get("/required", headers={"Authorization": "admin"})) == "admin"
+    response = client.get("/required", headers={"Authorization": "user"})
+    assert response.status_code == 403 and response.json["error"] == "AUTH_ERROR"
+    assert client.get("/required").status_code == 403  # missing token
+
+    assert message(client.get("/optional", headers={"Authorization": "admin"})) == "admin"
+    # the account is not given to the handler when its type is not accepted
+    assert message(client.get("/optional", headers={"Authorization": "user"})) == "anonymous"
+    assert message(client.get("/optional")) == "anonymous"
+
+
+def test_login_context(client):
+    # the request context is reset once a logged-in request got processed
+    assert client.get("/required", headers={"Authorization": "admin"}).status_code == 200
+    assert current.get(None) is None
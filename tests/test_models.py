@@ -0,0 +1,35 @@
+import miko
+
+from nasse import models
+
+
+def handler(id: int, limit: int = 10):
+    """
+    Retrieves an item
+
+    Parameters
+    ----------
+    limit: int, default = 10
+        The maximum number of results
+    """
+
+
+def test_lazy_endpoint(monkeypatch):
+    parsed = []
+    original = miko.Function
+    monkeypatch.setattr(miko, "Function", lambda func: parsed.append(func) or original(func))
+
+    endpoint = models.Endpoint(handler=handler, path="/items/<int:id>", category="")
+    assert endpoint.path == "/items/<int:id>" and endpoint.methods == {"*"}
+    assert parsed == []
+
+    assert {param.name for param in endpoint.parameters["*"]} == {"limit"}
+    assert {dynamic.name for dynamic in endpoint.dynamics["*"]} == {"id"}
+    assert endpoint.description == {"*": "Retrieves an item"}
+    assert endpoint.category == "test_models"
+    assert parsed == [handler]
+
+    endpoint = models.Endpoint(handler=handler, path="/other", description="Given")
+    endpoint.parameters = {"*": set()}
+    assert endpoint.description == {"*": "Given"}
+    assert endpoint.parameters == {"*": set()}
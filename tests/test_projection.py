@@ -0,0 +1,52 @@
+import pytest
+
+from nasse.utils import projection
+
+
+def test_parse():
+    assert projection.parse("id,author(name,email),stats.views") == {
+        "id": None,
+        "author": {"name": None, "email": None},
+        "stats": {"views": None}
+    }
+    assert projection.parse("a.b,a") == {"a": None}
+    assert projection.parse("") is None
+    for malformed in ("a,,b", "a(b", "a)b", "a(b)c", ".a"):
+        with pytest.raises(ValueError):
+            projection.parse(malformed)
+
+
+def test_apply():
+    data = [{"id": 1, "author": {"name": "a", "email": "b"}, "content": "..."}]
+    assert projection.apply(data, projection.parse("id,author.name")) == [{"id": 1, "author": {"name": "a"}}]
+    assert projection.apply(data, None) is data
+
+
+def test_includes():
+    fields = projection.parse("author.name")
+    assert projection.includes(fields, "author")
+    assert projection.includes(fields, "author.name.first")
+    assert not projection.includes(fields, "author.email")
+    assert projection.includes(None, "anything")
+
+
+def test_endpoint_fields_parameter():
+    import werkzeug.test
+
+    from nasse import Nasse, models
+
+    app = Nasse("test", logging_level="ERROR")
+
+    @app.route("/projected", methods="GET")
+    def projected():
+        return {"id": 1, "title": "Hello"}
+
+    @app.route("/own", methods="GET", parameters=models.Parameter("fields", required=False))
+    def own(fields: str = ""):
+        return {"id": 1, "fields": fields}
+
+    client = werkzeug.test.Client(app.flask)
+    assert client.get("/projected?fields=id").get_json()["data"] == {"id": 1}
+    assert client.get("/projected").get_json()["data"] == {"id": 1, "title": "Hello"}
+    # the endpoint declares its own `fields` parameter, it is not a projection
+    assert client.get("/own?fields=a(b").get_json()["data"] == {"id": 1, "fields": "a(b"}
@@ -0,0 +1,41 @@
+import miko
+
+from nasse import models
+from nasse.utils import registry
+
+
+def handler(id: int, limit: int = 10):
+    """
+    Retrieves an item
+
+    Parameters
+    ----------
+    limit: int, default = 10
+        The maximum number of results
+    """
+
+
+def test_registry(tmp_path, monkeypatch):
+    compiled = registry.Registry()
+    assert compiled.add(models.Endpoint(handler=handler, path="/items/<int:id>"))
+    path = compiled.dump(tmp_path / "registry.pickle")
+
+    parsed = []
+    original = miko.Function
+    monkeypatch.setattr(miko, "Function", lambda func: parsed.append(func) or original(func))
+
+    loaded = registry.Registry.load(path)
+    endpoint = models.Endpoint(handler=handler, path="/items/<int:id>")
+    assert loaded.apply(endpoint)
+    assert {param.name for param in endpoint.parameters["*"]} == {"limit"}
+    assert endpoint.description == {"*": "Retrieves an item"}
+    assert parsed == []
+
+    # declared with other arguments than the compiled one
+    endpoint = models.Endpoint(handler=handler, path="/items/<int:id>", description="Other")
+    assert not loaded.apply(endpoint)
+    assert endpoint.description == {"*": "Other"}
+
+    # the source file changed
+    loaded._mtimes[handler.__code__.co_filename] = 0
+    assert not loaded.apply(models.Endpoint(handler=handler, path="/items/<int:id>"))
@@ -0,0 +1,53 @@
+import werkzeug.exceptions
+
+from nasse import exceptions
+from nasse.response import encode_exception, exception_to_response
+
+
+def test_exception_to_response():
+    assert exception_to_response(werkzeug.exceptions.NotFound())[1:] == ("NOT_FOUND", 404)
+    # cached values should not leak custom messages
+    assert exception_to_response(werkzeug.exceptions.NotFound("custom"))[0] == "custom"
+    assert exception_to_response(werkzeug.exceptions.NotFound())[0] != "custom"
+    assert exception_to_response(exceptions.request.MissingParam(name="a"))[0] == "`a` is a required request value"
+    assert exception_to_response(exceptions.request.MissingParam(name="b"))[0] == "`b` is a required request value"
+    assert exception_to_response(ValueError)[1:] == ("VALUE_ERROR", 500)
+
+
+def test_encode_exception():
+    body, code = encode_exception(werkzeug.exceptions.Unauthorized())
+    assert code == 401
+    assert body.startswith('{"success":false,')
+    assert encode_exception(werkzeug.exceptions.Unauthorized()) == (body, code)
+    assert encode_exception(werkzeug.exceptions.Unauthorized(), xml=True)[0].startswith("<nasse>")
+
+
+def test_stream_ndjson():
+    import nasse
+    from nasse.response import stream_ndjson
+
+    def rows(fail: bool):
+        yield {"id": 1}
+        yield 2
+        if fail:
+            raise exceptions.request.MissingParam(name="a")
+        yield "three"
+
+    assert list(stream_ndjson(rows(False))) == ['{"id":1}\n', "2\n", '"three"\n']
+    *lines, last = stream_ndjson(rows(True))
+    assert lines == ['{"id":1}\n', "2\n"]
+    assert last == '{"success":false,"error":"MISSING_PARAM","message":"`a` is a required request value","data":{}}\n'
+
+    app = nasse.Nasse("stream", compress=False)
+
+    @app.route("/rows", stream="ndjson")
+    def handler(fail: bool = False):
+        return rows(fail)
+
+    client = app.test_client()
+    response = client.get("/rows")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert response.get_data(as_text=True) == '{"id":1}\n2\n"three"\n'
+    last = client.get("/rows", query_string={"fail": "true"}).get_data(as_text=True).splitlines()[-1]
+    assert last.startswith('{"success":false,"error":"MISSING_PARAM"')
@@ -0,0 +1,22 @@
+import pytest
+
+from nasse.utils import router
+
+
+def test_router():
+    routes = router.Router(["/users/<int:id>", "/users/me", "/users/<name>", "/users/<int:id>/posts/<float:score>"])
+    assert len(routes) == 4
+    assert routes.resolve("/users/me")[0].path == "/users/me"
+    assert routes.resolve("/users/12") == (routes.routes[0], {"id": 12})
+    assert routes.resolve("/users/someone")[1] == {"name": "someone"}
+    assert routes.resolve("/users/12/posts/1.5")[1] == {"id": 12, "score": 1.5}
+    with pytest.raises(router.PathNotFound):
+        routes.resolve("/users/12/posts/high")
+    with pytest.raises(router.PathNotFound):
+        routes.resolve("/posts")
+
+
+def test_backtracking():
+    routes = router.Router(["/a/<x>/c", "/a/b/d"])
+    assert routes.resolve("/a/b/c")[1] == {"x": "b"}
+    assert routes.resolve("/a/b/d")[0].path == "/a/b/d"
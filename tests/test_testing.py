@@ -0,0 +1,83 @@
+import nasse
+from nasse.utils import capture
+from nasse import testing
+
+
+def test_load():
+    app = nasse.Nasse("testing", logging_level="ERROR", request_history=10)
+
+    @app.route("/hello")
+    def hello(name: str = "someone"):
+        return {"hello": name}
+
+    @app.route("/fail")
+    def fail():
+        return ValueError("Something went wrong")
+
+    client = app.test_client()
+    assert client.get("/hello", query_string={"name": "me"}).json["data"] == {"hello": "me"}
+
+    result = testing.load(app, "/hello", requests=200, threads=4)
+    assert result.requests == 200 and result.statuses == {200: 200} and result.errors == {}
+    summary = result.summary()
+    assert summary["latency"]["p50"] <= summary["latency"]["p99"] <= summary["latency"]["max"]
+    assert len(app.history) == 10  # the whole pipeline got run
+
+    result = testing.load(app, "/fail", requests=5, threads=1)
+    assert result.errors == {"VALUE_ERROR": 5}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert testing.percentile(values, 50) == 50
+    assert testing.percentile(values, 99.9) == 100
+    assert testing.percentile([], 50) is None
+
+    histogram = testing.LoadResult(latencies=[0.001] * 9 + [0.1]).histogram(buckets=5)
+    assert len(histogram) == 5 and sum(count for _, count in histogram) == 10
+    assert histogram[0][1] == 9 and histogram[-1] == (0.1, 1)
+
+
+def test_replay(tmp_path):
+    app = nasse.Nasse("testing", logging_level="ERROR", capture=tmp_path / "capture")
+
+    @app.route("/items/<int:id>")
+    def item(id: int, name: str = ""):
+        return {"id": id, "name": name}
+
+    client = app.test_client()
+    for index in range(5):
+        client.get("/items/{index}".format(index=index), query_string={"name": "item", "testing_token": "secret"})
+    app.capture.writer.flush()
+
+    records = capture.read(tmp_path / "capture")
+    assert len(records) == 5
+    assert records[0]["endpoint"] == "/items/<int:id>" and records[0]["dynamics"] == {"id": 0}
+    # the values are redacted by default
+    assert records[0]["args"] == {} and records[0]["redacted"]["args"] == {"name": [4]}
+    assert records[0]["status"] == 200
+    assert "secret" not in (tmp_path / "capture").read_text()
+
+    replayed = nasse.Nasse("replayed", logging_level="ERROR")
+    replayed.route("/items/<int:id>")(item)
+    result = testing.replay(records, app=replayed, speed=None)
+    assert result.requests == 5 and result.statuses == {200: 5}
+    summary = result.summary()
+    assert list(summary["groups"]) == ["GET /items/<int:id>"]
+    assert set(testing.compare(summary, summary)["GET /items/<int:id>"].values()) == {1}
+
+
+def test_capture_values(tmp_path):
+    app = nasse.Nasse("testing", logging_level="ERROR", capture=tmp_path / "capture", capture_values={"name"})
+
+    @app.route("/login", methods="POST")
+    def login(name: str, password: str):
+        return name
+
+    app.test_client().post("/login", data={"name": "someone", "password": "hunter2", "testing_token": "secret"})
+    app.capture.writer.flush()
+    record = capture.read(tmp_path / "capture")[0]
+    assert record["form"] == {"name": ["someone"]}
+    assert record["redacted"] == {"args": {}, "form": {"password": [7]}}
+    content = (tmp_path / "capture").read_text()
+    assert "hunter2" not in content and "secret" not in content
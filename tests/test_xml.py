@@ -0,0 +1,29 @@
+from nasse.utils import xml
+
+
+def test_encode():
+    data = {"success": True, "data": {"array": [1, {"a": None}], "b": "<x>"}}
+    assert xml.encode(data) == """<nasse>
+    <data>
+        <array>1</array>
+        <array>
+            <a>null</a>
+        </array>
+        <b>&lt;x&gt;</b>
+    </data>
+    <success>True</success>
+</nasse>"""
+    assert xml.encode(data, minify=True) == "<nasse><data><array>1</array><array><a>null</a></array><b>&lt;x&gt;</b></data><success>True</success></nasse>"
+
+
+def test_iterencode():
+    data = {"rows": [{"id": index} for index in range(1000)]}
+    chunks = list(xml.iterencode(data, buffer=1024))
+    assert len(chunks) > 1
+    assert "".join(chunks) == xml.encode(data)
+
+
+def test_sanitize_tag():
+    assert xml.sanitize_tag("valid_name") == "valid_name"
+    assert xml.sanitize_tag("1 invalid") == "_1_invalid"
+    assert xml.sanitize_tag("xml") == "_xml"